@@ -2,6 +2,6 @@
 
 from __future__ import annotations
 
-from tap_telegram.tap import TapTelegram
+from tap_telegram.tap import Taptelegram
 
-TapTelegram.cli()
+Taptelegram.cli()
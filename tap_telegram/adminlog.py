@@ -0,0 +1,219 @@
+"""Admin log events: a field extractor per ``ChannelAdminLogEventAction*`` constructor."""
+
+from __future__ import annotations
+
+import re
+import typing as t
+
+from pyrogram.raw import types
+
+from tap_telegram.client import to_iso
+
+# флаги ChannelAdminLogEventsFilter, которые стрим запрашивал всегда
+DEFAULT_EVENTS_FILTER = ["join", "leave", "invite", "ban", "unban", "kick", "unkick"]
+EVENTS_FILTER_FLAGS = [
+    "join", "leave", "invite", "ban", "unban", "kick", "unkick", "promote", "demote", "info", "settings",
+    "pinned", "edit", "delete", "group_call", "invites", "send", "forums", "sub_extend", "edit_rank",
+]
+
+Extractor = t.Callable[[t.Any], t.Dict[str, t.Any]]
+
+
+def events_filter(flags: list[str] | None) -> types.ChannelAdminLogEventsFilter:
+    """Build the ``GetAdminLog`` events filter from the configured flag names."""
+    return types.ChannelAdminLogEventsFilter(**{flag: True for flag in flags or DEFAULT_EVENTS_FILTER})
+
+
+def _value(v: t.Any) -> str | None:
+    # значение «было/стало» в строку: примитивы как есть, у TL-объектов — самое говорящее поле
+    if v is None:
+        return None
+    if isinstance(v, (str, int, float, bool)):
+        return str(v)
+    if isinstance(v, list):
+        return ",".join(filter(None, map(_value, v)))
+    for attr in ("link", "title", "username", "emoticon", "short_name", "id"):
+        if getattr(v, attr, None) is not None:
+            return str(getattr(v, attr))
+    return type(v).__name__
+
+
+def _user_id(participant: t.Any) -> int | None:
+    user_id = getattr(participant, "user_id", None)
+    if user_id is None:  # ChannelParticipantBanned/Left хранят peer
+        user_id = getattr(getattr(participant, "peer", None), "user_id", None)
+    return user_id
+
+
+def _invite(invite: t.Any) -> dict:
+    admin_id = getattr(invite, "admin_id", None)
+    return {
+        "invite_link": getattr(invite, "link", None),
+        "invite_link_title": getattr(invite, "title", None),
+        "invite_admin_id": str(admin_id) if admin_id else None,
+    }
+
+
+def _none(action: t.Any) -> dict:
+    return {}
+
+
+def _change(action: t.Any) -> dict:
+    return {"prev_value": _value(getattr(action, "prev_value", None)),
+            "new_value": _value(getattr(action, "new_value", None))}
+
+
+def _toggle(action: t.Any) -> dict:
+    return {"new_value": _value(action.new_value)}
+
+
+def _pair(prev: str, new: str) -> Extractor:
+    return lambda action: {"prev_value": _value(getattr(action, prev)), "new_value": _value(getattr(action, new))}
+
+
+def _message(action: t.Any) -> dict:
+    return {"message_id": getattr(action.message, "id", None)}
+
+
+def _edit_message(action: t.Any) -> dict:
+    return {"message_id": getattr(action.new_message, "id", None),
+            "prev_value": getattr(action.prev_message, "message", None),
+            "new_value": getattr(action.new_message, "message", None)}
+
+
+def _participant(action: t.Any) -> dict:
+    return {"target_user_id": _user_id(action.participant)}
+
+
+def _participant_change(action: t.Any) -> dict:
+    return {"target_user_id": _user_id(action.new_participant) or _user_id(action.prev_participant),
+            "prev_value": _value(action.prev_participant), "new_value": _value(action.new_participant)}
+
+
+def _toggle_ban(action: t.Any) -> dict:
+    banned = isinstance(action.new_participant, types.ChannelParticipantBanned)
+    return {**_participant_change(action), "event_type": "ban" if banned else "unban"}
+
+
+def _toggle_admin(action: t.Any) -> dict:
+    promoted = isinstance(action.new_participant, (types.ChannelParticipantAdmin, types.ChannelParticipantCreator))
+    return {**_participant_change(action), "event_type": "promote" if promoted else "demote"}
+
+
+def _invite_action(action: t.Any) -> dict:
+    return _invite(action.invite)
+
+
+def _invite_edit(action: t.Any) -> dict:
+    return {**_invite(action.new_invite), "prev_value": _value(action.prev_invite),
+            "new_value": _value(action.new_invite)}
+
+
+def _join_by_request(action: t.Any) -> dict:
+    return {**_invite(action.invite), "target_user_id": action.approved_by}
+
+
+def _edit_rank(action: t.Any) -> dict:
+    return {"target_user_id": action.user_id, "prev_value": action.prev_rank, "new_value": action.new_rank}
+
+
+def _topic(action: t.Any) -> dict:
+    return {"new_value": _value(action.topic)}
+
+
+def _call(action: t.Any) -> dict:
+    return {"new_value": _value(action.call)}
+
+
+# конструктор действия → (тип события, извлекатель полей)
+ACTIONS: dict[type, tuple[str, Extractor]] = {
+    types.ChannelAdminLogEventActionParticipantJoin: ("join", _none),
+    types.ChannelAdminLogEventActionParticipantLeave: ("leave", _none),
+    types.ChannelAdminLogEventActionParticipantInvite: ("invite", _participant),
+    types.ChannelAdminLogEventActionParticipantJoinByInvite: ("join_by_invite", _invite_action),
+    types.ChannelAdminLogEventActionParticipantJoinByRequest: ("join_by_request", _join_by_request),
+    types.ChannelAdminLogEventActionParticipantToggleBan: ("toggle_ban", _toggle_ban),
+    types.ChannelAdminLogEventActionParticipantToggleAdmin: ("toggle_admin", _toggle_admin),
+    types.ChannelAdminLogEventActionParticipantSubExtend: ("sub_extend", _participant_change),
+    types.ChannelAdminLogEventActionParticipantEditRank: ("edit_rank", _edit_rank),
+    types.ChannelAdminLogEventActionParticipantMute: ("mute", _participant),
+    types.ChannelAdminLogEventActionParticipantUnmute: ("unmute", _participant),
+    types.ChannelAdminLogEventActionParticipantVolume: ("volume", _participant),
+    types.ChannelAdminLogEventActionChangeTitle: ("change_title", _change),
+    types.ChannelAdminLogEventActionChangeAbout: ("change_about", _change),
+    types.ChannelAdminLogEventActionChangeUsername: ("change_username", _change),
+    types.ChannelAdminLogEventActionChangeUsernames: ("change_usernames", _change),
+    types.ChannelAdminLogEventActionChangePhoto: ("change_photo", _pair("prev_photo", "new_photo")),
+    types.ChannelAdminLogEventActionChangeStickerSet: ("change_sticker_set", _pair("prev_stickerset", "new_stickerset")),
+    types.ChannelAdminLogEventActionChangeEmojiStickerSet: (
+        "change_emoji_sticker_set", _pair("prev_stickerset", "new_stickerset")),
+    types.ChannelAdminLogEventActionChangeLinkedChat: ("change_linked_chat", _change),
+    types.ChannelAdminLogEventActionChangeLocation: ("change_location", _change),
+    types.ChannelAdminLogEventActionChangeHistoryTTL: ("change_history_ttl", _change),
+    types.ChannelAdminLogEventActionChangeAvailableReactions: ("change_available_reactions", _change),
+    types.ChannelAdminLogEventActionChangePeerColor: ("change_peer_color", _change),
+    types.ChannelAdminLogEventActionChangeProfilePeerColor: ("change_profile_peer_color", _change),
+    types.ChannelAdminLogEventActionChangeWallpaper: ("change_wallpaper", _change),
+    types.ChannelAdminLogEventActionChangeEmojiStatus: ("change_emoji_status", _change),
+    types.ChannelAdminLogEventActionDefaultBannedRights: (
+        "default_banned_rights", _pair("prev_banned_rights", "new_banned_rights")),
+    types.ChannelAdminLogEventActionToggleSlowMode: ("toggle_slow_mode", _change),
+    types.ChannelAdminLogEventActionToggleInvites: ("toggle_invites", _toggle),
+    types.ChannelAdminLogEventActionToggleSignatures: ("toggle_signatures", _toggle),
+    types.ChannelAdminLogEventActionToggleSignatureProfiles: ("toggle_signature_profiles", _toggle),
+    types.ChannelAdminLogEventActionTogglePreHistoryHidden: ("toggle_pre_history_hidden", _toggle),
+    types.ChannelAdminLogEventActionToggleNoForwards: ("toggle_no_forwards", _toggle),
+    types.ChannelAdminLogEventActionToggleForum: ("toggle_forum", _toggle),
+    types.ChannelAdminLogEventActionToggleAntiSpam: ("toggle_anti_spam", _toggle),
+    types.ChannelAdminLogEventActionToggleAutotranslation: ("toggle_autotranslation", _toggle),
+    types.ChannelAdminLogEventActionToggleGroupCallSetting: (
+        "toggle_group_call_setting", lambda a: {"new_value": _value(a.join_muted)}),
+    types.ChannelAdminLogEventActionUpdatePinned: ("update_pinned", _message),
+    types.ChannelAdminLogEventActionSendMessage: ("send_message", _message),
+    types.ChannelAdminLogEventActionDeleteMessage: ("delete_message", _message),
+    types.ChannelAdminLogEventActionStopPoll: ("stop_poll", _message),
+    types.ChannelAdminLogEventActionEditMessage: ("edit_message", _edit_message),
+    types.ChannelAdminLogEventActionExportedInviteDelete: ("invite_delete", _invite_action),
+    types.ChannelAdminLogEventActionExportedInviteRevoke: ("invite_revoke", _invite_action),
+    types.ChannelAdminLogEventActionExportedInviteEdit: ("invite_edit", _invite_edit),
+    types.ChannelAdminLogEventActionStartGroupCall: ("start_group_call", _call),
+    types.ChannelAdminLogEventActionDiscardGroupCall: ("discard_group_call", _call),
+    types.ChannelAdminLogEventActionCreateTopic: ("create_topic", _topic),
+    types.ChannelAdminLogEventActionDeleteTopic: ("delete_topic", _topic),
+    types.ChannelAdminLogEventActionEditTopic: ("edit_topic", _pair("prev_topic", "new_topic")),
+    types.ChannelAdminLogEventActionPinTopic: ("pin_topic", _pair("prev_topic", "new_topic")),
+}
+
+EMPTY_FIELDS = dict.fromkeys(
+    ("invite_link", "invite_link_title", "invite_admin_id", "target_user_id", "message_id", "prev_value", "new_value")
+)
+
+
+def event_record(ev: types.ChannelAdminLogEvent, channel: str) -> dict:
+    """Build an ``events_groups_log`` record from a raw admin log event.
+
+    Args:
+        ev: The raw event.
+        channel: Channel name without the leading ``@``.
+
+    Returns:
+        The record. Extractors may refine the event type (ban/unban, promote/demote);
+        constructors missing from :data:`ACTIONS` (newer layers) keep their
+        snake-cased name as the event type and no extra fields.
+    """
+    entry = ACTIONS.get(type(ev.action))
+    if entry is None:
+        name = type(ev.action).__name__[len("ChannelAdminLogEventAction"):]
+        event_type, fields = re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower(), {}
+    else:
+        event_type, extract = entry
+        fields = extract(ev.action)
+    return {
+        "channel": channel,
+        "event_id": str(ev.id),
+        "event_type": event_type,
+        "user_id": ev.user_id,
+        "date": to_iso(ev.date),
+        **EMPTY_FIELDS,
+        **fields,
+    }
@@ -1,46 +1,501 @@
 """Custom client handling, including TelegramStream base class."""
 
 from __future__ import annotations
+import asyncio
+import contextlib
+import copy
 import datetime as dt
-from singer_sdk.helpers.jsonpath import extract_jsonpath
+import hashlib
+import json
+import time
+from functools import cached_property
+import pandas as pd
+from singer_sdk.helpers._batch import BaseBatchFileEncoding, BatchConfig, StorageTarget
+from singer_sdk.helpers._typing import TypeConformanceLevel
 
 
-from pyrogram import Client
+from pyrogram import Client, utils
+from pyrogram.errors import FloodWait
+from pyrogram.raw import functions, types
 
 import typing as t
 
+from singer_sdk.singerlib import StateMessage
 from singer_sdk.streams import Stream
 
+try:
+    import orjson
+except ImportError:  # orjson — необязательная зависимость (extra "orjson")
+    orjson = None
+
 if t.TYPE_CHECKING:
     from singer_sdk.helpers.types import Context
 
+    from tap_telegram.pool import PooledClient
+
+
+def dumps(value: t.Any) -> str:
+    """Serialize a JSON-native value to a compact JSON string.
+
+    Args:
+        value: A value made of dicts, lists and primitives.
+
+    Returns:
+        The JSON text, produced by orjson when it is installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(value).decode()
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def to_iso(value: t.Any) -> str | None:
+    """Render a unix timestamp or a datetime as an ISO 8601 string.
+
+    Args:
+        value: Seconds since epoch (raw TL objects) or a datetime (pyrogram types).
+
+    Returns:
+        The ISO 8601 representation in UTC, or None for empty values.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        value = dt.datetime.fromtimestamp(value, tz=dt.timezone.utc)
+    return value.isoformat()
+
+
+def reaction_row(reaction: t.Any, count: int) -> dict:
+    """Build a flat reaction entry from a raw TL ``Reaction`` constructor."""
+    if isinstance(reaction, types.ReactionEmoji):
+        return {"type": "emoji", "emoji": reaction.emoticon, "custom_emoji_id": None, "count": count}
+    if isinstance(reaction, types.ReactionCustomEmoji):
+        return {"type": "custom_emoji", "emoji": None, "custom_emoji_id": str(reaction.document_id),
+                "count": count}
+    return {"type": "paid", "emoji": None, "custom_emoji_id": None, "count": count}
+
+
+def reactions_list(reactions: t.Any) -> list[dict]:
+    """Normalize reactions of a post or a story into a list of flat dicts.
+
+    Accepts pyrogram ``MessageReactions``, raw ``MessageReactions`` and the raw
+    ``ReactionCount`` vector of ``StoryViews``.
+
+    Args:
+        reactions: Reactions object in any of the supported shapes, or None.
+
+    Returns:
+        One ``{"type", "emoji", "custom_emoji_id", "count"}`` entry per reaction.
+    """
+    if not reactions:
+        return []
+    if isinstance(reactions, list):  # StoryViews.reactions — Vector<ReactionCount>
+        return [reaction_row(r.reaction, r.count) for r in reactions]
+    if isinstance(reactions, types.MessageReactions):
+        return [reaction_row(r.reaction, r.count) for r in reactions.results]
+    # pyrogram.types.MessageReactions
+    rows = []
+    for r in reactions.reactions or []:
+        if r.emoji:
+            rows.append({"type": "emoji", "emoji": r.emoji, "custom_emoji_id": None, "count": r.count})
+        elif r.custom_emoji_id:
+            rows.append({"type": "custom_emoji", "emoji": None, "custom_emoji_id": str(r.custom_emoji_id),
+                         "count": r.count})
+        else:
+            rows.append({"type": "paid", "emoji": None, "custom_emoji_id": None, "count": r.count})
+    return rows
+
+
+async def ainvoke(app: Client, query: t.Any) -> t.Any:
+    """Invoke a raw query inside the client's event loop, sleeping through ``FloodWait``."""
+    while True:
+        try:
+            return await app.invoke(query)
+        except FloodWait as fw:
+            await asyncio.sleep(fw.value + 1)
+
+
+# цикл общего рантайма при stream_concurrency > 1: стримы синкаются в рабочих потоках, корутины — только в нём
+RUNTIME_LOOP: asyncio.AbstractEventLoop | None = None
+
+
+def run_sync(coro: t.Awaitable[t.Any]) -> t.Any:
+    """Run a coroutine to completion from synchronous stream code.
+
+    While the concurrent runtime is active the coroutine is handed to its event
+    loop, which owns every client connection; otherwise it runs on the current
+    thread's loop as before.
+    """
+    loop = RUNTIME_LOOP
+    if loop is not None and loop.is_running():
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+    return utils.get_event_loop().run_until_complete(coro)
+
+
+async def gather_limited(factories: t.Iterable[t.Callable[[], t.Awaitable[t.Any]]], limit: int) -> list:
+    """Await coroutines at most ``limit`` at a time, inside the running event loop.
+
+    Returns:
+        Results in the order of ``factories``; failed calls yield their exception.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(factory: t.Callable[[], t.Awaitable[t.Any]]) -> t.Any:
+        async with semaphore:
+            return await factory()
+
+    return await asyncio.gather(*(run(f) for f in factories), return_exceptions=True)
+
+
+def run_concurrently(factories: t.Iterable[t.Callable[[], t.Awaitable[t.Any]]], limit: int) -> list:
+    """Run coroutines on the client's event loop, at most ``limit`` at a time.
+
+    Args:
+        factories: Callables returning the coroutines to run.
+        limit: Maximum number of coroutines in flight.
+
+    Returns:
+        Results in the order of ``factories``; failed calls yield their exception.
+    """
+    return run_sync(gather_limited(factories, limit))
+
 
 class TelegramStream(Stream):
     """Stream class for Telegram streams."""
     """Stream class for Senler streams."""
     records_jsonpath = "$[*]"
 
-    def get_records(
-        self,
-        context: Context | None,
-    ) -> t.Iterable[dict]:
-
-        API_ID = self.config.get('api_id')  # Ваш API ID
-        API_HASH = self.config.get('api_hash')  # Ваш API Hash
-        SESSION = self.config.get('session_key')  # Сессия ПОЛЬЗОВАТЕЛЯ, АДМИНА КАНАЛА
-        CHANNEL = self.config.get('channel')
-
-        with Client(name="my_account", api_id=API_ID, api_hash=API_HASH, session_string=SESSION) as app:
-            # ── основная «паспортная» информация ────────────────────────────
-            chat = app.get_chat(CHANNEL)
-
-            row = {
-                "date": dt.date.today().isoformat(),
-                "id": chat.id,
-                "title": chat.title,
-                "description": chat.description or "",
-                "members_total": chat.members_count,
-                "channel": chat.username,
-                "invite_link": chat.invite_link
-            }
-            yield from extract_jsonpath(self.records_jsonpath, input=[row])
+    # записи собираются сразу из примитивов (rows.py, build_row в streams.py),
+    # поэтому рекурсивный обход каждой записи SDK не нужен
+    TYPE_CONFORMANCE_LEVEL = TypeConformanceLevel.ROOT_ONLY
+
+    # минимальный интервал между успешными синками стрима; настройка sync_intervals его переопределяет
+    sync_interval: t.ClassVar[dt.timedelta] = dt.timedelta(0)
+
+    # ключ снимка без даты: по нему в CDC-режиме хранится хэш последней версии строки
+    cdc_keys: t.ClassVar[list[str] | None] = None
+    CDC_IGNORED = frozenset(("date", "changed_at"))
+
+    @property
+    def partitions(self) -> list[dict] | None:
+        """One partition per channel when a ``channels`` list is configured."""
+        channels = self.config.get("channels")
+        return [{"channel": channel} for channel in channels] if channels else None
+
+    def get_batch_config(self, config: t.Mapping) -> BatchConfig | None:
+        """Return the BATCH config of this stream.
+
+        A full SDK ``batch_config`` wins; otherwise the ``batch_format`` shorthand
+        builds one for the streams listed in ``batch_streams`` (all when unset).
+        Child streams always emit RECORD messages: they are synced once per
+        parent record, which would give a batch file per post.
+
+        Args:
+            config: Tap configuration dictionary.
+
+        Returns:
+            Batch config for this stream, or None to emit RECORD messages.
+        """
+        if self.parent_stream_type is not None:
+            return None
+        batch_config = super().get_batch_config(config)
+        fmt = config.get("batch_format")
+        if batch_config or not fmt:
+            return batch_config
+        streams = config.get("batch_streams")
+        if streams and self.name not in streams:
+            return None
+        return BatchConfig(
+            # jsonl сжимаем gzip; parquet и так колоночный и сжатый
+            encoding=BaseBatchFileEncoding.from_dict(
+                {"format": fmt, "compression": "gzip" if fmt == "jsonl" else None}
+            ),
+            storage=StorageTarget(root=config.get("batch_root") or "file://output/batches", prefix=f"{self.name}-"),
+            batch_size=config.get("batch_size", 10000),
+        )
+
+    def sync_due(self, now: dt.datetime) -> bool:
+        """Tell whether the stream's minimum refresh interval has passed.
+
+        Args:
+            now: Start time of this run.
+
+        Returns:
+            False if the stream synced successfully within its interval.
+        """
+        minutes = (self.config.get("sync_intervals") or {}).get(self.name)
+        interval = dt.timedelta(minutes=minutes) if minutes is not None else self.sync_interval
+        last = self.stream_state.get("last_synced_at")
+        return not interval or not last or now - dt.datetime.fromisoformat(last) >= interval
+
+    def load_failed(self, context: Context | None) -> None:
+        """Log a failed load and keep ``last_synced_at`` unchanged, so the next run retries the stream."""
+        self.logger.exception("Could not load '%s' for %s", self.name, self.get_channel(context))
+        self._load_failed = True
+        self.zoomed_pending.pop(json.dumps(context, sort_keys=True, default=str), None)  # строки не выданы
+
+    def finalize_state_progress_markers(self, state: dict | None = None) -> None:
+        """Finalize the stream state and remember when the stream last synced successfully."""
+        super().finalize_state_progress_markers(state)
+        if state is None:
+            for context, days in self.zoomed_pending.values():
+                self.get_context_state(context)["zoomed_days"] = days
+            self.zoomed_pending.clear()
+        if getattr(self, "_load_failed", False):
+            return
+        if state is None and (self.selected or self.has_selected_descendents):
+            started = getattr(self._tap, "sync_started_at", None) or dt.datetime.now(tz=dt.timezone.utc)
+            self.stream_state["last_synced_at"] = to_iso(started)
+
+    def get_channel(self, context: Context | None) -> str:
+        """Return the channel of the partition being synced, or the configured one."""
+        if context and context.get("channel"):
+            return context["channel"]
+        return self.config.get("channel")
+
+    @contextlib.contextmanager
+    def open_client(self, context: Context | None) -> t.Iterator[PooledClient]:
+        """Yield a client for the partition, pinned to one session of the tap's pool."""
+        yield self._tap.session_pool.client_for(f"{self.name}:{self.get_channel(context)}")
+
+    def changed_only(self, rows: t.Iterable[dict], context: Context | None) -> t.Iterator[dict]:
+        """Drop snapshot rows whose content did not change since the last emitted version.
+
+        Active with the ``cdc`` setting on streams that define ``cdc_keys``. A short
+        content hash per key is kept in the stream state; ``cdc_changed_at`` adds
+        the time the change was detected.
+
+        Args:
+            rows: Snapshot rows of this run.
+            context: Stream partition context.
+
+        Yields:
+            New and changed rows only.
+        """
+        if not self.cdc_keys or not self.config.get("cdc"):
+            yield from rows
+            return
+        hashes = self.get_context_state(context).setdefault("cdc_hashes", {})
+        changed_at = to_iso(dt.datetime.now(tz=dt.timezone.utc)) if self.config.get("cdc_changed_at") else None
+        for row in rows:
+            key = "|".join(str(row.get(k)) for k in self.cdc_keys)
+            content = {k: v for k, v in row.items() if k not in self.CDC_IGNORED}
+            digest = hashlib.blake2b(json.dumps(content, sort_keys=True, default=str).encode(), digest_size=8).hexdigest()
+            if hashes.get(key) == digest:
+                continue
+            hashes[key] = digest
+            if changed_at:
+                row["changed_at"] = changed_at
+            yield row
+
+    @cached_property
+    def state_family(self) -> list[str]:
+        """Names of the streams synced in this stream's thread: its top-level ancestor and every descendant."""
+        top: Stream = self
+        while top.parent_stream_type:
+            top = next(s for s in self._tap.streams.values() if isinstance(s, top.parent_stream_type))
+        names, todo = [], [top]
+        while todo:
+            stream = todo.pop()
+            names.append(stream.name)
+            todo.extend(stream.child_streams)
+        return names
+
+    def _write_state_message(self) -> None:
+        """Write a STATE message, merged from per-stream snapshots under ``stream_concurrency`` > 1.
+
+        A worker thread changes only the bookmarks of its own stream family. The
+        thread copies those itself, publishes the copies in the tap's
+        ``published_bookmarks`` and emits them merged with the last published
+        copies of the other streams, so no thread reads a dict another one is
+        changing.
+        """
+        if RUNTIME_LOOP is None:
+            with self._tap.output_lock:
+                super()._write_state_message()
+            return
+        if self._is_state_flushed:
+            return
+        bookmarks = self.tap_state.get("bookmarks", {})
+        snapshot = {name: copy.deepcopy(bookmarks[name]) for name in self.state_family if name in bookmarks}
+        with self._tap.output_lock:
+            published = self._tap.published_bookmarks
+            published.update(snapshot)
+            # опубликованные снимки не меняются, только заменяются — копия верхнего уровня безопасна
+            state = {"bookmarks": dict(published)}
+            if state != self._last_emitted_state:
+                self._tap.write_message(StateMessage(value=state))
+                self._last_emitted_state = state
+        self._is_state_flushed = True
+
+    # ── запись в обход Stream.sync: для слушателя живых апдейтов ───────────────
+    # единственное место, где трогаем приватные методы SDK; поведение закреплено тестами
+
+    def emit_schema(self) -> None:
+        """Write the SCHEMA message of the stream, as ``Stream.sync`` does before its records."""
+        self._write_schema_message()
+
+    def emit_record(self, record: dict, context: Context | None) -> None:
+        """Write one RECORD message and advance the partition bookmark, outside of ``Stream.sync``."""
+        self._write_record_message(record)
+        self._increment_stream_state(record, context=context)
+
+    def promote_bookmarks(self) -> None:
+        """Turn the progress markers of every partition into bookmarks, as the end of a sync does."""
+        for context in self.partitions or [None]:
+            self._finalize_state(self.get_context_state(context))
+
+    def write_checkpoint(self, force: bool = False) -> None:
+        """Emit a STATE message now, including custom cursors kept in the stream state.
+
+        Skipped for batched streams: their records wait in a batch file until the
+        BATCH message, and the SDK emits STATE right after it.
+
+        Args:
+            force: Emit even when the stream is batched, for records written directly.
+        """
+        if not force and self.get_batch_config(self.config):
+            return
+        self._is_state_flushed = False
+        self._write_state_message()
+
+    def checkpoint(self, context: Context | None, cursor: dict | None, records: int = 0) -> None:
+        """Keep a resume cursor in the partition state and emit STATE now and then.
+
+        A STATE message goes out once ``state_every_records`` records or
+        ``state_every_seconds`` seconds have passed since the previous one. Call it
+        after yielding a unit of work: by then the SDK has written its records.
+
+        Args:
+            context: Stream partition context.
+            cursor: Where a restarted run should resume, None once the work is done.
+            records: Records emitted since the previous call.
+        """
+        state = self.get_context_state(context)
+        if cursor is None:
+            state.pop("resume", None)
+        else:
+            state["resume"] = cursor
+        self.checkpoint_progress(records)
+
+    def checkpoint_progress(self, records: int) -> None:
+        """Emit STATE once enough records or time have passed since the previous one.
+
+        Args:
+            records: Records emitted since the previous call.
+        """
+        now = time.monotonic()
+        self._checkpoint_records = getattr(self, "_checkpoint_records", 0) + records
+        last = getattr(self, "_checkpoint_at", None)
+        if last is None:
+            self._checkpoint_at = last = now
+        if (self._checkpoint_records >= self.config.get("state_every_records", 1000)
+                or now - last >= self.config.get("state_every_seconds", 60)):
+            self.write_checkpoint()
+            self._checkpoint_records, self._checkpoint_at = 0, now
+
+    def since_bookmark(self, df: pd.DataFrame, context: Context | None) -> pd.DataFrame:
+        """Keep only graph points newer than the bookmark minus the restatement window.
+
+        Telegram keeps restating the last few days of a stats graph, so those days
+        are re-emitted on every run (``stats_restatement_days``, 3 by default).
+
+        Args:
+            df: Decoded graph points with a ``date`` column.
+            context: Stream partition context.
+
+        Returns:
+            The points to emit; all of them on the first run.
+        """
+        bookmark = self.get_starting_replication_key_value(context)
+        if not bookmark or df.empty or "date" not in df:
+            return df
+        window = pd.Timedelta(days=self.config.get("stats_restatement_days", 3))
+        cutoff = pd.Timestamp(bookmark).tz_localize(None).normalize() - window
+        return df[pd.to_datetime(df["date"]) >= cutoff]
+
+    @staticmethod
+    def format_points(df: pd.DataFrame, column: str = "x") -> pd.DataFrame:
+        """Render the raw ``x`` milliseconds of decoded graph points.
+
+        Daily and hourly points alike get their day as ``YYYY-MM-DD`` in ``column``,
+        so the key format of daily rows does not depend on zoomed points being
+        present. ``period_start`` holds the UTC start of the day or hour.
+
+        Args:
+            df: Decoded points with the raw ``x`` column.
+            column: Column receiving the day.
+
+        Returns:
+            The same frame.
+        """
+        ts = pd.to_datetime(df["x"], unit="ms", utc=True)
+        df[column] = ts.dt.strftime("%Y-%m-%d")
+        df["period_start"] = ts.dt.strftime("%Y-%m-%dT%H:%M:%S+00:00")
+        return df
+
+    def with_zoomed(self, app: Client, graph: t.Any, df: pd.DataFrame, context: Context | None) -> pd.DataFrame:
+        """Append hourly points of the most recent days to a decoded daily graph.
+
+        Opt-in via ``stats_zoom_days``. Zoomed days are loaded concurrently with
+        ``LoadAsyncGraph(zoom_token, x=<day_ms>)``. Completed days go to the stream
+        state once the stream has synced (see :meth:`finalize_state_progress_markers`),
+        so a run that fails before emitting their rows loads them again.
+
+        Args:
+            app: Connected client.
+            graph: The ``StatsGraph`` the daily points were decoded from.
+            df: Daily points with the raw ``x`` column in milliseconds.
+            context: Stream partition context.
+
+        Returns:
+            Daily and hourly points, told apart by the ``granularity`` column.
+        """
+        df["granularity"] = "day"
+        days = self.config.get("stats_zoom_days", 0)
+        token = getattr(graph, "zoom_token", None)
+        if not days or not token or df.empty:
+            return df
+
+        wanted = [int(x) for x in df["x"].tail(days)]
+        state = self.get_context_state(context)
+        # (graph, day) → уже выгружен; график у каждого стрима свой, ключ — день
+        loaded = [x for x in state.get("zoomed_days", []) if x in wanted]
+        todo = [x for x in wanted if x not in loaded]
+
+        results = run_concurrently(
+            [lambda x=x: ainvoke(app, functions.stats.LoadAsyncGraph(token=token, x=x)) for x in todo],
+            self.config.get("stats_zoom_concurrency", 4),
+        )
+        today_ms = int(pd.Timestamp.now(tz="UTC").normalize().timestamp() * 1000)
+        frames = [df]
+        for x, zoomed in zip(todo, results):
+            if not isinstance(zoomed, types.StatsGraph):
+                continue  # ошибка загрузки или StatsGraphError — день пропускаем
+            data = json.loads(zoomed.json.data)
+            hourly = pd.DataFrame({c[0]: c[1:] for c in data["columns"]})
+            hourly["granularity"] = "hour"
+            frames.append(hourly)
+            if x < today_ms:
+                loaded.append(x)  # текущие сутки ещё не закончились — перезагрузим в следующий раз
+        # в состояние — только после того, как строки этих дней выданы
+        self.zoomed_pending[json.dumps(context, sort_keys=True, default=str)] = (context, loaded)
+        return self.concat_points(frames)
+
+    @cached_property
+    def zoomed_pending(self) -> dict[str, tuple[Context | None, list[int]]]:
+        """Zoomed days loaded in this run per partition, not yet written to the state."""
+        return {}
+
+    @staticmethod
+    def concat_points(frames: list[pd.DataFrame]) -> pd.DataFrame:
+        """Concatenate graph frames, keeping integer columns integer.
+
+        A column missing from some frames gets NaN there and would turn float;
+        such columns are emitted as ints with None for the gaps.
+        """
+        df = pd.concat(frames, ignore_index=True)
+        for column in df.columns:
+            if df[column].isna().any() and all(pd.api.types.is_integer_dtype(f[column]) for f in frames if column in f):
+                values = df[column].astype("Int64")
+                df[column] = values.astype(object).where(values.notna(), None)
+        return df
@@ -0,0 +1,166 @@
+"""Coordinator mode: shard channels across worker processes and merge their output."""
+
+from __future__ import annotations
+
+import copy
+import json
+import queue
+import subprocess
+import sys
+import tempfile
+import threading
+import typing as t
+from pathlib import Path
+
+if t.TYPE_CHECKING:
+    from singer_sdk import Tap
+
+
+def shard_channels(channels: list[str], workers: int) -> list[list[str]]:
+    """Split the channel list into ``workers`` round-robin shards, dropping empty ones."""
+    return [shard for shard in (channels[i::workers] for i in range(workers)) if shard]
+
+
+def worker_state(state: dict, shard: list[str]) -> dict:
+    """Keep only the partitions of the given channels in a tap state.
+
+    Workers then report state for their own channels only, so merging never
+    overwrites a fresh partition with a stale copy from another worker.
+    """
+    result = copy.deepcopy(state)
+    for bookmark in result.get("bookmarks", {}).values():
+        if "partitions" in bookmark:
+            bookmark["partitions"] = [
+                p for p in bookmark["partitions"] if p.get("context", {}).get("channel") in shard
+            ]
+    return result
+
+
+def merge_states(base: dict, states: t.Iterable[dict]) -> dict:
+    """Merge worker states into one tap state.
+
+    Partitions are merged by their context. Dict-valued stream-level keys, such
+    as the ``cdc_hashes`` of an unpartitioned stream, are merged key by key, and
+    a worker wins only for entries it changed relative to ``base``: every worker
+    starts from a copy of the whole base map. Other stream-level keys are taken
+    from the worker that reported them last.
+    """
+    merged = copy.deepcopy(base)
+    bookmarks = merged.setdefault("bookmarks", {})
+    base_bookmarks = base.get("bookmarks", {})
+    for state in states:
+        for stream, bookmark in state.get("bookmarks", {}).items():
+            target = bookmarks.setdefault(stream, {})
+            for key, value in bookmark.items():
+                if key != "partitions":
+                    if isinstance(value, dict) and isinstance(target.get(key), dict):
+                        before = base_bookmarks.get(stream, {}).get(key) or {}
+                        target[key].update((k, v) for k, v in value.items() if before.get(k) != v)
+                    else:
+                        target[key] = copy.deepcopy(value)
+                    continue
+                by_context = {json.dumps(p.get("context"), sort_keys=True): p for p in target.get("partitions", [])}
+                for p in value:
+                    by_context[json.dumps(p.get("context"), sort_keys=True)] = p
+                target["partitions"] = list(by_context.values())
+    return merged
+
+
+def _pump(index: int, stream: t.IO[str], lines: queue.Queue) -> None:
+    for line in stream:
+        lines.put((index, line))
+    lines.put((index, None))
+
+
+TYPE_PREFIX = '{"type":"'
+
+
+def message_type(line: str) -> str | None:
+    """Return the Singer message type of an output line.
+
+    The writers of this tap put ``type`` first, so the prefix answers without
+    parsing every RECORD; any other line is parsed.
+    """
+    if line.startswith(TYPE_PREFIX):
+        return line[len(TYPE_PREFIX):line.index('"', len(TYPE_PREFIX))]
+    try:
+        return json.loads(line).get("type")
+    except (ValueError, AttributeError):
+        return None
+
+
+def run_coordinator(tap: Tap) -> None:
+    """Run the sync in worker processes and write one merged Singer stream to stdout.
+
+    Each worker is the same tap started with ``python -m tap_telegram`` on a shard
+    of ``channels`` and bound to one of ``session_keys``. SCHEMA messages are
+    forwarded once per stream, RECORD and other messages as is, and STATE
+    messages are merged into a single tap state before being forwarded.
+
+    Args:
+        tap: The coordinating tap instance.
+
+    Raises:
+        RuntimeError: If a worker process exits with an error.
+    """
+    config = dict(tap.config)
+    sessions = config.get("session_keys") or [config["session_key"]]
+    shards = shard_channels(config["channels"], config.get("workers") or len(sessions))
+    base_state = tap.state or {}
+
+    with tempfile.TemporaryDirectory(prefix="tap-telegram-") as tmp:
+        tmp_dir = Path(tmp)
+        catalog_args = []
+        if tap.input_catalog is not None:
+            catalog_path = tmp_dir / "catalog.json"
+            catalog_path.write_text(json.dumps(tap.input_catalog.to_dict()))
+            catalog_args = ["--catalog", str(catalog_path)]
+
+        processes, lines = [], queue.Queue()
+        for index, shard in enumerate(shards):
+            worker_config = dict(config, channels=shard, session_key=sessions[index % len(sessions)], workers=1)
+            worker_config.pop("session_keys", None)
+            config_path = tmp_dir / f"config-{index}.json"
+            config_path.write_text(json.dumps(worker_config))
+            state_path = tmp_dir / f"state-{index}.json"
+            state_path.write_text(json.dumps(worker_state(base_state, shard)))
+
+            process = subprocess.Popen(  # noqa: S603
+                [sys.executable, "-m", "tap_telegram", "--config", str(config_path),
+                 "--state", str(state_path), *catalog_args],
+                stdout=subprocess.PIPE,
+                text=True,
+                bufsize=1,
+            )
+            processes.append(process)
+            threading.Thread(target=_pump, args=(index, process.stdout, lines), daemon=True).start()
+
+        seen_schemas: set[str] = set()
+        states: dict[int, dict] = {}
+        running = len(processes)
+        while running:
+            index, line = lines.get()
+            if line is None:
+                running -= 1
+                continue
+            kind = message_type(line)
+            if kind == "SCHEMA":
+                # схему каждого стрима отдаём один раз
+                stream = json.loads(line)["stream"]
+                if stream in seen_schemas:
+                    continue
+                seen_schemas.add(stream)
+            elif kind == "STATE":
+                states[index] = json.loads(line)["value"]
+                merged = merge_states(base_state, states.values())
+                sys.stdout.write(json.dumps({"type": "STATE", "value": merged}) + "\n")
+                # чекпоинт должен дойти до таргета сразу, а не по завершении всех воркеров
+                sys.stdout.flush()
+                continue
+            sys.stdout.write(line)
+        sys.stdout.flush()
+
+        failed = [i for i, p in enumerate(processes) if p.wait() != 0]
+        if failed:
+            msg = f"Worker processes {failed} failed, see their logs above"
+            raise RuntimeError(msg)
@@ -0,0 +1,73 @@
+"""Links and mentions of a message, read from raw ``MessageEntity*`` constructors."""
+
+from __future__ import annotations
+
+import typing as t
+
+from pyrogram.raw import types
+
+Extractor = t.Callable[[str, t.Any], t.Dict[str, t.Any]]
+
+
+def _url(text: str, entity: t.Any) -> dict:
+    return {"url": text}
+
+
+def _text_url(text: str, entity: t.Any) -> dict:
+    return {"url": entity.url}
+
+
+def _mention(text: str, entity: t.Any) -> dict:
+    return {"username": text.lstrip("@")}
+
+
+def _mention_name(text: str, entity: t.Any) -> dict:
+    return {"user_id": entity.user_id}
+
+
+# конструктор сущности → (вид ссылки, извлекатель полей); остальные сущности (жирный, код…) пропускаем
+ENTITIES: dict[type, tuple[str, Extractor]] = {
+    types.MessageEntityUrl: ("url", _url),
+    types.MessageEntityTextUrl: ("text_link", _text_url),
+    types.MessageEntityMention: ("mention", _mention),
+    types.MessageEntityMentionName: ("mention", _mention_name),
+}
+
+EMPTY_FIELDS = dict.fromkeys(("url", "username", "user_id"))
+
+
+def link_rows(text: str | None, entities: list[t.Any] | None) -> list[dict]:
+    """Extract the links and mentions of a message text in one pass over its entities.
+
+    Entity offsets and lengths count UTF-16 code units, so the text is encoded
+    once and sliced as UTF-16 — emoji and other astral characters would shift
+    Python string offsets.
+
+    Args:
+        text: The message text or media caption.
+        entities: Raw entities of the message.
+
+    Returns:
+        One ``post_links`` row (without channel and post id) per link, in text order.
+    """
+    if not text or not entities:
+        return []
+    encoded = text.encode("utf-16-le")
+    rows = []
+    for entity in entities:
+        entry = ENTITIES.get(type(entity))
+        if entry is None:
+            continue
+        kind, extract = entry
+        start = entity.offset * 2
+        chunk = encoded[start:start + entity.length * 2].decode("utf-16-le", errors="replace")
+        rows.append({
+            "position": len(rows),
+            "kind": kind,
+            "text": chunk,
+            "offset": entity.offset,
+            "length": entity.length,
+            **EMPTY_FIELDS,
+            **extract(chunk, entity),
+        })
+    return rows
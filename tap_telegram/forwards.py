@@ -0,0 +1,115 @@
+"""Public forwards of channel posts over ``stats.GetMessagePublicForwards``."""
+
+from __future__ import annotations
+
+import json
+import typing as t
+from pathlib import Path
+
+from pyrogram.raw import functions, types
+
+from tap_telegram.client import ainvoke, to_iso
+
+if t.TYPE_CHECKING:
+    from pyrogram import Client
+
+PAGE_SIZE = 100  # максимум GetMessagePublicForwards за один запрос
+
+
+def _source(peer: t.Any, chats: dict[int, t.Any], users: dict[int, t.Any]) -> tuple[int | None, t.Any]:
+    # id чатов и пользователей из разных пространств и могут совпадать — ищем каждый в своём словаре
+    if isinstance(peer, types.PeerUser):
+        return peer.user_id, users.get(peer.user_id)
+    source_id = getattr(peer, "channel_id", None) or getattr(peer, "chat_id", None)
+    return source_id, chats.get(source_id) if source_id else None
+
+
+async def acollect_public_forwards(
+        app: Client, channel: t.Any, msg_id: int,
+) -> tuple[list[t.Any], dict[int, t.Any], dict[int, t.Any]]:
+    """Fetch every public forward of a channel post, following ``next_offset``.
+
+    Args:
+        app: Connected client.
+        channel: ``InputChannel`` of the channel.
+        msg_id: Id of the channel post.
+
+    Returns:
+        The raw ``PublicForward*`` constructors, and the chats and the users
+        they reference, each indexed by id.
+    """
+    forwards, chats, users, offset = [], {}, {}, ""
+    while True:
+        result = await ainvoke(app, functions.stats.GetMessagePublicForwards(
+            channel=channel, msg_id=msg_id, offset=offset, limit=PAGE_SIZE,
+        ))
+        forwards.extend(result.forwards)
+        # чаты и пользователи приходят вместе со страницей — отдельный resolve на строку не нужен
+        chats.update({c.id: c for c in result.chats})
+        users.update({u.id: u for u in result.users})
+        if not result.next_offset or not result.forwards:
+            break
+        offset = result.next_offset
+    return forwards, chats, users
+
+
+def forward_row(fwd: t.Any, chats: dict[int, t.Any], users: dict[int, t.Any], channel: str,
+                post_id: int) -> dict | None:
+    """Build a ``post_public_forwards`` record from a raw ``PublicForward*`` constructor.
+
+    Returns:
+        The record, or None for constructors of newer layers.
+    """
+    if isinstance(fwd, types.PublicForwardMessage):
+        m = fwd.message
+        peer, kind, forward_id, date, views = m.peer_id, "message", m.id, m.date, getattr(m, "views", None)
+    elif isinstance(fwd, types.PublicForwardStory):
+        story = fwd.story
+        peer, kind, forward_id = fwd.peer, "story", story.id
+        date, views = getattr(story, "date", None), getattr(getattr(story, "views", None), "views_count", None)
+    else:
+        return None
+    source_id, source = _source(peer, chats, users)
+    title = getattr(source, "title", None)
+    if title is None and source is not None:  # история переслана пользователем
+        title = " ".join(filter(None, (getattr(source, "first_name", None), getattr(source, "last_name", None))))
+    return {
+        "channel": channel,
+        "post_id": post_id,
+        "kind": kind,
+        "source_id": source_id,
+        "source_username": getattr(source, "username", None),
+        "source_title": title or None,
+        "forward_id": forward_id,
+        "date": to_iso(date),
+        "views": views,
+    }
+
+
+class ForwardsCache:
+    """Crawled public forwards of channel posts on the local disk.
+
+    ``<channel>/<post_id>.json`` keeps the rows of one post together with the
+    time of the crawl and the forwards counter seen then, so a post is crawled
+    again only when the entry is stale.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = Path(root)
+
+    def get(self, channel: str, post_id: int) -> dict | None:
+        """Return the ``{"at", "forwards", "rows"}`` entry of a post, if any."""
+        path = self.root / channel / f"{post_id}.json"
+        return json.loads(path.read_text()) if path.exists() else None
+
+    def put(self, channel: str, post_id: int, entry: dict) -> None:
+        """Store the entry of a post."""
+        path = self.root / channel / f"{post_id}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(entry))
+
+    def prune(self, channel: str, keep: set[int]) -> None:
+        """Drop the entries of posts outside ``keep``."""
+        for path in (self.root / channel).glob("*.json"):
+            if int(path.stem) not in keep:
+                path.unlink()
@@ -0,0 +1,413 @@
+"""Low-level message pagers on top of raw ``messages.GetHistory``/``GetReplies``."""
+
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import time
+import typing as t
+
+from pyrogram.errors import FloodWait
+from pyrogram.raw import functions, types
+
+from tap_telegram.client import ainvoke, run_sync
+from tap_telegram.rows import UserInfo, index_users
+
+if t.TYPE_CHECKING:
+    from pyrogram import Client
+
+PAGE_SIZE = 100  # максимум, который отдаёт сервер за один запрос
+
+
+class Page:
+    """One page of raw messages with the users and chats it references."""
+
+    __slots__ = ("messages", "users", "chats", "edge")
+
+    def __init__(self, result: t.Any) -> None:
+        # сервисные и пустые сообщения схемам не нужны
+        self.messages: list[types.Message] = [m for m in result.messages if isinstance(m, types.Message)]
+        # самый старый id страницы, включая сервисные: всё выше него страница уже покрыла
+        self.edge: int | None = min((m.id for m in result.messages), default=None)
+        self.users: dict[int, UserInfo] = index_users(result.users)
+        self.chats: dict[int, t.Any] = {c.id: c for c in result.chats}
+
+
+def invoke(app: Client, query: t.Any) -> t.Any:
+    """Invoke a raw query, sleeping through ``FloodWait``."""
+    while True:
+        try:
+            return app.invoke(query)
+        except FloodWait as fw:
+            time.sleep(fw.value + 1)
+
+
+def _paginate(app: Client, make_query: t.Callable[[int], t.Any], limit: int | None,
+              offset_id: int = 0) -> t.Iterator[Page]:
+    fetched = 0
+    while True:
+        result = invoke(app, make_query(offset_id))
+        if not result.messages:
+            break
+        page = Page(result)
+        if limit is not None and fetched + len(page.messages) > limit:
+            page.messages = page.messages[:limit - fetched]
+        fetched += len(page.messages)
+        yield page
+        if len(result.messages) < PAGE_SIZE or (limit is not None and fetched >= limit):
+            break
+        # сообщения идут от новых к старым: следующая страница — старше последнего id
+        offset_id = result.messages[-1].id
+
+
+def iter_history(app: Client, peer: t.Any, limit: int | None = None, offset_id: int = 0,
+                 min_id: int = 0) -> t.Iterator[Page]:
+    """Page through a chat history from newest to oldest.
+
+    Args:
+        app: Connected client.
+        peer: Resolved input peer of the chat.
+        limit: Maximum number of messages to return, None for the whole history.
+        offset_id: Start right below this message id, 0 for the newest message.
+        min_id: Stop at this message id (exclusive).
+
+    Yields:
+        Pages of up to 100 messages.
+    """
+    return _paginate(
+        app,
+        lambda offset: functions.messages.GetHistory(
+            peer=peer, offset_id=offset, offset_date=0, add_offset=0,
+            limit=PAGE_SIZE, max_id=0, min_id=min_id, hash=0,
+        ),
+        limit,
+        offset_id,
+    )
+
+
+def iter_replies(app: Client, peer: t.Any, msg_id: int, limit: int | None = None) -> t.Iterator[Page]:
+    """Page through the discussion thread of a channel post.
+
+    Args:
+        app: Connected client.
+        peer: Resolved input peer of the channel.
+        msg_id: Id of the channel post.
+        limit: Maximum number of replies to return, None for all of them.
+
+    Yields:
+        Pages of up to 100 replies.
+    """
+    return _paginate(
+        app,
+        lambda offset: functions.messages.GetReplies(
+            peer=peer, msg_id=msg_id, offset_id=offset, offset_date=0, add_offset=0,
+            limit=PAGE_SIZE, max_id=0, min_id=0, hash=0,
+        ),
+        limit,
+    )
+
+
+# имя фильтра в конфиге → конструктор InputMessagesFilter*
+SEARCH_FILTERS = {
+    "empty": types.InputMessagesFilterEmpty,
+    "url": types.InputMessagesFilterUrl,
+    "photos": types.InputMessagesFilterPhotos,
+    "video": types.InputMessagesFilterVideo,
+    "photo_video": types.InputMessagesFilterPhotoVideo,
+    "document": types.InputMessagesFilterDocument,
+    "gif": types.InputMessagesFilterGif,
+    "voice": types.InputMessagesFilterVoice,
+    "music": types.InputMessagesFilterMusic,
+    "round_video": types.InputMessagesFilterRoundVideo,
+    "poll": types.InputMessagesFilterPoll,
+    "geo": types.InputMessagesFilterGeo,
+    "pinned": types.InputMessagesFilterPinned,
+}
+
+
+def iter_search(app: Client, peer: t.Any, q: str = "", flt: str = "empty", min_date: int = 0, max_date: int = 0,
+                min_id: int = 0) -> t.Iterator[Page]:
+    """Page through the messages of a chat matching a server-side search.
+
+    Args:
+        app: Connected client.
+        peer: Resolved input peer of the chat.
+        q: Text to search for, empty to match by filter only.
+        flt: Name of the message filter, see :data:`SEARCH_FILTERS`.
+        min_date: Unix timestamp of the oldest message, 0 for no bound.
+        max_date: Unix timestamp of the newest message, 0 for no bound.
+        min_id: Stop at this message id (exclusive).
+
+    Yields:
+        Pages of up to 100 matching messages, newest first.
+    """
+    return _paginate(
+        app,
+        lambda offset: functions.messages.Search(
+            peer=peer, q=q, filter=SEARCH_FILTERS[flt](), min_date=min_date, max_date=max_date,
+            offset_id=offset, add_offset=0, limit=PAGE_SIZE, max_id=0, min_id=min_id, hash=0,
+        ),
+        None,
+    )
+
+
+# ── параллельный backfill по шардам id ──────────────────────────────────────
+
+async def aiter_history(app: Client, peer: t.Any, lo: int, hi: int) -> t.AsyncIterator[Page]:
+    """Page through every message with ``lo <= id <= hi`` of a chat history.
+
+    Args:
+        app: Connected client.
+        peer: Resolved input peer of the chat.
+        lo: Lowest message id of the shard.
+        hi: Highest message id of the shard.
+
+    Yields:
+        Pages of the shard, newest first.
+    """
+    offset_id = hi + 1
+    while True:
+        result = await ainvoke(app, functions.messages.GetHistory(
+            peer=peer, offset_id=offset_id, offset_date=0, add_offset=0,
+            limit=PAGE_SIZE, max_id=0, min_id=lo - 1, hash=0,
+        ))
+        if not result.messages:
+            break
+        yield Page(result)
+        if len(result.messages) < PAGE_SIZE:
+            break
+        offset_id = result.messages[-1].id
+
+
+async def aiter_replies(app: Client, peer: t.Any, msg_id: int) -> t.AsyncIterator[Page]:
+    """Page through the whole discussion thread of a channel post."""
+    offset_id = 0
+    while True:
+        result = await ainvoke(app, functions.messages.GetReplies(
+            peer=peer, msg_id=msg_id, offset_id=offset_id, offset_date=0, add_offset=0,
+            limit=PAGE_SIZE, max_id=0, min_id=0, hash=0,
+        ))
+        if not result.messages:
+            break
+        yield Page(result)
+        if len(result.messages) < PAGE_SIZE:
+            break
+        offset_id = result.messages[-1].id
+
+
+def edge_message_id(app: Client, peer: t.Any, offset_date: int = 0) -> int:
+    """Return the id of the newest message sent before ``offset_date``.
+
+    Args:
+        app: Connected client.
+        peer: Resolved input peer of the chat.
+        offset_date: Unix timestamp, 0 for the newest message of the chat.
+
+    Returns:
+        The message id, or 0 if there is no such message.
+    """
+    result = invoke(app, functions.messages.GetHistory(
+        peer=peer, offset_id=0, offset_date=offset_date, add_offset=0,
+        limit=1, max_id=0, min_id=0, hash=0,
+    ))
+    return result.messages[0].id if result.messages else 0
+
+
+def split_shards(lo: int, hi: int, count: int) -> list[list[int]]:
+    """Split the id range ``[lo, hi]`` into at most ``count`` contiguous shards.
+
+    Returns:
+        ``[lo, hi]`` pairs, newest shard first.
+    """
+    if hi < lo:
+        return []
+    size = max(1, -(-(hi - lo + 1) // max(1, count)))
+    return [[max(lo, top - size + 1), top] for top in range(hi, lo - 1, -size)]
+
+
+def iter_shards(crawl: t.Callable[[int, int], t.Awaitable[t.Any]], shards: list[list[int]],
+                concurrency: int) -> t.Iterator[tuple[list[int], t.Any]]:
+    """Crawl shards concurrently on the client's event loop.
+
+    Args:
+        crawl: Coroutine function fetching one ``(lo, hi)`` shard.
+        shards: Shards to crawl.
+        concurrency: Maximum number of shards in flight.
+
+    Yields:
+        ``(shard, result)`` pairs in completion order.
+    """
+    async def spawn() -> set[asyncio.Task]:
+        # задачи и семафор создаём внутри цикла, которому принадлежат клиенты
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(shard: list[int]) -> tuple[list[int], t.Any]:
+            async with semaphore:
+                return shard, await crawl(*shard)
+
+        return {asyncio.ensure_future(run(shard)) for shard in shards}
+
+    async def cancel(tasks: set[asyncio.Task]) -> None:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    pending = run_sync(spawn())
+    try:
+        while pending:
+            done, pending = run_sync(asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED))
+            for task in done:
+                yield task.result()
+    finally:
+        if pending:
+            run_sync(cancel(pending))
+
+
+def iter_shard_chunks(crawl: t.Callable[[int, int], t.AsyncIterator[tuple[list, int | None]]],
+                      shards: list[list[int]], concurrency: int,
+                      maxsize: int) -> t.Iterator[tuple[list[int], list | None, int | None]]:
+    """Crawl shards concurrently, streaming their chunks through a bounded queue.
+
+    A shard whose chunk does not fit in the queue waits, so at most ``maxsize``
+    queued chunks plus one chunk per running shard are held in memory.
+
+    Args:
+        crawl: Async generator function yielding ``(records, edge)`` chunks of one
+            ``(lo, hi)`` shard, ``edge`` being the lowest id covered so far or None.
+        shards: Shards to crawl.
+        concurrency: Maximum number of shards in flight.
+        maxsize: Maximum number of chunks waiting in the queue.
+
+    Yields:
+        ``(shard, records, edge)`` per chunk in arrival order, and
+        ``(shard, None, None)`` once a shard is complete.
+    """
+    async def spawn() -> tuple[asyncio.Queue, set[asyncio.Task]]:
+        # очередь, семафор и задачи создаём внутри цикла, которому принадлежат клиенты
+        queue: asyncio.Queue = asyncio.Queue(maxsize)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(shard: list[int]) -> None:
+            async with semaphore:
+                try:
+                    async for records, edge in crawl(*shard):
+                        await queue.put((shard, records, edge))
+                except Exception as exc:  # noqa: BLE001 — ошибку шарда поднимаем у потребителя
+                    await queue.put((shard, exc, None))
+                    return
+            await queue.put((shard, None, None))
+
+        return queue, {asyncio.ensure_future(run(shard)) for shard in shards}
+
+    async def cancel(tasks: set[asyncio.Task]) -> None:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    queue, tasks = run_sync(spawn())
+    remaining = len(shards)
+    try:
+        while remaining:
+            shard, records, edge = run_sync(queue.get())
+            if isinstance(records, Exception):
+                raise records
+            if records is None:
+                remaining -= 1
+            yield shard, records, edge
+    finally:
+        run_sync(cancel(tasks))
+
+
+def run_backfill(stream: t.Any, app: Client, peer: t.Any, context: t.Any,
+                 crawl: t.Callable[[int, int], t.AsyncIterator[tuple[list, int | None]]]) -> t.Iterator[t.Any]:
+    """Run a sharded, resumable backfill of a channel history.
+
+    The shard plan is kept in the stream state under ``backfill``. After every
+    chunk the upper bound of its shard moves down to the chunk's edge id, so an
+    interrupted backfill resumes right below the last page it emitted.
+
+    Args:
+        stream: The stream being synced.
+        app: Connected client.
+        peer: Resolved input peer of the channel.
+        context: Stream partition context.
+        crawl: Async generator function yielding ``(records, edge)`` chunks of one
+            ``(lo, hi)`` shard.
+
+    Yields:
+        Records of every shard, page by page as they arrive.
+    """
+    state = stream.get_context_state(context)
+    plan = state.get("backfill")
+    if plan is None:
+        min_id = 1
+        start_date = stream.config.get("backfill_start_date")
+        if start_date:
+            ts = int(dt.datetime.fromisoformat(start_date).replace(tzinfo=dt.timezone.utc).timestamp())
+            min_id = edge_message_id(app, peer, ts) + 1
+        top_id = edge_message_id(app, peer)
+        plan = state["backfill"] = {
+            "shards": split_shards(min_id, top_id, stream.config.get("backfill_shards", 8)),
+            "done": [],
+        }
+    concurrency = stream.config.get("backfill_concurrency", 4)
+    # шарды из плана меняем на месте: сдвиг верхней границы сразу попадает в state
+    todo = [s for s in plan["shards"] if s not in plan["done"]]
+    for shard, records, edge in iter_shard_chunks(crawl, todo, concurrency, 2 * concurrency):
+        if records is None:
+            # шард выгружен целиком: после рестарта он не будет скачан повторно
+            plan["done"].append(shard)
+            stream.write_checkpoint()
+            continue
+        yield from records
+        if edge is not None:
+            shard[1] = edge - 1
+        stream.checkpoint_progress(len(records))
+    plan["complete"] = True
+    stream.write_checkpoint()
+
+
+# ── догонялка по pts через updates.GetChannelDifference ─────────────────────
+
+def input_channel(peer: types.InputPeerChannel) -> types.InputChannel:
+    """Turn a resolved ``InputPeerChannel`` into the ``InputChannel`` of channel methods."""
+    return types.InputChannel(channel_id=peer.channel_id, access_hash=peer.access_hash)
+
+
+def _difference_query(channel: t.Any, pts: int) -> t.Any:
+    return functions.updates.GetChannelDifference(
+        channel=channel, filter=types.ChannelMessagesFilterEmpty(), pts=pts, limit=PAGE_SIZE, force=False,
+    )
+
+
+def _next_pts(diff: t.Any) -> int | None:
+    # None — дальше запрашивать нечего
+    if isinstance(diff, types.updates.ChannelDifferenceTooLong) or diff.final:
+        return None
+    return diff.pts
+
+
+def iter_channel_difference(app: Client, channel: t.Any, pts: int) -> t.Iterator[t.Any]:
+    """Page through ``updates.GetChannelDifference`` starting at ``pts``.
+
+    Args:
+        app: Connected client.
+        channel: ``InputChannel`` of the channel.
+        pts: Last pts already processed.
+
+    Yields:
+        ``ChannelDifference``/``ChannelDifferenceEmpty`` pages until the final one,
+        or a single ``ChannelDifferenceTooLong`` when the gap is too large.
+    """
+    while pts is not None:
+        diff = invoke(app, _difference_query(channel, pts))
+        yield diff
+        pts = _next_pts(diff)
+
+
+async def achannel_difference(app: Client, channel: t.Any, pts: int) -> t.AsyncIterator[t.Any]:
+    """Async counterpart of :func:`iter_channel_difference`."""
+    while pts is not None:
+        diff = await ainvoke(app, _difference_query(channel, pts))
+        yield diff
+        pts = _next_pts(diff)
@@ -0,0 +1,273 @@
+"""Listen mode: turn live Telegram updates into Singer records."""
+
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import sys
+import typing as t
+
+from pyrogram import utils
+from pyrogram.handlers import DisconnectHandler, RawUpdateHandler
+from pyrogram.raw import functions, types
+
+from tap_telegram.client import ainvoke, to_iso
+from tap_telegram.history import achannel_difference, input_channel, invoke
+from tap_telegram.rows import CommentRow, UserInfo, deleted_post_record, index_users, post_record
+
+if t.TYPE_CHECKING:
+    from singer_sdk import Tap
+    from singer_sdk.helpers.types import Context
+
+    from tap_telegram.client import TelegramStream
+
+
+class Watched:
+    """A channel or its discussion group whose updates are followed, with its pts."""
+
+    __slots__ = ("channel_id", "parent_id", "input", "name", "context", "stream", "pts", "stale", "syncing")
+
+    def __init__(self, channel_id: int, parent_id: int, input_channel: t.Any, name: str,
+                 context: Context | None, stream: TelegramStream, pts: int) -> None:
+        self.channel_id = channel_id
+        self.parent_id = parent_id
+        self.input = input_channel
+        self.name = name
+        self.context = context
+        self.stream = stream
+        self.pts = pts
+        # stale — pts разошёлся с сервером, нужна догонялка через GetChannelDifference
+        self.stale = True
+        self.syncing = False
+
+
+class UpdateListener:
+    """Long-running listener emitting ``posts``, ``comments`` and ``events_groups_log`` records.
+
+    New and edited channel posts, replies in the linked discussion groups and
+    participant updates arrive through pyrogram update handlers. The pts of every
+    channel is tracked; on start, on a pts gap and after a reconnect the missed
+    updates are fetched with ``updates.GetChannelDifference``. State, including the
+    pts, is flushed every ``listen_flush_seconds``.
+    """
+
+    def __init__(self, tap: Tap) -> None:
+        self.tap = tap
+        self.app = tap.session_pool.client_for("listener")
+        self.posts = tap.streams["posts"]
+        self.comments = tap.streams["comments"]
+        self.events = tap.streams["events_groups_log"]
+        self.channels: dict[int, Watched] = {}
+        self.groups: dict[int, Watched] = {}
+        # (id группы обсуждения, id корня треда) → id поста канала
+        self.threads: dict[tuple[int, int], int | None] = {}
+        self.resync: asyncio.Event | None = None
+        self.pending = False
+
+    def setup(self) -> None:
+        """Resolve the configured channels and their discussion groups."""
+        for context in self.posts.partitions or [None]:
+            name = self.posts.get_channel(context)
+            peer = self.app.resolve_peer(name)
+            channel = input_channel(peer)
+            full = invoke(self.app, functions.channels.GetFullChannel(channel=channel))
+            pts = self.posts.get_context_state(context).get("pts") or full.full_chat.pts
+            self.channels[peer.channel_id] = Watched(
+                peer.channel_id, peer.channel_id, channel, name[1:], context, self.posts, pts,
+            )
+
+            linked = full.full_chat.linked_chat_id
+            chat = next((c for c in full.chats if c.id == linked), None) if linked else None
+            if chat is None:
+                continue  # обсуждение к каналу не подключено
+            group = types.InputChannel(channel_id=chat.id, access_hash=chat.access_hash)
+            group_full = invoke(self.app, functions.channels.GetFullChannel(channel=group))
+            pts = self.comments.get_context_state(context).get("pts") or group_full.full_chat.pts
+            self.groups[chat.id] = Watched(chat.id, peer.channel_id, group, name[1:], context, self.comments, pts)
+
+    def watched(self, channel_id: int | None) -> Watched | None:
+        return self.channels.get(channel_id) or self.groups.get(channel_id)
+
+    def mark_stale(self, watched: Watched) -> None:
+        watched.stale = True
+        self.resync.set()
+
+    def accept(self, watched: Watched, pts: int, pts_count: int) -> bool:
+        """Check an update against the local pts; a gap schedules a catch-up."""
+        if watched.stale or watched.syncing:
+            self.mark_stale(watched)
+            return False
+        if pts <= watched.pts:
+            return False  # уже применено (например, пришло в догонялке)
+        if watched.pts + pts_count != pts:
+            self.mark_stale(watched)
+            return False
+        watched.pts = pts
+        self.pending = True
+        return True
+
+    def emit(self, stream: TelegramStream, record: dict, context: Context | None) -> None:
+        if not stream.selected:
+            return
+        stream.emit_record(record, context)
+        self.pending = True
+
+    async def thread_post(self, watched: Watched, m: types.Message) -> int | None:
+        """Return the channel post a discussion reply belongs to."""
+        fwd = m.fwd_from
+        if fwd and fwd.channel_post and isinstance(fwd.from_id, types.PeerChannel) \
+                and fwd.from_id.channel_id == watched.parent_id and not m.reply_to:
+            # автопересылка поста канала — корень треда, сам по себе не комментарий
+            self.threads[(watched.channel_id, m.id)] = fwd.channel_post
+            return None
+        reply = m.reply_to
+        if not isinstance(reply, types.MessageReplyHeader):
+            return None
+        top = reply.reply_to_top_id or reply.reply_to_msg_id
+        if not top:
+            return None
+        key = (watched.channel_id, top)
+        if key not in self.threads:
+            result = await ainvoke(self.app, functions.channels.GetMessages(
+                channel=watched.input, id=[types.InputMessageID(id=top)],
+            ))
+            root = next((r for r in result.messages if isinstance(r, types.Message)), None)
+            self.threads[key] = root.fwd_from.channel_post if root and root.fwd_from else None
+        return self.threads[key]
+
+    async def apply(self, watched: Watched, messages: t.Iterable[t.Any], users: dict[int, UserInfo]) -> None:
+        """Emit records for new or edited messages of a watched channel or group."""
+        for m in messages:
+            if not isinstance(m, types.Message):
+                continue
+            if watched.stream is self.posts:
+                self.emit(self.posts, post_record(m, watched.name), watched.context)
+                continue
+            post_id = await self.thread_post(watched, m)
+            if post_id:
+                self.emit(self.comments, CommentRow.from_raw(post_id, m, users).as_record(watched.name),
+                          watched.context)
+
+    def emit_deleted(self, watched: Watched, ids: list[int]) -> None:
+        if watched.stream is not self.posts:
+            return  # удалённые комментарии схема пока не отражает
+        deleted_at = to_iso(dt.datetime.now(tz=dt.timezone.utc))
+        for post_id in ids:
+            self.emit(self.posts, deleted_post_record(post_id, watched.name, deleted_at), watched.context)
+
+    def emit_participant(self, watched: Watched, update: types.UpdateChannelParticipant) -> None:
+        prev, new = update.prev_participant, update.new_participant
+        left = (types.ChannelParticipantLeft, types.ChannelParticipantBanned)
+        was_in = prev is not None and not isinstance(prev, left)
+        is_in = new is not None and not isinstance(new, left)
+        if is_in and not was_in:
+            if update.invite:
+                event_type = "join_by_invite"
+            else:
+                event_type = "invite" if update.actor_id and update.actor_id != update.user_id else "join"
+        elif was_in and not is_in:
+            event_type = "leave"
+        else:
+            return  # смена прав и прочее — не вступление и не выход
+        invite = update.invite
+        admin_id = getattr(invite, "admin_id", None)
+        self.emit(self.events, {
+            "channel": watched.name,
+            # у живых событий нет id из журнала администратора, ключом служит qts
+            "event_id": f"live:{update.channel_id}:{update.qts}",
+            "event_type": event_type,
+            "user_id": update.user_id,
+            "date": to_iso(update.date),
+            "invite_link": getattr(invite, "link", None),
+            "invite_link_title": getattr(invite, "title", None),
+            "invite_admin_id": str(admin_id) if admin_id else None,  # в схеме строка, как у журнала администратора
+        }, watched.context)
+
+    async def on_update(self, client: t.Any, update: t.Any, users: dict, chats: dict) -> None:
+        if isinstance(update, (types.UpdateNewChannelMessage, types.UpdateEditChannelMessage)):
+            watched = self.watched(getattr(getattr(update.message, "peer_id", None), "channel_id", None))
+            if watched and self.accept(watched, update.pts, update.pts_count):
+                await self.apply(watched, [update.message], index_users(users.values()))
+        elif isinstance(update, types.UpdateDeleteChannelMessages):
+            watched = self.watched(update.channel_id)
+            if watched and self.accept(watched, update.pts, update.pts_count):
+                self.emit_deleted(watched, update.messages)
+        elif isinstance(update, types.UpdateChannelTooLong):
+            watched = self.watched(update.channel_id)
+            if watched:
+                self.mark_stale(watched)
+        elif isinstance(update, types.UpdateChannelParticipant) and update.channel_id in self.channels:
+            self.emit_participant(self.channels[update.channel_id], update)
+        sys.stdout.flush()
+
+    async def on_disconnect(self, client: t.Any, session: t.Any = None) -> None:
+        # пока соединения не было, апдейты могли потеряться — догоняем все каналы
+        for watched in (*self.channels.values(), *self.groups.values()):
+            self.mark_stale(watched)
+
+    async def catch_up(self, watched: Watched) -> None:
+        """Fetch the updates missed since the local pts of a channel or group."""
+        watched.stale, watched.syncing = False, True
+        try:
+            async for diff in achannel_difference(self.app, watched.input, watched.pts):
+                if isinstance(diff, types.updates.ChannelDifferenceTooLong):
+                    # разрыв слишком большой: берём последние сообщения, остальное покроет обычный sync
+                    self.tap.logger.warning("Update gap too long in '%s', only recent messages are replayed",
+                                            watched.name)
+                    await self.apply(watched, diff.messages, index_users(diff.users))
+                    watched.pts = diff.dialog.pts
+                    break
+                if isinstance(diff, types.updates.ChannelDifference):
+                    users = index_users(diff.users)
+                    await self.apply(watched, diff.new_messages, users)
+                    edits = [u.message for u in diff.other_updates if isinstance(u, types.UpdateEditChannelMessage)]
+                    await self.apply(watched, edits, users)
+                    for u in diff.other_updates:
+                        if isinstance(u, types.UpdateDeleteChannelMessages):
+                            self.emit_deleted(watched, u.messages)
+                watched.pts = diff.pts
+        finally:
+            watched.syncing = False
+        self.pending = True
+        sys.stdout.flush()
+
+    def flush(self) -> None:
+        """Promote bookmarks, store the pts of every channel and emit a STATE message."""
+        if not self.pending:
+            return
+        for stream in (self.posts, self.comments, self.events):
+            stream.promote_bookmarks()
+        for watched in (*self.channels.values(), *self.groups.values()):
+            watched.stream.get_context_state(watched.context)["pts"] = watched.pts
+        self.posts.write_checkpoint(force=True)  # слушатель пишет RECORD напрямую, без батчей
+        sys.stdout.flush()
+        self.pending = False
+
+    async def run(self) -> None:
+        self.resync = asyncio.Event()
+        self.resync.set()
+        flush_seconds = self.tap.config.get("listen_flush_seconds", 5)
+        while True:
+            try:
+                await asyncio.wait_for(self.resync.wait(), timeout=flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            if self.resync.is_set():
+                self.resync.clear()
+                for watched in (*self.channels.values(), *self.groups.values()):
+                    if watched.stale:
+                        await self.catch_up(watched)
+            self.flush()
+
+    def listen(self) -> None:
+        """Follow updates until the process is stopped."""
+        self.setup()
+        for stream in (self.posts, self.comments, self.events):
+            if stream.selected:
+                stream.emit_schema()
+        self.app.add_handler(RawUpdateHandler(self.on_update))
+        self.app.add_handler(DisconnectHandler(self.on_disconnect))
+        try:
+            utils.get_event_loop().run_until_complete(self.run())
+        finally:
+            self.flush()
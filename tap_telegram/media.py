@@ -0,0 +1,140 @@
+"""Media metadata of channel posts, read from raw ``MessageMedia*`` payloads."""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import typing as t
+from pathlib import Path
+
+from pyrogram.file_id import FileId, FileType
+from pyrogram.raw import types
+
+if t.TYPE_CHECKING:
+    from pyrogram import Client
+
+# атрибут документа → тип медиа; порядок важен: кружок и голосовое — частные случаи видео и аудио
+DOCUMENT_KINDS = (
+    (types.DocumentAttributeSticker, "sticker"),
+    (types.DocumentAttributeAnimated, "animation"),
+    (types.DocumentAttributeVideo, "video"),
+    (types.DocumentAttributeAudio, "audio"),
+)
+
+
+def _largest(sizes: list[t.Any]) -> t.Any:
+    # у PhotoSizeProgressive размер — последний из прогрессивных
+    def size(s: t.Any) -> int:
+        return getattr(s, "size", None) or (s.sizes[-1] if getattr(s, "sizes", None) else 0)
+    real = [s for s in sizes or [] if hasattr(s, "w")]
+    return max(real, key=size, default=None)
+
+
+def _smallest_thumb(sizes: list[t.Any]) -> t.Any:
+    # встроенные stripped/path-миниатюры не картинки, берём настоящий PhotoSize/PhotoCachedSize
+    real = [s for s in sizes or [] if isinstance(s, (types.PhotoSize, types.PhotoCachedSize))]
+    return min(real, key=lambda s: s.w * s.h, default=None)
+
+
+def _thumb(media: t.Any, sizes: list[t.Any], file_type: FileType) -> bytes | FileId | None:
+    thumb = _smallest_thumb(sizes)
+    if thumb is None:
+        return None
+    if isinstance(thumb, types.PhotoCachedSize):
+        return thumb.bytes  # миниатюра уже пришла вместе с сообщением
+    return FileId(file_type=file_type, dc_id=media.dc_id, media_id=media.id, access_hash=media.access_hash,
+                  file_reference=media.file_reference, thumbnail_size=thumb.type)
+
+
+def media_row(m: types.Message) -> tuple[dict, bytes | FileId | None] | None:
+    """Describe the media of a raw channel post without downloading it.
+
+    Args:
+        m: The raw channel post.
+
+    Returns:
+        A ``post_media`` row without the channel and post id, and the smallest
+        thumbnail — inline bytes or the location to fetch it from; None for posts
+        without media.
+    """
+    media = m.media
+    if media is None:
+        return None
+    row = {"media_id": None, "grouped_id": str(m.grouped_id) if m.grouped_id else None, "type": None,
+           "mime_type": None, "file_name": None, "size": None, "duration": None, "width": None, "height": None}
+    thumb = None
+    if isinstance(media, types.MessageMediaPhoto) and isinstance(media.photo, types.Photo):
+        photo = media.photo
+        largest = _largest(photo.sizes)
+        row.update(media_id=str(photo.id), type="photo", mime_type="image/jpeg",
+                   width=getattr(largest, "w", None), height=getattr(largest, "h", None),
+                   size=getattr(largest, "size", None) or (largest.sizes[-1] if getattr(largest, "sizes", None)
+                                                           else None))
+        thumb = _thumb(photo, photo.sizes, FileType.PHOTO)
+    elif isinstance(media, types.MessageMediaDocument) and isinstance(media.document, types.Document):
+        doc = media.document
+        attrs = {type(a): a for a in doc.attributes}
+        kind = next((name for cls, name in DOCUMENT_KINDS if cls in attrs), "document")
+        video, audio = attrs.get(types.DocumentAttributeVideo), attrs.get(types.DocumentAttributeAudio)
+        if video and video.round_message:
+            kind = "video_note"
+        elif audio and audio.voice:
+            kind = "voice"
+        dims = video or attrs.get(types.DocumentAttributeImageSize)
+        row.update(media_id=str(doc.id), type=kind, mime_type=doc.mime_type, size=doc.size,
+                   file_name=getattr(attrs.get(types.DocumentAttributeFilename), "file_name", None),
+                   duration=getattr(video or audio, "duration", None),
+                   width=getattr(dims, "w", None), height=getattr(dims, "h", None))
+        thumb = _thumb(doc, doc.thumbs, FileType.DOCUMENT)
+    else:
+        # MessageMediaWebPage → web_page, MessageMediaPoll → poll и т. д.
+        name = type(media).__name__[len("MessageMedia"):]
+        row["type"] = re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+    return row, thumb
+
+
+class ThumbCache:
+    """Content-addressed store of post thumbnails on the local disk.
+
+    Thumbnails live under ``blobs/<hash[:2]>/<hash>``; ``ids/<media_id>`` points a
+    media id at its hash, so a thumbnail is downloaded only once per media.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = Path(root)
+
+    def get(self, media_id: str | None) -> str | None:
+        """Return the known thumbnail hash of a media, if any."""
+        if not media_id:
+            return None  # у веб-страниц, опросов, гео и контактов нет media_id
+        path = self.root / "ids" / media_id
+        return path.read_text() if path.exists() else None
+
+    def put(self, media_id: str, data: bytes) -> str:
+        """Store a thumbnail and return its hash."""
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        blob = self.root / "blobs" / digest[:2] / digest
+        if not blob.exists():
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            blob.write_bytes(data)
+        ids = self.root / "ids"
+        ids.mkdir(parents=True, exist_ok=True)
+        (ids / media_id).write_text(digest)
+        return digest
+
+
+async def athumb_hash(app: Client, cache: ThumbCache, media_id: str | None, thumb: bytes | FileId) -> str | None:
+    """Hash a thumbnail, downloading it only when the cache does not know the media.
+
+    Returns:
+        The thumbnail hash, or None for media without an id.
+    """
+    if not media_id:
+        return None
+    digest = cache.get(media_id)
+    if digest:
+        return digest
+    if isinstance(thumb, FileId):
+        # get_file сам ходит в нужный DC; миниатюры укладываются в один чанк
+        thumb = b"".join([chunk async for chunk in app.get_file(thumb)])
+    return cache.put(media_id, thumb)
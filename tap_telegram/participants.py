@@ -0,0 +1,188 @@
+"""Channel roster crawl over ``channels.GetParticipants`` with search-prefix sharding."""
+
+from __future__ import annotations
+
+import typing as t
+
+from pyrogram.raw import functions, types
+
+from tap_telegram.client import ainvoke, to_iso
+from tap_telegram.history import invoke, iter_shards
+from tap_telegram.rows import UserInfo, index_users
+from tap_telegram.spill import SpillSet
+
+if t.TYPE_CHECKING:
+    import logging
+
+    from pyrogram import Client
+
+PAGE_SIZE = 200  # максимум GetParticipants за один запрос
+SEARCH_CAP = 10000  # больше сервер по одному фильтру не отдаёт
+# префиксы поиска: латиница, цифры, «_» из юзернеймов, кириллица с украинскими, белорусскими и казахскими буквами;
+# кого не нашёл ни один префикс, покажет сверка с общим числом участников
+ALPHABET = "abcdefghijklmnopqrstuvwxyz0123456789_абвгдеёжзийклмнопрстуфхцчшщъыьэюяіїєґўәғқңөұүһ"
+ROLES = {"creator": "creator", "admin": "admin", "banned": "banned"}
+MAX_PREFIX = 3  # глубже дробить бессмысленно: поиск по одной-двум буквам уже узкий
+
+
+def participant_row(p: t.Any, users: dict[int, UserInfo], channel: str) -> dict | None:
+    """Build a ``participants`` record from a raw ``ChannelParticipant*`` constructor.
+
+    Returns:
+        The record, or None for participants that are not users (banned chats etc.).
+    """
+    user_id = getattr(p, "user_id", None)
+    if user_id is None:
+        return None
+    first_name, last_name, username = users.get(user_id) or (None, None, None)
+    return {
+        "channel": channel,
+        "user_id": user_id,
+        # ChannelParticipantAdmin → admin, ChannelParticipant/ChannelParticipantSelf → member
+        "role": ROLES.get(type(p).__name__[len("ChannelParticipant"):].lower(), "member"),
+        "joined_at": to_iso(getattr(p, "date", None)),
+        "first_name": first_name,
+        "last_name": last_name,
+        "username": username,
+    }
+
+
+async def acollect_participants(app: Client, channel: t.Any, flt: t.Any) -> tuple[list[t.Any], dict, int]:
+    """Fetch every participant one filter gives access to.
+
+    Args:
+        app: Connected client.
+        channel: ``InputChannel`` of the channel.
+        flt: ``ChannelParticipantsFilter`` constructor.
+
+    Returns:
+        The participants, their users and the total count reported by the server.
+    """
+    participants, users, count, offset = [], {}, 0, 0
+    while True:
+        result = await ainvoke(app, functions.channels.GetParticipants(
+            channel=channel, filter=flt, offset=offset, limit=PAGE_SIZE, hash=0,
+        ))
+        if not isinstance(result, types.channels.ChannelParticipants) or not result.participants:
+            break
+        count = result.count
+        participants.extend(result.participants)
+        users.update(index_users(result.users))
+        offset += len(result.participants)
+        if offset >= count or offset >= SEARCH_CAP:
+            break
+    return participants, users, count
+
+
+def crawl_roster(app: Client, channel: t.Any, name: str, concurrency: int, logger: logging.Logger,
+                 max_memory: int = 200000) -> t.Iterator[dict]:
+    """Crawl the whole roster of a channel.
+
+    Small channels are served by the ``ChannelParticipantsRecent`` filter alone.
+    Larger ones are split into ``ChannelParticipantsSearch`` prefixes; a prefix
+    that still hits the server cap is split again with one more letter. Prefixes
+    of a wave are crawled concurrently under the session pool rate limits, and
+    users matched by several prefixes are emitted once. Prefixes still capped at
+    ``MAX_PREFIX`` letters and a total below the participant count are logged.
+
+    Args:
+        app: Connected client.
+        channel: ``InputChannel`` of the channel.
+        name: Channel name without the leading ``@``.
+        concurrency: Maximum number of prefixes in flight.
+        logger: Logger for incomplete crawl warnings.
+        max_memory: User ids kept in memory for deduplication before spilling to disk.
+
+    Yields:
+        One ``participants`` record per user.
+    """
+    with SpillSet(max_memory) as seen:
+        def fresh(participants: list[t.Any], users: dict) -> list[dict]:
+            rows: dict[int, dict] = {}
+            for p in participants:
+                row = participant_row(p, users, name)
+                if row:
+                    rows.setdefault(row["user_id"], row)
+            new = seen.fresh(rows)
+            return [row for user_id, row in rows.items() if user_id in new]
+
+        async def crawl(prefix: str) -> tuple[list[t.Any], dict, int]:
+            flt = types.ChannelParticipantsSearch(q=prefix) if prefix else types.ChannelParticipantsRecent()
+            return await acollect_participants(app, channel, flt)
+
+        (_, (participants, users, expected)), = iter_shards(crawl, [[""]], 1)
+        rows = fresh(participants, users)
+        total = len(rows)
+        yield from rows
+        if len(participants) >= expected:
+            return  # весь состав уместился в один фильтр
+
+        wave, capped = [[c] for c in ALPHABET], []
+        while wave:
+            saturated = []
+            for (prefix,), (participants, users, count) in iter_shards(crawl, wave, concurrency):
+                rows = fresh(participants, users)
+                total += len(rows)
+                yield from rows
+                if len(participants) < count:
+                    (saturated if len(prefix) < MAX_PREFIX else capped).append(prefix)
+            # упёрлись в лимит — дробим префикс ещё на букву
+            wave = [[prefix + c] for prefix in saturated for c in ALPHABET]
+
+        if capped:
+            logger.warning("Search prefixes of '%s' still hit the server cap at %d letters: %s",
+                           name, MAX_PREFIX, ", ".join(capped))
+        if total < expected:
+            logger.warning("Crawled %d of %d participants of '%s'; the rest match no search prefix",
+                           total, expected, name)
+
+
+# события журнала администратора, меняющие состав: класс действия → ушёл ли участник
+ROSTER_ACTIONS = {
+    types.ChannelAdminLogEventActionParticipantJoin: False,
+    types.ChannelAdminLogEventActionParticipantJoinByInvite: False,
+    types.ChannelAdminLogEventActionParticipantJoinByRequest: False,
+    types.ChannelAdminLogEventActionParticipantInvite: False,
+    types.ChannelAdminLogEventActionParticipantLeave: True,
+}
+
+
+def roster_changes(app: Client, channel: t.Any, name: str, min_id: int) -> tuple[list[dict], int]:
+    """Read joins and leaves from the admin log newer than ``min_id``.
+
+    The admin log keeps the last 48 hours only, hence the stream falls back to a
+    full crawl when the last one is too old.
+
+    Returns:
+        Joined participants and soft-delete rows of those who left, and the id of
+        the newest admin log event seen.
+    """
+    flt = types.ChannelAdminLogEventsFilter(join=True, leave=True, invite=True)
+    rows, max_id, top_id = [], 0, min_id
+    while True:
+        result = invoke(app, functions.channels.GetAdminLog(
+            channel=channel, q="", events_filter=flt, max_id=max_id, min_id=min_id, limit=100,
+        ))
+        if not result.events:
+            break
+        users = index_users(result.users)
+        for ev in result.events:
+            top_id = max(top_id, ev.id)
+            left = ROSTER_ACTIONS.get(type(ev.action))
+            if left is None:
+                continue
+            # при приглашении ev.user_id — пригласивший, участник лежит в самом действии
+            participant = getattr(ev.action, "participant", None)
+            user_id = getattr(participant, "user_id", None) or ev.user_id
+            first_name, last_name, username = users.get(user_id) or (None, None, None)
+            row = {"channel": name, "user_id": user_id, "role": "member", "joined_at": to_iso(ev.date),
+                   "first_name": first_name, "last_name": last_name, "username": username}
+            if left:
+                row = {"channel": name, "user_id": user_id, "_sdc_deleted_at": to_iso(ev.date)}
+            rows.append(row)
+        max_id = result.events[-1].id
+    # события идут от новых к старым: для одного пользователя побеждает самое свежее
+    latest: dict[int, dict] = {}
+    for row in rows:
+        latest.setdefault(row["user_id"], row)
+    return list(latest.values()), top_id
@@ -0,0 +1,231 @@
+"""Pool of admin sessions with rate-budget-aware routing."""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import threading
+import time
+import typing as t
+
+from pyrogram import Client, utils
+from pyrogram.errors import FloodWait
+
+# методы клиента, которые не ходят в Telegram: их не ограничиваем
+LOCAL_METHODS = frozenset((
+    "add_handler", "remove_handler", "start", "stop", "restart", "run", "connect", "disconnect",
+    "initialize", "terminate", "export_session_string", "stop_transmission",
+))
+
+
+class Session:
+    """One admin account: its client, token bucket and FloodWait cooldown."""
+
+    __slots__ = ("index", "client", "tokens", "updated", "cooldown_until", "started", "start_lock")
+
+    def __init__(self, index: int, client: Client, burst: float) -> None:
+        self.index = index
+        self.client = client
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.cooldown_until = 0.0
+        self.started = False
+        self.start_lock = threading.Lock()
+
+
+class SessionPool:
+    """Route partitions and RPCs to the admin session with the most remaining budget.
+
+    Every session is a token bucket refilled at ``rate`` requests per second.
+    A ``FloodWait`` puts the session on cooldown, so new partitions go to other
+    accounts meanwhile. Access hashes are per account, hence a partition stays
+    pinned to the session that served its first request.
+    """
+
+    def __init__(self, api_id: int, api_hash: str, session_keys: list[str], rate: float = 10.0) -> None:
+        self.rate = rate
+        self.burst = max(rate, 1.0)
+        self.sessions = [
+            Session(i, Client(name=f"tap_telegram_{i}", api_id=api_id, api_hash=api_hash,
+                              session_string=key, in_memory=True), self.burst)
+            for i, key in enumerate(session_keys)
+        ]
+        self.pins: dict[str, Session] = {}
+        self.lock = threading.Lock()
+        self.turn = 0
+
+    def _refill(self, session: Session, now: float) -> None:
+        session.tokens = min(self.burst, session.tokens + (now - session.updated) * self.rate)
+        session.updated = now
+
+    def budget(self, session: Session) -> float:
+        """Remaining requests of a session right now; negative while it cools down."""
+        now = time.monotonic()
+        with self.lock:
+            self._refill(session, now)
+            if session.cooldown_until > now:
+                return now - session.cooldown_until
+            return session.tokens
+
+    def pick(self) -> Session:
+        """Return the session with the most remaining budget; ties go round robin."""
+        with self.lock:
+            start = self.turn
+            self.turn = (self.turn + 1) % len(self.sessions)
+        # max берёт первый из равных — начинаем обход каждый раз со следующей сессии
+        return max(self.sessions[start:] + self.sessions[:start], key=self.budget)
+
+    def session_for(self, key: str) -> Session:
+        """Return the session pinned to a partition, pinning the best one on first use."""
+        with self.lock:
+            session = self.pins.get(key)
+        if session is None:
+            session = self.pick()
+            with self.lock:
+                session = self.pins.setdefault(key, session)
+        if not session.started:
+            # запуск клиента может уйти в цикл событий и ждать его; общий замок пула на это время не держим,
+            # иначе корутины других стримов встанут на budget() и _wait()
+            with session.start_lock:
+                if not session.started:
+                    session.client.start()
+                    session.started = True
+        return session
+
+    def client_for(self, key: str) -> PooledClient:
+        """Return a client proxy bound to the session pinned to ``key``."""
+        return PooledClient(self, self.session_for(key))
+
+    def _wait(self, session: Session) -> float:
+        # сколько ждать до следующего токена (0 — можно слать сразу)
+        now = time.monotonic()
+        with self.lock:
+            self._refill(session, now)
+            if session.cooldown_until > now:
+                return session.cooldown_until - now
+            if session.tokens >= 1:
+                session.tokens -= 1
+                return 0.0
+            return (1 - session.tokens) / self.rate
+
+    def _cool_down(self, session: Session, seconds: int) -> None:
+        with self.lock:
+            session.cooldown_until = max(session.cooldown_until, time.monotonic() + seconds)
+
+    def throttle(self, session: Session) -> None:
+        """Block until the session has a request token, spending it."""
+        while True:
+            delay = self._wait(session)
+            if not delay:
+                return
+            time.sleep(delay)
+
+    async def athrottle(self, session: Session) -> None:
+        """Async counterpart of :meth:`throttle`."""
+        while True:
+            delay = self._wait(session)
+            if not delay:
+                return
+            await asyncio.sleep(delay)
+
+    def call(self, session: Session, method: t.Callable, *args: t.Any, **kwargs: t.Any) -> t.Any:
+        """Call a Telegram-bound client method, such as ``resolve_peer``, within the rate budget.
+
+        Inside the event loop the returned coroutine or async generator waits
+        for its token when it is first awaited or iterated.
+        """
+        if not utils.get_event_loop().is_running():
+            while True:
+                self.throttle(session)
+                try:
+                    return method(*args, **kwargs)
+                except FloodWait as fw:
+                    self._cool_down(session, fw.value)
+        result = method(*args, **kwargs)
+        if inspect.isasyncgen(result):
+            return self._athrottled_gen(session, result)
+        if inspect.iscoroutine(result):
+            result.close()  # корутину пересоздадим после ожидания токена — и при повторе после FloodWait
+            return self._athrottled(session, method, args, kwargs)
+        return result
+
+    async def _athrottled(self, session: Session, method: t.Callable, args: tuple, kwargs: dict) -> t.Any:
+        while True:
+            await self.athrottle(session)
+            try:
+                return await method(*args, **kwargs)
+            except FloodWait as fw:
+                self._cool_down(session, fw.value)
+
+    async def _athrottled_gen(self, session: Session, agen: t.AsyncIterator) -> t.AsyncIterator:
+        await self.athrottle(session)
+        try:
+            async for item in agen:
+                yield item
+        except FloodWait as fw:
+            self._cool_down(session, fw.value)
+            raise
+
+    def invoke(self, session: Session | None, query: t.Any, *args: t.Any, **kwargs: t.Any) -> t.Any:
+        """Invoke a raw query within the rate budget, waiting out FloodWait.
+
+        Args:
+            session: Pinned session, or None to use the session with most budget.
+            query: Raw TL function.
+            *args: Extra ``Client.invoke`` arguments.
+            **kwargs: Extra ``Client.invoke`` keyword arguments.
+
+        Returns:
+            The query result.
+        """
+        session = session or self.pick()
+        while True:
+            delay = self._wait(session)
+            if delay:
+                time.sleep(delay)
+                continue
+            try:
+                return session.client.invoke(query, *args, **kwargs)
+            except FloodWait as fw:
+                self._cool_down(session, fw.value)
+
+    async def ainvoke(self, session: Session | None, query: t.Any, *args: t.Any, **kwargs: t.Any) -> t.Any:
+        """Async counterpart of :meth:`invoke`, for use inside the client's event loop."""
+        session = session or self.pick()
+        while True:
+            delay = self._wait(session)
+            if delay:
+                await asyncio.sleep(delay)
+                continue
+            try:
+                return await session.client.invoke(query, *args, **kwargs)
+            except FloodWait as fw:
+                self._cool_down(session, fw.value)
+
+    def close(self) -> None:
+        """Stop every started session."""
+        for session in self.sessions:
+            if session.started:
+                session.client.stop()
+                session.started = False
+
+
+class PooledClient:
+    """Client proxy pinned to one pool session; raw RPCs go through the pool."""
+
+    def __init__(self, pool: SessionPool, session: Session) -> None:
+        self.pool = pool
+        self.session = session
+
+    def __getattr__(self, name: str) -> t.Any:
+        value = getattr(self.session.client, name)
+        if not callable(value) or name.startswith(("_", "on_")) or name in LOCAL_METHODS:
+            return value
+        # всё, что ходит в Telegram (resolve_peer, get_file…), тоже тратит бюджет сессии
+        return lambda *args, **kwargs: self.pool.call(self.session, value, *args, **kwargs)
+
+    def invoke(self, query: t.Any, *args: t.Any, **kwargs: t.Any) -> t.Any:
+        """Invoke a raw query; returns a coroutine when called inside the event loop."""
+        if utils.get_event_loop().is_running():
+            return self.pool.ainvoke(self.session, query, *args, **kwargs)
+        return self.pool.invoke(self.session, query, *args, **kwargs)
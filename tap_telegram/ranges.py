@@ -0,0 +1,57 @@
+"""Compact sets of message ids kept in the state as sorted ``[lo, hi]`` ranges."""
+
+from __future__ import annotations
+
+import bisect
+import typing as t
+
+
+def to_ranges(ids: t.Iterable[int]) -> list[list[int]]:
+    """Collapse ids into sorted, non-overlapping inclusive ``[lo, hi]`` ranges."""
+    ranges: list[list[int]] = []
+    for i in sorted(set(ids)):
+        if ranges and i == ranges[-1][1] + 1:
+            ranges[-1][1] = i
+        else:
+            ranges.append([i, i])
+    return ranges
+
+
+def iter_ids(ranges: list[list[int]]) -> t.Iterator[int]:
+    """Iterate over every id of a range set in ascending order."""
+    for lo, hi in ranges:
+        yield from range(lo, hi + 1)
+
+
+def union(ranges: list[list[int]], ids: t.Iterable[int]) -> list[list[int]]:
+    """Add ids to a range set.
+
+    Returns:
+        A new range set; the input is left untouched.
+    """
+    merged: list[list[int]] = []
+    for lo, hi in sorted([*map(list, ranges), *to_ranges(ids)]):
+        if merged and lo <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    return merged
+
+
+def difference(ranges: list[list[int]], ids: t.Collection[int]) -> list[list[int]]:
+    """Remove ids from a range set.
+
+    Returns:
+        A new range set; the input is left untouched.
+    """
+    removed = sorted(set(ids))
+    result: list[list[int]] = []
+    for lo, hi in ranges:
+        start = lo
+        for i in removed[bisect.bisect_left(removed, lo):bisect.bisect_right(removed, hi)]:
+            if i > start:
+                result.append([start, i - 1])
+            start = i + 1
+        if start <= hi:
+            result.append([start, hi])
+    return result
@@ -0,0 +1,122 @@
+"""Compact row structures built straight from raw Telegram TL payloads."""
+
+from __future__ import annotations
+
+import typing as t
+
+from pyrogram.raw import types
+
+from tap_telegram.client import dumps, reactions_list, to_iso
+
+if t.TYPE_CHECKING:
+    from tap_telegram.history import Page
+
+# (first_name, last_name, username) — всё, что схеме нужно от пользователя
+UserInfo = t.Tuple[t.Optional[str], t.Optional[str], t.Optional[str]]
+
+
+def index_users(users: t.Iterable[t.Any]) -> dict[int, UserInfo]:
+    """Index the ``users`` vector of a raw response by user id.
+
+    Args:
+        users: Raw ``User``/``UserEmpty`` constructors.
+
+    Returns:
+        A mapping of user id to a ``(first_name, last_name, username)`` tuple.
+    """
+    return {
+        u.id: (getattr(u, "first_name", None), getattr(u, "last_name", None), getattr(u, "username", None))
+        for u in users
+    }
+
+
+class CommentRow:
+    """A single discussion reply holding only the fields of the comments schema."""
+
+    __slots__ = ("post_id", "id", "date", "user_id", "first_name", "last_name", "username", "text")
+
+    def __init__(self, post_id: int, id: int, date: int, user_id: int | None,  # noqa: A002
+                 user: UserInfo | None, text: str) -> None:
+        self.post_id = post_id
+        self.id = id
+        self.date = date
+        self.user_id = user_id
+        self.first_name, self.last_name, self.username = user or (None, None, None)
+        self.text = text
+
+    @classmethod
+    def from_raw(cls, post_id: int, m: types.Message, users: dict[int, UserInfo]) -> CommentRow:
+        """Build a row from a raw ``Message`` of a ``messages.Messages`` payload.
+
+        Args:
+            post_id: Id of the channel post the reply belongs to.
+            m: The raw reply message.
+            users: Users of the same payload, see :func:`index_users`.
+
+        Returns:
+            The compact comment row.
+        """
+        user_id = m.from_id.user_id if isinstance(m.from_id, types.PeerUser) else None
+        return cls(post_id, m.id, m.date, user_id, users.get(user_id), m.message)
+
+    def as_record(self, channel: str) -> dict:
+        """Render the row as a ``comments`` record."""
+        return {
+            "channel": channel,
+            "post_id": self.post_id,
+            "author": str(self.user_id) if self.user_id else 'anon',
+            "text": self.text,
+            "id": self.id,
+            "date": to_iso(self.date),
+            "first_name": self.first_name or '-',
+            "last_name": self.last_name or '-',
+            "username": self.username or '-'
+        }
+
+
+def comment_rows(page: Page, post_id: int) -> list[CommentRow]:
+    """Turn one page of discussion replies into comment rows.
+
+    Args:
+        page: A page produced by :func:`tap_telegram.history.iter_replies`.
+        post_id: Id of the channel post the replies belong to.
+
+    Returns:
+        One row per reply.
+    """
+    return [CommentRow.from_raw(post_id, m, page.users) for m in page.messages]
+
+
+def post_record(m: types.Message, channel: str, reactions: list[dict] | None = None) -> dict:
+    """Build a ``posts`` record straight from a raw channel ``Message``.
+
+    Args:
+        m: The raw channel post.
+        channel: Channel name without the leading ``@``.
+        reactions: Reactions of the post already built by :func:`reactions_list`.
+
+    Returns:
+        The record, made of JSON-native values only.
+    """
+    link = '-'
+    if m.media and m.entities:
+        # как и раньше, ссылка берётся только из подписи к медиа
+        for e in m.entities:
+            if isinstance(e, types.MessageEntityTextUrl):
+                link = e.url
+                break
+    return {
+        "channel": channel,
+        "post_id": m.id,
+        "created": to_iso(m.date),
+        "text": m.message or "",
+        "views": m.views,
+        "forwards": m.forwards,
+        "reactions": dumps(reactions if reactions is not None else reactions_list(m.reactions)),
+        "link": link
+    }
+
+
+def deleted_post_record(post_id: int, channel: str, deleted_at: str) -> dict:
+    """Build a soft-delete ``posts`` record for a post removed from the channel."""
+    return {"channel": channel, "post_id": post_id, "_sdc_deleted_at": deleted_at}
@@ -0,0 +1,73 @@
+"""Singer message writers for tap-telegram."""
+
+from __future__ import annotations
+
+import sys
+import threading
+import typing as t
+
+from singer_sdk.io_base import GenericSingerWriter, SingerWriter
+
+from tap_telegram.client import orjson
+
+if t.TYPE_CHECKING:
+    from singer_sdk.singerlib import Message
+
+
+class OrjsonSingerWriter(SingerWriter):
+    """Write Singer messages to stdout using orjson."""
+
+    def serialize_message(self, message: Message) -> str:  # noqa: PLR6301
+        """Serialize a message into a line of JSON.
+
+        Args:
+            message: A Singer message object.
+
+        Returns:
+            A string of serialized JSON.
+        """
+        return orjson.dumps(message.to_dict(), default=str).decode()
+
+    def write_message(self, message: Message) -> None:
+        """Write a message to stdout.
+
+        Args:
+            message: The message to write.
+        """
+        sys.stdout.write(self.format_message(message) + "\n")
+        # как и writer SDK: STATE не должен застрять в буфере, если процесс упадёт
+        sys.stdout.flush()
+
+
+def _message_writer() -> type[GenericSingerWriter]:
+    try:
+        from singer_sdk.contrib.msgspec import MsgSpecWriter
+    except ImportError:  # msgspec — необязательная зависимость (extra "msgspec")
+        pass
+    else:
+        return MsgSpecWriter
+    # без msgspec — orjson, без него — стандартный writer SDK
+    return OrjsonSingerWriter if orjson is not None else SingerWriter
+
+
+def _locked(writer: type[GenericSingerWriter]) -> type[GenericSingerWriter]:
+    class LockedWriter(writer):  # type: ignore[valid-type,misc]
+        """Writer shared by streams synced in worker threads: one whole line at a time.
+
+        ``lock`` is re-entrant, so a stream can hold it while it snapshots its
+        state and writes the STATE message.
+        """
+
+        def __init__(self, *args: t.Any, **kwargs: t.Any) -> None:
+            super().__init__(*args, **kwargs)
+            self.lock = threading.RLock()
+
+        def write_message(self, message: Message) -> None:
+            with self.lock:
+                super().write_message(message)
+
+    LockedWriter.__name__ = LockedWriter.__qualname__ = f"Locked{writer.__name__}"
+    return LockedWriter
+
+
+MessageWriter: type[GenericSingerWriter] = _locked(_message_writer())
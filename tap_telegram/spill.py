@@ -0,0 +1,74 @@
+"""Memory-bounded set of seen ids that spills to a temporary SQLite database."""
+
+from __future__ import annotations
+
+import sqlite3
+import typing as t
+
+QUERY_CHUNK = 500  # держимся ниже лимита SQLite на число параметров запроса
+
+
+class SpillSet:
+    """Set of integer keys holding at most ``max_memory`` of them in memory.
+
+    Once the in-memory part grows past the cap it is moved to a private
+    on-disk SQLite database, which SQLite deletes when the set is closed.
+    """
+
+    def __init__(self, max_memory: int) -> None:
+        self.max_memory = max_memory
+        self.memory: set[int] = set()
+        self.db: sqlite3.Connection | None = None
+
+    def __enter__(self) -> SpillSet:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+        self.memory.clear()
+
+    def spill(self) -> None:
+        """Move the in-memory keys to the database."""
+        if self.db is None:
+            # пустой путь — временная база на диске, удаляется при закрытии
+            self.db = sqlite3.connect("")
+            self.db.execute("CREATE TABLE seen (key INTEGER PRIMARY KEY)")
+        self.db.executemany("INSERT OR IGNORE INTO seen VALUES (?)", ((k,) for k in self.memory))
+        self.db.commit()
+        self.memory.clear()
+
+    def spilled(self, keys: list[int]) -> set[int]:
+        if self.db is None:
+            return set()
+        found = set()
+        for i in range(0, len(keys), QUERY_CHUNK):
+            chunk = keys[i:i + QUERY_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            found.update(k for (k,) in self.db.execute(f"SELECT key FROM seen WHERE key IN ({marks})", chunk))
+        return found
+
+    def fresh(self, keys: t.Iterable[int]) -> set[int]:
+        """Add a batch of keys and return those not seen before.
+
+        Args:
+            keys: Keys of one page; duplicates within the page count once.
+
+        Returns:
+            The keys that were new.
+        """
+        keys = list(keys)
+        known = self.spilled(keys)
+        new = set()
+        for key in keys:
+            if key in known or key in self.memory:
+                continue
+            self.memory.add(key)
+            new.add(key)
+        if len(self.memory) > self.max_memory:
+            self.spill()
+        return new
@@ -2,21 +2,35 @@
 
 from __future__ import annotations
 
+import hashlib
 import logging
+from functools import cached_property
 import time
 import typing as t
 from importlib import resources
 import json, sys
 import pandas as pd
 from pyrogram.raw import functions, types
-from pyrogram.errors import GraphInvalidReload, MsgIdInvalid, FloodWait
+from pyrogram.errors import ChatAdminRequired, GraphInvalidReload, MsgIdInvalid, FloodWait, RPCError
 from singer_sdk.helpers.jsonpath import extract_jsonpath
 import datetime as dt
 
 from singer_sdk import typing as th  # JSON Schema typing helpers
 
-from tap_telegram.client import TelegramStream
-from pyrogram import Client, raw
+from tap_telegram.adminlog import event_record, events_filter
+from tap_telegram.client import TelegramStream, ainvoke, dumps, gather_limited, reactions_list, run_concurrently, to_iso
+from tap_telegram.entities import link_rows
+from tap_telegram.forwards import ForwardsCache, acollect_public_forwards, forward_row
+from tap_telegram.history import (
+    aiter_history, aiter_replies, input_channel, invoke, iter_channel_difference, iter_history, iter_replies,
+    iter_search, run_backfill,
+)
+from tap_telegram.media import ThumbCache, athumb_hash, media_row
+from tap_telegram.participants import crawl_roster, roster_changes
+from tap_telegram.ranges import difference, iter_ids, union
+from tap_telegram.rows import CommentRow, comment_rows, deleted_post_record, post_record
+from tap_telegram.spill import SpillSet
+from pyrogram import Client, raw, utils
 
 # TODO: Delete this is if not using json files for schema definition
 SCHEMAS_DIR = resources.files(__package__) / "schemas"
@@ -32,6 +46,7 @@ class GroupStream(TelegramStream):
     name = "group"
     primary_keys: t.ClassVar[list[str]] = ["id", "date"]
     replication_key = "date"
+    cdc_keys: t.ClassVar[list[str]] = ["id"]
 
     schema = th.PropertiesList(
         th.Property("id", th.IntegerType),
@@ -41,19 +56,78 @@ class GroupStream(TelegramStream):
         th.Property("channel", th.StringType),
         th.Property("invite_link", th.StringType),
         th.Property("members_total", th.IntegerType),
+        th.Property("changed_at", th.DateTimeType),
     ).to_dict()
 
+    FULL_FIELDS = ("description", "invite_link", "members_total")
+    FULL_CONCURRENCY = 8
+
+    @property
+    def partitions(self) -> list[dict] | None:
+        # все каналы обходятся за один проход пачками, без партиций
+        return None
+
+    def get_records(
+            self,
+            context: Context | None,
+    ) -> t.Iterable[dict]:
+        channels = self.config.get("channels") or [self.config.get("channel")]
+        today = dt.date.today().isoformat()
+        # GetFullChannel нужен только ради about / exported_invite / participants_count
+        need_full = any(self.mask.get(("properties", f), True) for f in self.FULL_FIELDS)
+
+        with self.open_client(context) as app:
+            # ── основная «паспортная» информация ────────────────────────────
+            inputs = []
+            for ch in channels:
+                p = app.resolve_peer(ch)  # берётся из кэша пиров сессии
+                inputs.append(types.InputChannel(channel_id=p.channel_id, access_hash=p.access_hash))
+
+            for i in range(0, len(inputs), 100):
+                chats = [c for c in invoke(app, functions.channels.GetChannels(id=inputs[i:i + 100])).chats
+                         if isinstance(c, types.Channel)]
+                fulls = [None] * len(chats)
+                if need_full:
+                    fulls = run_concurrently(
+                        [lambda c=c: ainvoke(app, functions.channels.GetFullChannel(
+                            channel=types.InputChannel(channel_id=c.id, access_hash=c.access_hash)))
+                         for c in chats],
+                        self.FULL_CONCURRENCY,
+                    )
+                for chat, full in zip(chats, fulls):
+                    if isinstance(full, Exception):
+                        raise full
+                    row = {
+                        "date": today,
+                        "id": utils.get_channel_id(chat.id),
+                        "title": chat.title,
+                        "description": "",
+                        "members_total": chat.participants_count,
+                        "channel": chat.username,
+                        "invite_link": None
+                    }
+                    if full is not None:
+                        fc = full.full_chat
+                        invite = fc.exported_invite
+                        row["description"] = fc.about or ""
+                        row["members_total"] = fc.participants_count
+                        row["invite_link"] = invite.link if isinstance(invite, types.ChatInviteExported) else None
+                    yield from self.changed_only([row], context)
+
 
 class GroupSourcesStream(TelegramStream):
     """Define custom stream."""
     records_jsonpath = "$[*]"
     name = "group_sources_members_stat"
-    primary_keys: t.ClassVar[list[str]] = ["date", "channel"]
+    primary_keys: t.ClassVar[list[str]] = ["date", "channel", "granularity", "period_start"]
     replication_key = "date"
+    sync_interval = dt.timedelta(hours=23)  # графики статистики обновляются раз в сутки
 
     schema = th.PropertiesList(
         th.Property("date", th.DateType),
         th.Property("channel", th.StringType),
+        th.Property("granularity", th.StringType),
+        th.Property("period_start", th.DateTimeType, description="Start of the day or hour the point covers"),
         th.Property("ads", th.IntegerType),
         th.Property("link", th.IntegerType),
         th.Property("similar_channels", th.IntegerType),
@@ -90,12 +164,9 @@ class GroupSourcesStream(TelegramStream):
             self,
             context: Context | None,
     ) -> t.Iterable[dict]:
-        API_ID = self.config.get('api_id')  # Ваш API ID
-        API_HASH = self.config.get('api_hash')  # Ваш API Hash
-        SESSION = self.config.get('session_key')  # Сессия ПОЛЬЗОВАТЕЛЯ, АДМИНА КАНАЛА
-        CHANNEL = self.config.get('channel')
+        CHANNEL = self.get_channel(context)
 
-        with Client(name="my_account", api_id=API_ID, api_hash=API_HASH, session_string=SESSION) as app:
+        with self.open_client(context) as app:
             ch = self.as_input(app, CHANNEL)
 
             # 1️⃣ Получаем stats и token
@@ -125,18 +196,18 @@ class GroupSourcesStream(TelegramStream):
                 # print(data["names"])
                 cols = {c[0]: c[1:] for c in data["columns"]}  # 'x', 'y0', 'y1'
                 df = pd.DataFrame(cols)
-                df["x"] = pd.to_datetime(df["x"], unit="ms")
-                df["x"] = df["x"].astype(str)
+                df = self.with_zoomed(app, graph, df, context)  # почасовые точки последних дней
+                df = self.format_points(df)
                 df['channel'] = CHANNEL[1:]
                 df.rename(columns=data["names"], inplace=True)
                 df.rename(columns={'x': 'date', 'Ads': 'ads', 'URL': 'link', 'Similar Channels': 'similar_channels',
                                    'Shareable Chat Folders': 'shareable_chat', 'PM': 'pm', 'Search': 'search',
                                    'Groups': 'groups', 'Channels': 'channels'}, inplace=True)
 
+                df = self.since_bookmark(df, context)  # только новые дни + окно пересчёта
                 yield from extract_jsonpath(self.records_jsonpath, input=df.to_dict(orient='records'))
             except Exception:
-                df = pd.DataFrame()
-                yield from extract_jsonpath(self.records_jsonpath, input=df.to_dict(orient='records'))
+                self.load_failed(context)
 
 
 class GroupEnabledNotificationsStream(TelegramStream):
@@ -145,6 +216,8 @@ class GroupEnabledNotificationsStream(TelegramStream):
     name = "group_enabled_notifications"
     primary_keys: t.ClassVar[list[str]] = ["date", "channel"]
     replication_key = "date"
+    sync_interval = dt.timedelta(hours=23)  # графики статистики обновляются раз в сутки
+    cdc_keys: t.ClassVar[list[str]] = ["channel"]
 
     schema = th.PropertiesList(
         th.Property("date", th.DateType),
@@ -152,6 +225,7 @@ class GroupEnabledNotificationsStream(TelegramStream):
         th.Property("part", th.IntegerType),
         th.Property("total", th.IntegerType),
         th.Property("pct", th.IntegerType),
+        th.Property("changed_at", th.DateTimeType),
     ).to_dict()
 
     def as_input(self, app, chat):
@@ -180,12 +254,9 @@ class GroupEnabledNotificationsStream(TelegramStream):
             self,
             context: Context | None,
     ) -> t.Iterable[dict]:
-        API_ID = self.config.get('api_id')  # Ваш API ID
-        API_HASH = self.config.get('api_hash')  # Ваш API Hash
-        SESSION = self.config.get('session_key')  # Сессия ПОЛЬЗОВАТЕЛЯ, АДМИНА КАНАЛА
-        CHANNEL = self.config.get('channel')
+        CHANNEL = self.get_channel(context)
 
-        with Client(name="my_account", api_id=API_ID, api_hash=API_HASH, session_string=SESSION) as app:
+        with self.open_client(context) as app:
             ch = self.as_input(app, CHANNEL)
 
             # 1️⃣ Получаем stats и token
@@ -202,22 +273,24 @@ class GroupEnabledNotificationsStream(TelegramStream):
                         "pct": pct,
                         "channel": CHANNEL
                     }
-                yield from extract_jsonpath(self.records_jsonpath, input=[row])
+                yield from self.changed_only([row], context)
             except Exception:
-                df = pd.DataFrame()
-                yield from extract_jsonpath(self.records_jsonpath, input=df.to_dict(orient='records'))
+                self.load_failed(context)
 
 
 class GroupMuteStatStream(TelegramStream):
     """Define custom stream."""
     records_jsonpath = "$[*]"
     name = "group_mute_stat"
-    primary_keys: t.ClassVar[list[str]] = ["date", "channel"]
+    primary_keys: t.ClassVar[list[str]] = ["date", "channel", "granularity", "period_start"]
     replication_key = "date"
+    sync_interval = dt.timedelta(hours=23)  # графики статистики обновляются раз в сутки
 
     schema = th.PropertiesList(
         th.Property("date", th.DateType),
         th.Property("channel", th.StringType),
+        th.Property("granularity", th.StringType),
+        th.Property("period_start", th.DateTimeType, description="Start of the day or hour the point covers"),
         th.Property("Muted", th.IntegerType),
         th.Property("Unmuted", th.IntegerType),
     ).to_dict()
@@ -248,12 +321,9 @@ class GroupMuteStatStream(TelegramStream):
             self,
             context: Context | None,
     ) -> t.Iterable[dict]:
-        API_ID = self.config.get('api_id')  # Ваш API ID
-        API_HASH = self.config.get('api_hash')  # Ваш API Hash
-        SESSION = self.config.get('session_key')  # Сессия ПОЛЬЗОВАТЕЛЯ, АДМИНА КАНАЛА
-        CHANNEL = self.config.get('channel')
+        CHANNEL = self.get_channel(context)
 
-        with Client(name="my_account", api_id=API_ID, api_hash=API_HASH, session_string=SESSION) as app:
+        with self.open_client(context) as app:
             ch = self.as_input(app, CHANNEL)
 
             # 1️⃣ Получаем stats и token
@@ -268,26 +338,29 @@ class GroupMuteStatStream(TelegramStream):
                 # print(data["names"])
                 cols = {c[0]: c[1:] for c in data["columns"]}  # 'x', 'y0', 'y1'
                 df = pd.DataFrame(cols)
-                df["x"] = pd.to_datetime(df["x"], unit="ms")
-                df["date"] = df["x"].astype(str)
+                df = self.with_zoomed(app, fg, df, context)  # почасовые точки последних дней
+                df = self.format_points(df, column="date")
                 df['channel'] = CHANNEL[1:]
                 df.rename(columns=data["names"], inplace=True)
+                df = self.since_bookmark(df, context)  # только новые дни + окно пересчёта
                 yield from extract_jsonpath(self.records_jsonpath, input=df.to_dict(orient='records'))
             except Exception:
-                df = pd.DataFrame()
-                yield from extract_jsonpath(self.records_jsonpath, input=df.to_dict(orient='records'))
+                self.load_failed(context)
 
 
 class GroupViewsSourcesStream(TelegramStream):
     """Define custom stream."""
     records_jsonpath = "$[*]"
     name = "group_sources_views_stat"
-    primary_keys: t.ClassVar[list[str]] = ["date", "channel"]
+    primary_keys: t.ClassVar[list[str]] = ["date", "channel", "granularity", "period_start"]
     replication_key = "date"
+    sync_interval = dt.timedelta(hours=23)  # графики статистики обновляются раз в сутки
 
     schema = th.PropertiesList(
         th.Property("date", th.DateType),
         th.Property("channel", th.StringType),
+        th.Property("granularity", th.StringType),
+        th.Property("period_start", th.DateTimeType, description="Start of the day or hour the point covers"),
         th.Property("ads", th.IntegerType),
         th.Property("link", th.IntegerType),
         th.Property("similar_channels", th.IntegerType),
@@ -325,12 +398,9 @@ class GroupViewsSourcesStream(TelegramStream):
             self,
             context: Context | None,
     ) -> t.Iterable[dict]:
-        API_ID = self.config.get('api_id')  # Ваш API ID
-        API_HASH = self.config.get('api_hash')  # Ваш API Hash
-        SESSION = self.config.get('session_key')  # Сессия ПОЛЬЗОВАТЕЛЯ, АДМИНА КАНАЛА
-        CHANNEL = self.config.get('channel')
+        CHANNEL = self.get_channel(context)
 
-        with Client(name="my_account", api_id=API_ID, api_hash=API_HASH, session_string=SESSION) as app:
+        with self.open_client(context) as app:
             ch = self.as_input(app, CHANNEL)
 
             # 1️⃣ Получаем stats и token
@@ -360,30 +430,33 @@ class GroupViewsSourcesStream(TelegramStream):
                 # print(data["names"])
                 cols = {c[0]: c[1:] for c in data["columns"]}  # 'x', 'y0', 'y1'
                 df = pd.DataFrame(cols)
-                df["x"] = pd.to_datetime(df["x"], unit="ms")
-                df["x"] = df["x"].astype(str)
+                df = self.with_zoomed(app, graph, df, context)  # почасовые точки последних дней
+                df = self.format_points(df)
                 df['channel'] = CHANNEL[1:]
                 df.rename(columns=data["names"], inplace=True)
                 df.rename(columns={'x': 'date', 'Ads': 'ads', 'URL': 'link', 'Similar Channels': 'similar_channels',
                                    'Channels': 'channels', 'PM': 'pm', 'Search': 'search', 'Groups': 'groups',
                                    'Followers': 'followers', 'Other': 'other'}, inplace=True)
 
+                df = self.since_bookmark(df, context)  # только новые дни + окно пересчёта
                 yield from extract_jsonpath(self.records_jsonpath, input=df.to_dict(orient='records'))
             except Exception:
-                df = pd.DataFrame()
-                yield from extract_jsonpath(self.records_jsonpath, input=df.to_dict(orient='records'))
+                self.load_failed(context)
 
 
 class GroupLanguagesStream(TelegramStream):
     """Define custom stream."""
     records_jsonpath = "$[*]"
     name = "group_languages_stat"
-    primary_keys: t.ClassVar[list[str]] = ["date", "channel"]
+    primary_keys: t.ClassVar[list[str]] = ["date", "channel", "granularity", "period_start"]
     replication_key = "date"
+    sync_interval = dt.timedelta(hours=23)  # графики статистики обновляются раз в сутки
 
     schema = th.PropertiesList(
         th.Property("date", th.DateType),
         th.Property("channel", th.StringType),
+        th.Property("granularity", th.StringType),
+        th.Property("period_start", th.DateTimeType, description="Start of the day or hour the point covers"),
         th.Property("Russian", th.IntegerType),
         th.Property("Ukrainian", th.IntegerType),
         th.Property("English", th.IntegerType),
@@ -421,12 +494,9 @@ class GroupLanguagesStream(TelegramStream):
             self,
             context: Context | None,
     ) -> t.Iterable[dict]:
-        API_ID = self.config.get('api_id')  # Ваш API ID
-        API_HASH = self.config.get('api_hash')  # Ваш API Hash
-        SESSION = self.config.get('session_key')  # Сессия ПОЛЬЗОВАТЕЛЯ, АДМИНА КАНАЛА
-        CHANNEL = self.config.get('channel')
+        CHANNEL = self.get_channel(context)
 
-        with Client(name="my_account", api_id=API_ID, api_hash=API_HASH, session_string=SESSION) as app:
+        with self.open_client(context) as app:
             ch = self.as_input(app, CHANNEL)
 
             # 1️⃣ Получаем stats и token
@@ -456,27 +526,30 @@ class GroupLanguagesStream(TelegramStream):
                 # print(data["names"])
                 cols = {c[0]: c[1:] for c in data["columns"]}  # 'x', 'y0', 'y1'
                 df = pd.DataFrame(cols)
-                df["x"] = pd.to_datetime(df["x"], unit="ms")
-                df["x"] = df["x"].astype(str)
+                df = self.with_zoomed(app, graph, df, context)  # почасовые точки последних дней
+                df = self.format_points(df)
                 df['channel'] = CHANNEL[1:]
                 df.rename(columns=data["names"], inplace=True)
                 df.rename(columns={'x': 'date'}, inplace=True)
+                df = self.since_bookmark(df, context)  # только новые дни + окно пересчёта
                 yield from extract_jsonpath(self.records_jsonpath, input=df.to_dict(orient='records'))
             except Exception:
-                df = pd.DataFrame()
-                yield from extract_jsonpath(self.records_jsonpath, input=df.to_dict(orient='records'))
+                self.load_failed(context)
 
 
 class GroupFollowersStream(TelegramStream):
     """Define custom stream."""
     records_jsonpath = "$[*]"
     name = "group_followers_stat"
-    primary_keys: t.ClassVar[list[str]] = ["date", "channel"]
+    primary_keys: t.ClassVar[list[str]] = ["date", "channel", "granularity", "period_start"]
     replication_key = "date"
+    sync_interval = dt.timedelta(hours=23)  # графики статистики обновляются раз в сутки
 
     schema = th.PropertiesList(
         th.Property("date", th.DateType),
         th.Property("channel", th.StringType),
+        th.Property("granularity", th.StringType),
+        th.Property("period_start", th.DateTimeType, description="Start of the day or hour the point covers"),
         th.Property("Joined", th.IntegerType),
         th.Property("Left", th.IntegerType)
     ).to_dict()
@@ -507,12 +580,9 @@ class GroupFollowersStream(TelegramStream):
             self,
             context: Context | None,
     ) -> t.Iterable[dict]:
-        API_ID = self.config.get('api_id')  # Ваш API ID
-        API_HASH = self.config.get('api_hash')  # Ваш API Hash
-        SESSION = self.config.get('session_key')  # Сессия ПОЛЬЗОВАТЕЛЯ, АДМИНА КАНАЛА
-        CHANNEL = self.config.get('channel')
+        CHANNEL = self.get_channel(context)
 
-        with Client(name="my_account", api_id=API_ID, api_hash=API_HASH, session_string=SESSION) as app:
+        with self.open_client(context) as app:
             ch = self.as_input(app, CHANNEL)
 
             # 1️⃣ Получаем stats и token
@@ -525,28 +595,31 @@ class GroupFollowersStream(TelegramStream):
                 # print(data["names"])
                 cols = {c[0]: c[1:] for c in data["columns"]}  # 'x', 'y0', 'y1'
                 df = pd.DataFrame(cols)
-                df["x"] = pd.to_datetime(df["x"], unit="ms")
-                df["x"] = df["x"].astype(str)
+                df = self.with_zoomed(app, fg, df, context)  # почасовые точки последних дней
+                df = self.format_points(df)
                 df['channel'] = CHANNEL[1:]
                 df.rename(columns=data["names"], inplace=True)
                 df.rename(columns={'x': 'date'}, inplace=True)
 
+                df = self.since_bookmark(df, context)  # только новые дни + окно пересчёта
                 yield from extract_jsonpath(self.records_jsonpath, input=df.to_dict(orient='records'))
             except Exception:
-                df = pd.DataFrame()
-                yield from extract_jsonpath(self.records_jsonpath, input=df.to_dict(orient='records'))
+                self.load_failed(context)
 
 
 class GroupFollowersTotalStream(TelegramStream):
     """Define custom stream."""
     records_jsonpath = "$[*]"
     name = "group_followers_total_stat"
-    primary_keys: t.ClassVar[list[str]] = ["date", "channel"]
+    primary_keys: t.ClassVar[list[str]] = ["date", "channel", "granularity", "period_start"]
     replication_key = "date"
+    sync_interval = dt.timedelta(hours=23)  # графики статистики обновляются раз в сутки
 
     schema = th.PropertiesList(
         th.Property("date", th.DateType),
         th.Property("channel", th.StringType),
+        th.Property("granularity", th.StringType),
+        th.Property("period_start", th.DateTimeType, description="Start of the day or hour the point covers"),
         th.Property("Total", th.IntegerType),
     ).to_dict()
 
@@ -576,12 +649,9 @@ class GroupFollowersTotalStream(TelegramStream):
             self,
             context: Context | None,
     ) -> t.Iterable[dict]:
-        API_ID = self.config.get('api_id')  # Ваш API ID
-        API_HASH = self.config.get('api_hash')  # Ваш API Hash
-        SESSION = self.config.get('session_key')  # Сессия ПОЛЬЗОВАТЕЛЯ, АДМИНА КАНАЛА
-        CHANNEL = self.config.get('channel')
+        CHANNEL = self.get_channel(context)
 
-        with Client(name="my_account", api_id=API_ID, api_hash=API_HASH, session_string=SESSION) as app:
+        with self.open_client(context) as app:
             ch = self.as_input(app, CHANNEL)
 
             # 1️⃣ Получаем stats и token
@@ -594,28 +664,31 @@ class GroupFollowersTotalStream(TelegramStream):
                 # print(data["names"])
                 cols = {c[0]: c[1:] for c in data["columns"]}  # 'x', 'y0', 'y1'
                 df = pd.DataFrame(cols)
-                df["x"] = pd.to_datetime(df["x"], unit="ms")
-                df["x"] = df["x"].astype(str)
+                df = self.with_zoomed(app, fg, df, context)  # почасовые точки последних дней
+                df = self.format_points(df)
                 df['channel'] = CHANNEL[1:]
                 df.rename(columns={'y0': 'Total'}, inplace=True)
                 df.rename(columns={'x': 'date'}, inplace=True)
 
+                df = self.since_bookmark(df, context)  # только новые дни + окно пересчёта
                 yield from extract_jsonpath(self.records_jsonpath, input=df.to_dict(orient='records'))
             except Exception:
-                df = pd.DataFrame()
-                yield from extract_jsonpath(self.records_jsonpath, input=df.to_dict(orient='records'))
+                self.load_failed(context)
 
 
 class GroupInteractionsStream(TelegramStream):
     """Define custom stream."""
     records_jsonpath = "$[*]"
     name = "group_interactions_stat"
-    primary_keys: t.ClassVar[list[str]] = ["date", "channel"]
+    primary_keys: t.ClassVar[list[str]] = ["date", "channel", "granularity", "period_start"]
     replication_key = "date"
+    sync_interval = dt.timedelta(hours=23)  # графики статистики обновляются раз в сутки
 
     schema = th.PropertiesList(
         th.Property("date", th.DateType),
         th.Property("channel", th.StringType),
+        th.Property("granularity", th.StringType),
+        th.Property("period_start", th.DateTimeType, description="Start of the day or hour the point covers"),
         th.Property("Views", th.IntegerType),
         th.Property("Shares", th.IntegerType),
     ).to_dict()
@@ -646,12 +719,9 @@ class GroupInteractionsStream(TelegramStream):
             self,
             context: Context | None,
     ) -> t.Iterable[dict]:
-        API_ID = self.config.get('api_id')  # Ваш API ID
-        API_HASH = self.config.get('api_hash')  # Ваш API Hash
-        SESSION = self.config.get('session_key')  # Сессия ПОЛЬЗОВАТЕЛЯ, АДМИНА КАНАЛА
-        CHANNEL = self.config.get('channel')
+        CHANNEL = self.get_channel(context)
 
-        with Client(name="my_account", api_id=API_ID, api_hash=API_HASH, session_string=SESSION) as app:
+        with self.open_client(context) as app:
             ch = self.as_input(app, CHANNEL)
             # 1️⃣ Получаем stats и token
             stats = self.fetch_stats(app, ch)
@@ -679,27 +749,30 @@ class GroupInteractionsStream(TelegramStream):
                 # print(data["names"])
                 cols = {c[0]: c[1:] for c in data["columns"]}  # 'x', 'y0', 'y1'
                 df = pd.DataFrame(cols)
-                df["x"] = pd.to_datetime(df["x"], unit="ms")
-                df["x"] = df["x"].astype(str)
+                df = self.with_zoomed(app, graph, df, context)  # почасовые точки последних дней
+                df = self.format_points(df)
                 df['channel'] = CHANNEL[1:]
                 df.rename(columns=data["names"], inplace=True)
                 df.rename(columns={'x': 'date'}, inplace=True)
+                df = self.since_bookmark(df, context)  # только новые дни + окно пересчёта
                 yield from extract_jsonpath(self.records_jsonpath, input=df.to_dict(orient='records'))
             except Exception:
-                df = pd.DataFrame()
-                yield from extract_jsonpath(self.records_jsonpath, input=df.to_dict(orient='records'))
+                self.load_failed(context)
 
 
 class GroupStoryInteractionsStream(TelegramStream):
     """Define custom stream."""
     records_jsonpath = "$[*]"
     name = "group_story_interactions_stat"
-    primary_keys: t.ClassVar[list[str]] = ["date", "channel"]
+    primary_keys: t.ClassVar[list[str]] = ["date", "channel", "granularity", "period_start"]
     replication_key = "date"
+    sync_interval = dt.timedelta(hours=23)  # графики статистики обновляются раз в сутки
 
     schema = th.PropertiesList(
         th.Property("date", th.DateType),
         th.Property("channel", th.StringType),
+        th.Property("granularity", th.StringType),
+        th.Property("period_start", th.DateTimeType, description="Start of the day or hour the point covers"),
         th.Property("Views", th.IntegerType),
         th.Property("Shares", th.IntegerType),
     ).to_dict()
@@ -730,13 +803,10 @@ class GroupStoryInteractionsStream(TelegramStream):
             self,
             context: Context | None,
     ) -> t.Iterable[dict]:
-        API_ID = self.config.get('api_id')  # Ваш API ID
-        API_HASH = self.config.get('api_hash')  # Ваш API Hash
-        SESSION = self.config.get('session_key')  # Сессия ПОЛЬЗОВАТЕЛЯ, АДМИНА КАНАЛА
-        CHANNEL = self.config.get('channel')
+        CHANNEL = self.get_channel(context)
         df = pd.DataFrame()
 
-        with Client(name="my_account", api_id=API_ID, api_hash=API_HASH, session_string=SESSION) as app:
+        with self.open_client(context) as app:
             ch = self.as_input(app, CHANNEL)
 
             # 1️⃣ Получаем stats и token
@@ -765,17 +835,17 @@ class GroupStoryInteractionsStream(TelegramStream):
                     # print(data["names"])
                     cols = {c[0]: c[1:] for c in data["columns"]}  # 'x', 'y0', 'y1'
                     df = pd.DataFrame(cols)
-                    df["x"] = pd.to_datetime(df["x"], unit="ms")
-                    df["x"] = df["x"].astype(str)
+                    df = self.with_zoomed(app, graph, df, context)  # почасовые точки последних дней
+                    df = self.format_points(df)
                     df['channel'] = CHANNEL[1:]
                     df.rename(columns=data["names"], inplace=True)
                     df.rename(columns={'x': 'date'}, inplace=True)
                 except AttributeError as e:
                     pass
+                df = self.since_bookmark(df, context)  # только новые дни + окно пересчёта
                 yield from extract_jsonpath(self.records_jsonpath, input=df.to_dict(orient='records'))
             except Exception:
-                df = pd.DataFrame()
-                yield from extract_jsonpath(self.records_jsonpath, input=df.to_dict(orient='records'))
+                self.load_failed(context)
 
 
 class PostsStream(TelegramStream):
@@ -794,44 +864,489 @@ class PostsStream(TelegramStream):
         th.Property("forwards", th.IntegerType),
         th.Property("reactions", th.StringType),
         th.Property("link", th.StringType),
+        th.Property("_sdc_deleted_at", th.DateTimeType),
+    ).to_dict()
+
+    @cached_property
+    def thumb_cache(self) -> ThumbCache | None:
+        """Thumbnail cache, when ``media_thumbs`` is on and ``post_media`` is selected."""
+        if not self.config.get("media_thumbs"):
+            return None
+        if not any(child.name == "post_media" and child.selected for child in self.child_streams):
+            return None
+        return ThumbCache(self.config.get("media_thumbs_dir") or ".tap-telegram-thumbs")
+
+    def thumb_jobs(self, app: Client, messages: t.Iterable[types.Message]) -> list[t.Callable[[], t.Awaitable]]:
+        cache = self.thumb_cache
+        if cache is None:
+            return []
+        jobs = []
+        for m in messages:
+            media = media_row(m)
+            if media and media[1] is not None and not cache.get(media[0]["media_id"]):
+                jobs.append(lambda row=media[0], thumb=media[1]: athumb_hash(app, cache, row["media_id"], thumb))
+        return jobs
+
+    def prefetch_thumbs(self, app: Client, messages: t.Iterable[types.Message]) -> None:
+        """Hash the thumbnails of a page of posts concurrently into the thumbnail cache."""
+        jobs = self.thumb_jobs(app, messages)
+        if jobs:
+            run_concurrently(jobs, self.config.get("media_thumbs_concurrency", 4))
+
+    async def aprefetch_thumbs(self, app: Client, messages: t.Iterable[types.Message]) -> None:
+        """Async counterpart of :meth:`prefetch_thumbs`, for backfill shards."""
+        jobs = self.thumb_jobs(app, messages)
+        if jobs:
+            await gather_limited(jobs, self.config.get("media_thumbs_concurrency", 4))
+
+    def fetch_changes(self, app: Client, peer, pts: int, channel: str) -> tuple[list[tuple], int | None]:
+        """Collect posts created, edited and deleted since ``pts``.
+
+        Returns:
+            ``(record, message)`` pairs and the new pts, or None for the pts when the
+            gap is too long and the history has to be scanned instead.
+        """
+        deleted_at = to_iso(dt.datetime.now(tz=dt.timezone.utc))
+        posts = []
+        for diff in iter_channel_difference(app, input_channel(peer), pts):
+            if isinstance(diff, types.updates.ChannelDifferenceTooLong):
+                return [], None
+            if isinstance(diff, types.updates.ChannelDifference):
+                posts.extend((post_record(m, channel), m) for m in diff.new_messages if isinstance(m, types.Message))
+                for u in diff.other_updates:
+                    if isinstance(u, types.UpdateEditChannelMessage) and isinstance(u.message, types.Message):
+                        posts.append((post_record(u.message, channel), u.message))
+                    elif isinstance(u, types.UpdateDeleteChannelMessages):
+                        posts.extend((deleted_post_record(i, channel, deleted_at), None) for i in u.messages)
+            pts = diff.pts
+        self.prefetch_thumbs(app, (m for _, m in posts if m is not None))
+        return posts, pts
+
+    def scan_history(self, app: Client, peer, channel: str, state: dict, limit: int) -> t.Iterator[tuple]:
+        # pts фиксируем до сканирования: всё, что изменится во время скана, догоним в следующий раз
+        full = invoke(app, functions.channels.GetFullChannel(channel=input_channel(peer)))
+        # 1️⃣ берём N последних сообщений (сырые страницы GetHistory)
+        for page in iter_history(app, peer, limit=limit):
+            self.prefetch_thumbs(app, page.messages)
+            for m in page.messages:
+                yield post_record(m, channel), m
+        state["pts"] = full.full_chat.pts
+
+    def rescan_recent(self, app: Client, peer, channel: str, skip: set[int]) -> t.Iterator[tuple]:
+        """Re-read the latest ``counters_refresh_posts`` posts to refresh their counters.
+
+        ``GetChannelDifference`` reports new, edited and deleted posts only, so
+        views, forwards and reactions of older posts would otherwise keep the
+        values of their first scan. Off by default: the re-read costs the same
+        requests on every run whatever the rate of change.
+
+        Args:
+            app: Connected client.
+            peer: Resolved input peer of the channel.
+            channel: Channel name without the leading ``@``.
+            skip: Post ids already taken from the difference.
+
+        Yields:
+            ``(record, message)`` pairs of the re-read posts.
+        """
+        limit = self.config.get("counters_refresh_posts", 0)
+        if not limit:
+            return
+        for page in iter_history(app, peer, limit=limit):
+            messages = [m for m in page.messages if m.id not in skip]
+            self.prefetch_thumbs(app, messages)
+            for m in messages:
+                yield post_record(m, channel), m
+
+    def probe_deleted(self, app: Client, peer, channel: str, ids: list[int]) -> list[dict]:
+        """Check known post ids with ``channels.GetMessages`` and return soft deletes.
+
+        Args:
+            app: Connected client.
+            peer: Resolved input peer of the channel.
+            channel: Channel name without the leading ``@``.
+            ids: Post ids to check, 100 of them per request.
+
+        Returns:
+            A soft-delete record for every id the server answers with ``MessageEmpty``.
+        """
+        ch = input_channel(peer)
+        batches = [ids[i:i + 100] for i in range(0, len(ids), 100)]
+        results = run_concurrently(
+            [lambda b=b: ainvoke(app, functions.channels.GetMessages(
+                channel=ch, id=[types.InputMessageID(id=i) for i in b],
+            )) for b in batches],
+            self.config.get("backfill_concurrency", 4),
+        )
+        deleted_at = to_iso(dt.datetime.now(tz=dt.timezone.utc))
+        return [
+            deleted_post_record(m.id, channel, deleted_at)
+            for result in results if not isinstance(result, Exception)
+            for m in result.messages if isinstance(m, types.MessageEmpty)
+        ]
+
+    def iter_posts(self, app: Client, peer, CHANNEL: str, context: Context | None) -> t.Iterator[tuple]:
+        """Yield the posts of one channel: backfill, pts difference or history scan.
+
+        Yields:
+            ``(record, message)`` pairs; the raw message is None for soft deletes.
+        """
+        N_POSTS = 500
+
+        channel = CHANNEL[1:]
+        state = self.get_context_state(context)
+        scanned = False
+        if self.config.get("backfill") and not state.get("backfill", {}).get("complete"):
+            # первичная выгрузка всей истории параллельными шардами
+            async def crawl(lo, hi):
+                async for page in aiter_history(app, peer, lo, hi):
+                    await self.aprefetch_thumbs(app, page.messages)
+                    yield [(post_record(m, channel), m) for m in page.messages], page.edge
+
+            if not state.get("pts"):
+                # после backfill следующие запуски пойдут по pts-разнице с момента его начала
+                full = invoke(app, functions.channels.GetFullChannel(channel=input_channel(peer)))
+                state["pts"] = full.full_chat.pts
+            records = run_backfill(self, app, peer, context, crawl)
+        else:
+            changes, pts = [], None
+            if state.get("pts"):
+                # 1️⃣ есть pts с прошлого запуска — берём только изменения с него
+                changes, pts = self.fetch_changes(app, peer, state["pts"], channel)
+                if pts is None:
+                    self.logger.warning("Update gap too long in '%s', falling back to a history scan", channel)
+            if pts is not None:
+                # разница не приносит новые просмотры, пересылки и реакции старых постов — свежие перечитываем
+                changed = {record["post_id"] for record, _ in changes}
+                records = [*changes, *self.rescan_recent(app, peer, channel, changed)]
+                state["pts"] = pts
+            else:
+                records = self.scan_history(app, peer, channel, state, N_POSTS)
+                scanned = True
+
+        if not self.config.get("detect_deletions"):
+            yield from records
+            return
+
+        # 2️⃣ учёт известных id: удаления из pts-разницы приходят сами,
+        # после скана истории проверяем известные посты, которых скан не видел
+        seen, deleted = set(), set()
+        for record, m in records:
+            (deleted if m is None else seen).add(record["post_id"])
+            yield record, m
+        known = state.get("known_ids", [])
+        if scanned and known:
+            gone = self.probe_deleted(app, peer, channel, [i for i in iter_ids(known) if i not in seen])
+            deleted.update(r["post_id"] for r in gone)
+            yield from ((r, None) for r in gone)
+        state["known_ids"] = difference(union(known, seen), deleted)
+
+    def generate_child_contexts(self, record: dict, context: Context | None) -> t.Iterable[Context | None]:
+        # дочерние стримы синкаем только для постов, у которых есть реакции, медиа или ссылки
+        if context and (context.get("reactions") or context.get("media") or context.get("links")):
+            yield context
+
+    def refresh_reactions(self, app: Client, peer, CHANNEL: str, context: Context | None,
+                          skip: set[int]) -> None:
+        """Re-read reactions of recent posts with ``messages.GetMessagesReactions``.
+
+        The last ``reactions_refresh_window`` post ids up to the newest one seen
+        are asked 100 at a time; posts already emitted in this run are skipped.
+        Each answered batch is synced into ``post_reactions`` with one public
+        ``Stream.sync`` call, so only reaction rows are written and the posts
+        with their media and links are not re-emitted.
+        """
+        window = self.config.get("reactions_refresh_window", 0)
+        child = next((c for c in self.child_streams if isinstance(c, PostReactionsStream)), None)
+        if not window or child is None or not child.selected:
+            return
+        top = max(skip, default=self.get_starting_replication_key_value(context) or 0)
+        ids = [i for i in range(max(1, top - window + 1), top + 1) if i not in skip]
+        batches = [ids[i:i + 100] for i in range(0, len(ids), 100)]
+        results = run_concurrently(
+            [lambda b=b: ainvoke(app, functions.messages.GetMessagesReactions(peer=peer, id=b))
+             for b in batches],
+            self.config.get("backfill_concurrency", 4),
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                self.logger.warning("Reactions refresh of %s failed: %s", CHANNEL, result)
+                continue
+            # ответ — Updates с UpdateMessageReactions на каждый пост, у которого реакции есть
+            posts = [
+                {"post_id": u.msg_id, "reactions": reactions_list(u.reactions)}
+                for u in result.updates if isinstance(u, types.UpdateMessageReactions)
+            ]
+            if posts:
+                child.sync({"channel": CHANNEL, "refreshed": posts})
+
+    def get_records(
+            self,
+            context: Context | None,
+    ) -> t.Iterable[tuple[dict, dict | None]]:
+        CHANNEL = self.get_channel(context)
+
+        with self.open_client(context) as app:
+            peer = app.resolve_peer(CHANNEL)
+            seen = set()
+            cache = self.thumb_cache
+            for record, m in self.iter_posts(app, peer, CHANNEL, context):
+                seen.add(record["post_id"])
+                if m is None:
+                    yield record, None
+                    continue
+                # реакции, медиа и ссылки для дочерних стримов — из того же сырого сообщения, без повторных запросов
+                media = media_row(m)
+                if media:
+                    media_id = media[0]["media_id"]
+                    media = dict(media[0], thumb_hash=cache.get(media_id) if cache and media_id else None)
+                yield record, {"channel": CHANNEL, "post_id": record["post_id"],
+                               "reactions": reactions_list(m.reactions) or None, "media": media,
+                               "links": link_rows(m.message, m.entities) or None}
+            # реакции постов старше этого запуска — отдельным синком дочернего стрима, без повторной записи постов
+            self.refresh_reactions(app, peer, CHANNEL, context, seen)
+
+
+class PostReactionsStream(TelegramStream):
+    """One row per reaction of a channel post, child of ``posts``."""
+    records_jsonpath = "$[*]"
+    name = "post_reactions"
+    parent_stream_type = PostsStream
+    state_partitioning_keys: t.ClassVar[list[str]] = ["channel"]
+    primary_keys: t.ClassVar[list[str]] = ["channel", "post_id", "reaction"]
+
+    schema = th.PropertiesList(
+        th.Property("channel", th.StringType),
+        th.Property("post_id", th.IntegerType),
+        th.Property("reaction", th.StringType),
+        th.Property("type", th.StringType),
+        th.Property("emoji", th.StringType),
+        th.Property("custom_emoji_id", th.StringType),
+        th.Property("count", th.IntegerType),
     ).to_dict()
 
     def get_records(
             self,
             context: Context | None,
     ) -> t.Iterable[dict]:
-        API_ID = self.config.get('api_id')  # Ваш API ID
-        API_HASH = self.config.get('api_hash')  # Ваш API Hash
-        SESSION = self.config.get('session_key')  # Сессия ПОЛЬЗОВАТЕЛЯ, АДМИНА КАНАЛА
-        CHANNEL = self.config.get('channel')
-        N_POSTS = 500
+        channel = self.get_channel(context)[1:]
+        # либо реакции одного поста от родителя, либо пачка из PostsStream.refresh_reactions
+        posts = context.get("refreshed") or [context]
+        for post in posts:
+            for row in post.get("reactions") or []:
+                yield {
+                    "channel": channel,
+                    "post_id": post["post_id"],
+                    "reaction": row["emoji"] or row["custom_emoji_id"] or row["type"],
+                    **row,
+                }
 
-        with Client(name="my_account", api_id=API_ID, api_hash=API_HASH, session_string=SESSION) as app:
-            # 1️⃣ берём N последних сообщений (history)
-            msgs = [m for m in app.get_chat_history(CHANNEL, limit=N_POSTS)]
 
-            rows = []
+class PostMediaStream(TelegramStream):
+    """Media metadata of a channel post, child of ``posts``; no files are downloaded."""
+    records_jsonpath = "$[*]"
+    name = "post_media"
+    parent_stream_type = PostsStream
+    state_partitioning_keys: t.ClassVar[list[str]] = ["channel"]
+    primary_keys: t.ClassVar[list[str]] = ["channel", "post_id"]
 
-            for m in msgs:
-                link = '-'
-                if m.caption_entities:
-                    for e in m.caption_entities:
-                        if str(e.type) == "MessageEntityType.TEXT_LINK":
-                            link = e.url
-                            break
-                row = {
-                    "channel": CHANNEL[1:],
-                    "post_id": m.id,
-                    "created": m.date,
-                    "text": (m.text or m.caption or ""),  # первые 100 символов
-                    "views": m.views,
-                    "forwards": m.forwards,
-                    "reactions": m.reactions,
-                    "link": link
-                }
+    schema = th.PropertiesList(
+        th.Property("channel", th.StringType),
+        th.Property("post_id", th.IntegerType),
+        th.Property("media_id", th.StringType),
+        th.Property("grouped_id", th.StringType, description="Album id shared by the posts of one album"),
+        th.Property("type", th.StringType),
+        th.Property("mime_type", th.StringType),
+        th.Property("file_name", th.StringType),
+        th.Property("size", th.IntegerType),
+        th.Property("duration", th.NumberType),
+        th.Property("width", th.IntegerType),
+        th.Property("height", th.IntegerType),
+        th.Property("thumb_hash", th.StringType),
+    ).to_dict()
 
-                rows.append(row)
-            yield from extract_jsonpath(self.records_jsonpath, input=rows)
+    def get_records(
+            self,
+            context: Context | None,
+    ) -> t.Iterable[dict]:
+        if context.get("media"):
+            yield {"channel": self.get_channel(context)[1:], "post_id": context["post_id"], **context["media"]}
+
+
+class PostLinksStream(TelegramStream):
+    """One row per link or mention in the text of a channel post, child of ``posts``."""
+    records_jsonpath = "$[*]"
+    name = "post_links"
+    parent_stream_type = PostsStream
+    state_partitioning_keys: t.ClassVar[list[str]] = ["channel"]
+    primary_keys: t.ClassVar[list[str]] = ["channel", "post_id", "position"]
+
+    schema = th.PropertiesList(
+        th.Property("channel", th.StringType),
+        th.Property("post_id", th.IntegerType),
+        th.Property("position", th.IntegerType, description="Order of the link within the post"),
+        th.Property("kind", th.StringType, description="url, text_link or mention"),
+        th.Property("text", th.StringType, description="Text the entity covers"),
+        th.Property("url", th.StringType),
+        th.Property("username", th.StringType),
+        th.Property("user_id", th.IntegerType),
+        th.Property("offset", th.IntegerType, description="Offset in UTF-16 code units"),
+        th.Property("length", th.IntegerType, description="Length in UTF-16 code units"),
+    ).to_dict()
+
+    def get_records(
+            self,
+            context: Context | None,
+    ) -> t.Iterable[dict]:
+        channel = self.get_channel(context)[1:]
+        for row in context.get("links") or []:
+            yield {"channel": channel, "post_id": context["post_id"], **row}
+
+
+class PostSearchStream(TelegramStream):
+    """Channel posts matching the configured ``post_search`` queries, filtered by Telegram."""
+    records_jsonpath = "$[*]"
+    name = "post_search"
+    primary_keys: t.ClassVar[list[str]] = ["search", "channel", "post_id"]
+
+    schema = th.PropertiesList(
+        th.Property("search", th.StringType, description="Name of the matching post_search entry"),
+        th.Property("channel", th.StringType),
+        th.Property("post_id", th.IntegerType),
+        th.Property("created", th.DateType),
+        th.Property("text", th.StringType),
+        th.Property("views", th.IntegerType),
+        th.Property("forwards", th.IntegerType),
+        th.Property("reactions", th.StringType),
+        th.Property("link", th.StringType),
+    ).to_dict()
+
+    @staticmethod
+    def to_timestamp(value: str | None, end: bool = False) -> int:
+        """Convert a configured date to a unix timestamp, 0 when unset.
+
+        With ``end`` the whole day counts: the result is the next midnight.
+        """
+        if not value:
+            return 0
+        start = dt.datetime.fromisoformat(value).replace(tzinfo=dt.timezone.utc)
+        return int((start + dt.timedelta(days=1) if end else start).timestamp())
+
+    @staticmethod
+    def search_key(search: dict) -> str:
+        """Key the cursor of a search by its name and definition, so an edited search starts over."""
+        definition = [search.get(k) for k in ("query", "filter", "min_date", "max_date")]
+        digest = hashlib.blake2b(json.dumps(definition).encode(), digest_size=8).hexdigest()
+        return f"{search['name']}:{digest}"
+
+    def get_records(
+            self,
+            context: Context | None,
+    ) -> t.Iterable[dict]:
+        CHANNEL = self.get_channel(context)
+        # ключ поиска → самый новый найденный id: следующий запуск берёт только то, что новее
+        top_ids = self.get_context_state(context).setdefault("search_top_ids", {})
+
+        with self.open_client(context) as app:
+            peer = app.resolve_peer(CHANNEL)
+            for search in self.config.get("post_search") or []:
+                name, key = search["name"], self.search_key(search)
+                top = top_ids.get(key, 0)
+                pages = iter_search(
+                    app, peer, q=search.get("query") or "", flt=search.get("filter") or "empty",
+                    min_date=self.to_timestamp(search.get("min_date")),
+                    max_date=self.to_timestamp(search.get("max_date"), end=True),  # max_date включительно
+                    min_id=top,
+                )
+                newest = top
+                for page in pages:
+                    for m in page.messages:
+                        newest = max(newest, m.id)
+                        yield {"search": name, **post_record(m, CHANNEL[1:])}
+                    self.checkpoint(context, None, len(page.messages))
+                # выдача идёт от новых к старым, поэтому границу сдвигаем только после полного прохода
+                top_ids[key] = newest
+
+
+class PublicForwardsStream(TelegramStream):
+    """Public forwards of recent channel posts: who reposted what."""
+    records_jsonpath = "$[*]"
+    name = "post_public_forwards"
+    primary_keys: t.ClassVar[list[str]] = ["channel", "post_id", "kind", "source_id", "forward_id"]
+
+    schema = th.PropertiesList(
+        th.Property("channel", th.StringType),
+        th.Property("post_id", th.IntegerType),
+        th.Property("kind", th.StringType, description="message or story"),
+        th.Property("source_id", th.IntegerType, description="Id of the forwarding channel or user"),
+        th.Property("source_username", th.StringType),
+        th.Property("source_title", th.StringType),
+        th.Property("forward_id", th.IntegerType, description="Id of the message or story that forwards the post"),
+        th.Property("date", th.DateTimeType),
+        th.Property("views", th.IntegerType),
+    ).to_dict()
+
+    def due_posts(self, posts: list[types.Message], cache: ForwardsCache, channel: str,
+                  now: dt.datetime) -> tuple[list[dict], list[types.Message]]:
+        """Split the posts into cached results and posts to crawl again.
+
+        A cached crawl is reused while it is younger than
+        ``public_forwards_ttl_hours`` and the post's forwards counter did not change.
+
+        Returns:
+            The cached rows, and the posts whose forwards have to be crawled.
+        """
+        ttl = dt.timedelta(hours=self.config.get("public_forwards_ttl_hours", 24))
+        rows, due = [], []
+        for m in posts:
+            if not m.forwards:
+                continue  # публичных репостов нет — не тратим дорогой запрос статистики
+            entry = cache.get(channel, m.id)
+            if entry and entry["forwards"] == m.forwards and now - dt.datetime.fromisoformat(entry["at"]) < ttl:
+                rows.extend(entry["rows"])
+                continue
+            due.append(m)
+        return rows, due
+
+    def get_records(
+            self,
+            context: Context | None,
+    ) -> t.Iterable[dict]:
+        CHANNEL = self.get_channel(context)
+        channel_name = CHANNEL[1:]
+        now = dt.datetime.now(tz=dt.timezone.utc)
+        cache = ForwardsCache(self.config.get("public_forwards_cache_dir") or ".tap-telegram-forwards")
+
+        with self.open_client(context) as app:
+            peer = app.resolve_peer(CHANNEL)
+            channel = input_channel(peer)
+            limit = self.config.get("public_forwards_posts", 100)
+            posts = [m for page in iter_history(app, peer, limit=limit) for m in page.messages]
+
+            async def crawl(post_id):
+                try:
+                    return await acollect_public_forwards(app, channel, post_id)
+                except (ChatAdminRequired, MsgIdInvalid) as e:
+                    self.logger.warning("No public forwards for post %s of '%s': %s", post_id, CHANNEL, e)
+                    return [], {}, {}
+
+            cached, due = self.due_posts(posts, cache, channel_name, now)
+            yield from cached
+            results = run_concurrently([lambda m=m: crawl(m.id) for m in due],
+                                       self.config.get("public_forwards_concurrency", 4))
+            for m, result in zip(due, results):
+                if isinstance(result, Exception):
+                    # в кеш не пишем — пост перечитается в следующий запуск
+                    self.logger.warning("Public forwards of post %s of '%s' failed: %s", m.id, CHANNEL, result)
+                    continue
+                forwards, chats, users = result
+                rows = [r for r in (forward_row(f, chats, users, channel_name, m.id) for f in forwards) if r]
+                yield from rows
+                cache.put(channel_name, m.id, {"at": to_iso(now), "forwards": m.forwards, "rows": rows})
+                self.checkpoint_progress(len(rows))
+
+        # кеш держим только для постов из текущего окна
+        cache.prune(channel_name, {m.id for m in posts})
 
 
 class CommentsStream(TelegramStream):
@@ -853,44 +1368,67 @@ class CommentsStream(TelegramStream):
         th.Property("text", th.StringType),
     ).to_dict()
 
+    def fetch_replies(self, app: Client, peer, post_id: int) -> list[CommentRow]:
+        # сырые messages.GetReplies: без разбора в pyrogram.types.Message
+        rows = []
+        for page in iter_replies(app, peer, post_id):
+            rows.extend(comment_rows(page, post_id))
+        return rows
+
     def get_records(
             self,
             context: Context | None,
     ) -> t.Iterable[dict]:
-        API_ID = self.config.get('api_id')  # Ваш API ID
-        API_HASH = self.config.get('api_hash')  # Ваш API Hash
-        SESSION = self.config.get('session_key')  # Сессия ПОЛЬЗОВАТЕЛЯ, АДМИНА КАНАЛА
-        CHANNEL = self.config.get('channel')
+        CHANNEL = self.get_channel(context)
         N_POSTS = 500
 
-        with Client(name="my_account", api_id=API_ID, api_hash=API_HASH, session_string=SESSION) as app:
+        with self.open_client(context) as app:
+            peer = app.resolve_peer(CHANNEL)
+            channel = CHANNEL[1:]
+            if self.config.get("backfill") and not self.get_context_state(context).get("backfill", {}).get("complete"):
+                # первичная выгрузка: шарды постов обходятся параллельно, треды внутри шарда — по очереди
+                async def crawl(lo, hi):
+                    async for page in aiter_history(app, peer, lo, hi):
+                        for post in page.messages:
+                            if post.reply_to or not post.replies or not post.replies.replies:
+                                continue
+                            try:
+                                async for rp in aiter_replies(app, peer, post.id):
+                                    yield [c.as_record(channel) for c in comment_rows(rp, post.id)], None
+                            except MsgIdInvalid:
+                                continue
+                            # тред выгружен целиком — шард можно продолжать ниже поста
+                            yield [], post.id
+                        yield [], page.edge
+
+                yield from run_backfill(self, app, peer, context, crawl)
+                return
+
             # 1️⃣ берём N последних сообщений (history)
-            rows = []
-            for post in app.get_chat_history(CHANNEL, limit=N_POSTS):
-                if getattr(post, "reply_to_message_id", 0):
+            # курсор: [top, post_id] — посты из этого диапазона прерванный запуск уже выгрузил
+            resume = self.get_context_state(context).get("resume") or {}
+            top = None
+            for post in (m for page in iter_history(app, peer, limit=N_POSTS) for m in page.messages):
+                # верх — самый новый пост этого запуска: посты новее прошлого top тоже выгружаем сейчас
+                top = top or post.id
+                if resume and resume["post_id"] <= post.id <= resume["top"]:
+                    continue
+                if post.reply_to:
                     # это уже чья-то реплика, а не корневой пост
                     continue
+                if not post.replies or not post.replies.replies:
+                    # комментариев нет (или обсуждение не подключено) — не тратим запрос
+                    continue
                 try:
-                    comments = list(app.get_discussion_replies(post.chat.id, post.id))  # ← главное изменение
-                except FloodWait as fw:
-                    time.sleep(fw.value + 1)
-                    comments = list(app.get_discussion_replies(post.chat.id, post.id))  # повторяем тот же запрос
+                    comments = self.fetch_replies(app, peer, post.id)
                 except MsgIdInvalid:
                     # нет треда – пропускаем, чтобы не обрушить sync-цикл
                     continue
+                # в памяти держим только компактные CommentRow одного треда, dict собираем на выдаче
                 for c in comments:
-                    rows.append({
-                        "channel": CHANNEL[1:],
-                        "post_id": post.id,
-                        "author": c.from_user.id if c.from_user else 'anon',
-                        "text": c.text,
-                        "id": c.id,
-                        "date": c.date,
-                        "first_name": c.from_user.first_name if c.from_user and c.from_user.first_name else '-',
-                        "last_name": c.from_user.last_name if c.from_user and c.from_user.last_name else '-',
-                        "username": c.from_user.username if c.from_user and c.from_user.username else '-'
-                    })
-            yield from extract_jsonpath(self.records_jsonpath, input=rows)
+                    yield c.as_record(channel)
+                self.checkpoint(context, {"top": top, "post_id": post.id}, len(comments))
+            self.checkpoint(context, None)
 
 
 class StoryStream(TelegramStream):
@@ -917,40 +1455,84 @@ class StoryStream(TelegramStream):
         return types.InputChannel(channel_id=p.channel_id,
                                   access_hash=p.access_hash)
 
+    @staticmethod
+    def build_row(item, channel: str) -> dict:
+        """Build a stories record from a raw ``StoryItem`` using primitives only."""
+        link = '-'
+        areas = getattr(item, "media_areas", None)
+        if areas and getattr(areas[0], "url", None):
+            link = areas[0].url
+        views = getattr(item, "views", None)
+        return {
+            "channel": channel,
+            "id": item.id,
+            "created": to_iso(item.date),
+            "expire_date": to_iso(item.expire_date),
+            "link": link,  # первые 100 символов
+            "views": views.views_count if views else None,
+            "forwards": views.forwards_count if views else None,
+            "reactions": views.reactions_count if views else None,
+            "reactions_json": dumps(reactions_list(views.reactions if views else None))
+        }
+
     def get_records(
             self,
             context: Context | None,
     ) -> t.Iterable[dict]:
-        API_ID = self.config.get('api_id')  # Ваш API ID
-        API_HASH = self.config.get('api_hash')  # Ваш API Hash
-        SESSION = self.config.get('session_key')  # Сессия ПОЛЬЗОВАТЕЛЯ, АДМИНА КАНАЛА
-        CHANNEL = self.config.get('channel')
+        CHANNEL = self.get_channel(context)
 
-        with Client(name="my_account", api_id=API_ID, api_hash=API_HASH, session_string=SESSION) as app:
+        with self.open_client(context) as app:
             peer = app.resolve_peer(CHANNEL)  # PeerChannel
             stories = app.invoke(
                 functions.stories.GetPeerStories(
                     peer=peer
                 )
             )  # → stories.PeerStories
-            rows = []
-            link = '-'
-            for item in stories.stories.stories:
-                if item.media_areas and len(item.media_areas) != 0 and item.media_areas[0].url:
-                    link = item.media_areas[0].url
-                row = {
-                    "channel": CHANNEL[1:],
-                    "id": item.id,
-                    "created": dt.datetime.utcfromtimestamp(item.date),
-                    "expire_date": dt.datetime.utcfromtimestamp(item.expire_date),
-                    "link": link,  # первые 100 символов
-                    "views": item.views.views_count,
-                    "forwards": item.views.forwards_count,
-                    "reactions": item.views.reactions_count,
-                    "reactions_json": item.views.reactions
-                }
-                rows.append(row)
-        yield from extract_jsonpath(self.records_jsonpath, input=rows)
+            items = stories.stories.stories
+            rows = [self.build_row(item, CHANNEL[1:]) for item in items]
+            # реакции для дочернего стрима — из тех же StoryItem
+            reactions = {
+                item.id: reactions_list(item.views.reactions)
+                for item in items if getattr(item, "views", None)
+            }
+        for row in rows:
+            yield row, {"channel": CHANNEL, "story_id": row["id"], "reactions": reactions.get(row["id"])}
+
+    def generate_child_contexts(self, record: dict, context: Context | None) -> t.Iterable[Context | None]:
+        if context and context.get("reactions"):
+            yield context
+
+
+class StoryReactionsStream(TelegramStream):
+    """One row per reaction of a channel story, child of ``stories``."""
+    records_jsonpath = "$[*]"
+    name = "story_reactions"
+    parent_stream_type = StoryStream
+    state_partitioning_keys: t.ClassVar[list[str]] = ["channel"]
+    primary_keys: t.ClassVar[list[str]] = ["channel", "story_id", "reaction"]
+
+    schema = th.PropertiesList(
+        th.Property("channel", th.StringType),
+        th.Property("story_id", th.IntegerType),
+        th.Property("reaction", th.StringType),
+        th.Property("type", th.StringType),
+        th.Property("emoji", th.StringType),
+        th.Property("custom_emoji_id", th.StringType),
+        th.Property("count", th.IntegerType),
+    ).to_dict()
+
+    def get_records(
+            self,
+            context: Context | None,
+    ) -> t.Iterable[dict]:
+        channel = self.get_channel(context)[1:]
+        for row in context["reactions"]:
+            yield {
+                "channel": channel,
+                "story_id": context["story_id"],
+                "reaction": row["emoji"] or row["custom_emoji_id"] or row["type"],
+                **row,
+            }
 
 
 class InviteLinkStream(TelegramStream):
@@ -959,6 +1541,7 @@ class InviteLinkStream(TelegramStream):
     name = "invite_links"
     primary_keys: t.ClassVar[list[str]] = ["link"]
     replication_key = "date"
+    cdc_keys: t.ClassVar[list[str]] = ["link"]
 
     schema = th.PropertiesList(
         th.Property("channel", th.StringType),
@@ -971,6 +1554,7 @@ class InviteLinkStream(TelegramStream):
         th.Property("request_needed", th.BooleanType),
         th.Property("joined_cnt", th.IntegerType),
         th.Property("name", th.StringType),
+        th.Property("changed_at", th.DateTimeType),
     ).to_dict()
 
     def fetch_all_invites(self, app: Client, peer: types.InputPeerChannel):
@@ -1010,12 +1594,9 @@ class InviteLinkStream(TelegramStream):
             self,
             context: Context | None,
     ) -> t.Iterable[dict]:
-        API_ID = self.config.get('api_id')  # Ваш API ID
-        API_HASH = self.config.get('api_hash')  # Ваш API Hash
-        SESSION = self.config.get('session_key')  # Сессия ПОЛЬЗОВАТЕЛЯ, АДМИНА КАНАЛА
-        CHANNEL = self.config.get('channel')
+        CHANNEL = self.get_channel(context)
 
-        with Client(name="my_account", api_id=API_ID, api_hash=API_HASH, session_string=SESSION) as app:
+        with self.open_client(context) as app:
             peer = app.resolve_peer(CHANNEL)  # InputPeerChannel
             invites = self.fetch_all_invites(app, peer)
             rows = []
@@ -1024,7 +1605,7 @@ class InviteLinkStream(TelegramStream):
                     "channel": CHANNEL[1:],
                     "link": inv.link,
                     "creator_id": inv.admin_id,
-                    "created": dt.datetime.fromtimestamp(inv.date, tz=dt.timezone.utc),
+                    "created": to_iso(inv.date),
                     "date": dt.date.today().isoformat(),
                     "name": inv.title,
                     "joined_cnt": inv.usage,
@@ -1033,7 +1614,7 @@ class InviteLinkStream(TelegramStream):
                     "request_needed": inv.request_needed
                 }
                 rows.append(row)
-        yield from extract_jsonpath(self.records_jsonpath, input=rows)
+        yield from self.changed_only(extract_jsonpath(self.records_jsonpath, input=rows), context)
 
 
 class InviteLinkUsersStream(TelegramStream):
@@ -1056,45 +1637,54 @@ class InviteLinkUsersStream(TelegramStream):
         th.Property("username", th.StringType),
     ).to_dict()
 
-    def fetch_invite_importers(self, app: Client, peer, link_hash: str, limit=100):
-        # первый запрос
-        r: types.messages.ChatInviteImporters = app.invoke(
-            raw.functions.messages.GetChatInviteImporters(
-                peer=peer,
-                link=link_hash,  # только hash!
-                q="",  # пустая строка = без фильтра
-                offset_date=0,
-                offset_user=raw.types.InputUserEmpty(),
-                limit=limit
-            )
-        )
-        users = r.users
-        importers = r.importers
-        while r.count > len(importers) and len(importers) != 0:
-            if len(r.importers) < limit:
-                break
-
-            # если импортёров нет вообще, дальше тоже искать нечего
-            if not r.importers:
-                break
-            last_imp = r.importers[-1]
-            offset_date = last_imp.date
-            u = next(u for u in r.users if u.id == last_imp.user_id)
-            offset_user = raw.types.InputUser(user_id=u.id, access_hash=u.access_hash)
+    def fetch_invite_importers(self, app: Client, peer, link_hash: str, limit=100,
+                               offset: dict | None = None) -> t.Iterator[tuple[list, list, dict | None]]:
+        """Page through the importers of one invite link.
+
+        Args:
+            app: Connected client.
+            peer: Resolved input peer of the channel.
+            link_hash: The invite link.
+            limit: Page size.
+            offset: Offset of a ``next`` value yielded before, to resume from it.
+                Its user is resolved by this session; when the session does not
+                know the user, the link is read again from the start.
+
+        Yields:
+            ``(importers, users, next)`` per page, ``next`` being the offset of the
+            following page or None after the last one.
+        """
+        offset = offset or {}
+        offset_user = raw.types.InputUserEmpty()
+        if offset.get("user_id"):
+            # access_hash привязан к сессии, а ссылка после рестарта может уйти другой — в стейте его нет
+            try:
+                p = app.resolve_peer(offset["user_id"])
+                offset_user = raw.types.InputUser(user_id=p.user_id, access_hash=p.access_hash)
+            except (KeyError, AttributeError, RPCError):
+                self.logger.info("Offset user of %s is unknown to this session, reading the link again", link_hash)
+                offset = {}
+        while True:
             r: types.messages.ChatInviteImporters = app.invoke(
                 raw.functions.messages.GetChatInviteImporters(
                     peer=peer,
                     link=link_hash,  # только hash!
                     q="",  # пустая строка = без фильтра
-                    offset_date=offset_date,
+                    offset_date=offset.get("date", 0),
                     offset_user=offset_user,
                     limit=limit
                 )
             )
-            users.extend(r.users)
-            importers.extend(r.importers)
-
-        return importers, users
+            # если импортёров нет или страница неполная, дальше искать нечего
+            if not r.importers or len(r.importers) < limit:
+                yield r.importers, r.users, None
+                return
+            # пагинация: «хвост» текущей страницы
+            last_imp = r.importers[-1]
+            u = next(u for u in r.users if u.id == last_imp.user_id)
+            offset_user = raw.types.InputUser(user_id=u.id, access_hash=u.access_hash)
+            offset = {"date": last_imp.date, "user_id": u.id}
+            yield r.importers, r.users, offset
 
     def fetch_all_invites(self, app: Client, peer: types.InputPeerChannel):
         invites, offset_date, offset_link = [], 0, ""
@@ -1133,37 +1723,92 @@ class InviteLinkUsersStream(TelegramStream):
             self,
             context: Context | None,
     ) -> t.Iterable[dict]:
-        API_ID = self.config.get('api_id')  # Ваш API ID
-        API_HASH = self.config.get('api_hash')  # Ваш API Hash
-        SESSION = self.config.get('session_key')  # Сессия ПОЛЬЗОВАТЕЛЯ, АДМИНА КАНАЛА
-        CHANNEL = self.config.get('channel')
+        CHANNEL = self.get_channel(context)
 
-        with Client(name="my_account", api_id=API_ID, api_hash=API_HASH, session_string=SESSION) as app:
+        with self.open_client(context) as app:
             peer = app.resolve_peer(CHANNEL)  # InputPeerChannel
             invites = self.fetch_all_invites(app, peer)
-            rows = []
-            for idx, inv in enumerate(invites, 1):
-                importers, users = self.fetch_invite_importers(app, peer, inv.link)
-                for imp in importers:
-                    user = {}
-                    for u in users:
-                        if u.id == imp.user_id:
-                            user = u
-                            break
-                    row = {
-                        "channel": CHANNEL[1:],
-                        "link": inv.link,
-                        "user_id": imp.user_id,
-                        "date": dt.datetime.fromtimestamp(imp.date, tz=dt.timezone.utc),
-                        "name": inv.title,
-                        "requested": imp.requested,
-                        "via_chatlist": imp.via_chatlist,
-                        "first_name": user.first_name if user.first_name and user.first_name else '-',
-                        "last_name": user.last_name if user.last_name and user.last_name else '-',
-                        "username": user.username if user.username and user.username else '-'
-                    }
-                    rows.append(row)
-        yield from extract_jsonpath(self.records_jsonpath, input=rows)
+            # курсор: ссылки, выгруженные целиком, и смещение внутри текущей
+            resume = self.get_context_state(context).get("resume") or {}
+            done = list(resume.get("done", []))
+            for inv in invites:
+                if inv.link in done:
+                    continue
+                offset = resume.get("offset") if inv.link == resume.get("link") else None
+                # страницы по (date, user) могут пересекаться на границе — дубли отсекаем,
+                # держа в памяти не больше importers_memory_ids id, остальное уходит в SQLite
+                with SpillSet(self.config.get("importers_memory_ids", 200000)) as seen:
+                    pages = self.fetch_invite_importers(app, peer, inv.link, offset=offset)
+                    for importers, users, offset in pages:
+                        fresh = seen.fresh(imp.user_id for imp in importers)
+                        emitted = len(fresh)
+                        by_id = {u.id: u for u in users if u.id in fresh}
+                        for imp in importers:
+                            if imp.user_id not in fresh:
+                                continue
+                            fresh.discard(imp.user_id)
+                            user = by_id.get(imp.user_id)
+                            yield {
+                                "channel": CHANNEL[1:],
+                                "link": inv.link,
+                                "user_id": imp.user_id,
+                                "date": to_iso(imp.date),
+                                "name": inv.title,
+                                "requested": imp.requested,
+                                "via_chatlist": imp.via_chatlist,
+                                "first_name": getattr(user, "first_name", None) or '-',
+                                "last_name": getattr(user, "last_name", None) or '-',
+                                "username": getattr(user, "username", None) or '-'
+                            }
+                        # каждая страница учитывается в state_every_records ровно один раз, последняя закрывает ссылку
+                        cursor = ({"done": [*done, inv.link]} if offset is None
+                                  else {"done": done, "link": inv.link, "offset": offset})
+                        self.checkpoint(context, cursor, emitted)
+                done.append(inv.link)
+            self.checkpoint(context, None)
+
+
+class ParticipantsStream(TelegramStream):
+    """Define custom stream."""
+    records_jsonpath = "$[*]"
+    name = "participants"
+    primary_keys: t.ClassVar[list[str]] = ["channel", "user_id"]
+
+    schema = th.PropertiesList(
+        th.Property("channel", th.StringType),
+        th.Property("user_id", th.IntegerType),
+        th.Property("role", th.StringType),
+        th.Property("joined_at", th.DateTimeType),
+        th.Property("first_name", th.StringType),
+        th.Property("last_name", th.StringType),
+        th.Property("username", th.StringType),
+        th.Property("_sdc_deleted_at", th.DateTimeType),
+    ).to_dict()
+
+    def get_records(
+            self,
+            context: Context | None,
+    ) -> t.Iterable[dict]:
+        CHANNEL = self.get_channel(context)
+
+        with self.open_client(context) as app:
+            channel = input_channel(app.resolve_peer(CHANNEL))
+            state = self.get_context_state(context)
+            now = dt.datetime.now(tz=dt.timezone.utc)
+            crawled_at = state.get("roster_crawled_at")
+            max_age = dt.timedelta(days=self.config.get("participants_full_refresh_days", 1))
+
+            if crawled_at and now - dt.datetime.fromisoformat(crawled_at) < max_age:
+                # 1️⃣ свежий полный обход есть — догоняем вступления и выходы по журналу администратора
+                rows, state["admin_log_id"] = roster_changes(app, channel, CHANNEL[1:], state.get("admin_log_id", 0))
+                yield from rows
+                return
+
+            # 2️⃣ полный обход; id последнего события журнала берём до него, чтобы ничего не пропустить
+            _, state["admin_log_id"] = roster_changes(app, channel, CHANNEL[1:], state.get("admin_log_id", 0))
+            yield from crawl_roster(app, channel, CHANNEL[1:], self.config.get("participants_concurrency", 4),
+                                    self.logger, self.config.get("participants_memory_ids", 200000))
+            state["roster_crawled_at"] = to_iso(now)
 
 
 class EventsLogStream(TelegramStream):
@@ -1182,32 +1827,23 @@ class EventsLogStream(TelegramStream):
         th.Property("invite_link", th.StringType),
         th.Property("invite_link_title", th.StringType),
         th.Property("invite_admin_id", th.StringType),
+        th.Property("target_user_id", th.IntegerType),
+        th.Property("message_id", th.IntegerType),
+        th.Property("prev_value", th.StringType),
+        th.Property("new_value", th.StringType),
     ).to_dict()
 
     def get_records(
             self,
             context: Context | None,
     ) -> t.Iterable[dict]:
-        API_ID = self.config.get('api_id')  # Ваш API ID
-        API_HASH = self.config.get('api_hash')  # Ваш API Hash
-        SESSION = self.config.get('session_key')  # Сессия ПОЛЬЗОВАТЕЛЯ, АДМИНА КАНАЛА
-        CHANNEL = self.config.get('channel')
+        CHANNEL = self.get_channel(context)
 
-        with Client(name="my_account", api_id=API_ID, api_hash=API_HASH, session_string=SESSION) as app:
+        with self.open_client(context) as app:
             peer = app.resolve_peer(CHANNEL)  # InputPeerChannel
-            # --- 1. резолвим peer в InputPeer ---
-
-            ev_filter = types.ChannelAdminLogEventsFilter(
-                join=True,
-                leave=True,
-                invite=True,
-                ban=True,
-                unban=True,
-                kick=True,
-                unkick=True
-            )
+            # один постраничный обход журнала по всем настроенным типам событий
+            ev_filter = events_filter(self.config.get("events_filter"))
             max_id = 0
-            record = []
             while True:
                 result = app.invoke(
                     functions.channels.GetAdminLog(
@@ -1222,32 +1858,5 @@ class EventsLogStream(TelegramStream):
                 if not result.events:
                     break
                 for ev in result.events:
-                    link = None
-                    title = None
-                    admin_id = None
-                    if isinstance(ev.action, types.ChannelAdminLogEventActionParticipantJoinByInvite):
-                        type_event = 'join_by_invite'
-                        if ev.action.invite and ev.action.invite.link:
-                            link = ev.action.invite.link
-                        if ev.action.invite and ev.action.invite.title:
-                            title = ev.action.invite.title
-                        if ev.action.invite and ev.action.invite.admin_id:
-                            admin_id = ev.action.invite.admin_id
-                    if isinstance(ev.action, types.ChannelAdminLogEventActionParticipantLeave):
-                        type_event = 'leave'
-                    if isinstance(ev.action, types.ChannelAdminLogEventActionParticipantJoin):
-                        type_event = 'join'
-                    if isinstance(ev.action, types.ChannelAdminLogEventActionParticipantInvite):
-                        type_event = 'invite'
-                    record.append({
-                        "channel": CHANNEL[1:],
-                        "event_id": ev.id,
-                        "event_type": type_event,
-                        "user_id": ev.user_id,
-                        "date": dt.datetime.fromtimestamp(ev.date, tz=dt.timezone.utc),
-                        "invite_link": link,
-                        "invite_link_title": title,
-                        "invite_admin_id": admin_id
-                    })
-                max_id = result.events[-1].id
-        yield from extract_jsonpath(self.records_jsonpath, input=record)
+                    yield event_record(ev, CHANNEL[1:])
+                max_id = result.events[-1].id
\ No newline at end of file
@@ -2,17 +2,32 @@
 
 from __future__ import annotations
 
+import copy
+import datetime as dt
+import threading
+from functools import cached_property
+
 from singer_sdk import Tap
+from singer_sdk.exceptions import ConfigValidationError
+from singer_sdk.singerlib import StateMessage
 from singer_sdk import typing as th  # JSON schema typing helpers
 
 # TODO: Import your custom stream types here:
 from tap_telegram import streams
+from tap_telegram.adminlog import DEFAULT_EVENTS_FILTER, EVENTS_FILTER_FLAGS
+from tap_telegram.coordinator import run_coordinator
+from tap_telegram.history import SEARCH_FILTERS
+from tap_telegram.listener import UpdateListener
+from tap_telegram.pool import SessionPool
+from tap_telegram.runtime import run_streams
+from tap_telegram.serialization import MessageWriter
 
 
 class Taptelegram(Tap):
     """Telegram tap class."""
 
     name = "tap-telegram"
+    message_writer_class = MessageWriter
 
     # TODO: Update this section with the actual config values you expect:
     config_jsonschema = th.PropertiesList(
@@ -30,18 +45,330 @@ class Taptelegram(Tap):
         ),
         th.Property(
             "session_key",
-            th.StringType(nullable=False),
-            required=True,
+            th.StringType,
+            secret=True,
+            description="Session string of a channel admin; required unless 'session_keys' is set",
+        ),
+        th.Property(
+            "session_keys",
+            th.ArrayType(th.StringType),
             secret=True,
+            description="Session strings of several channel admins; requests are routed across them",
+        ),
+        th.Property(
+            "session_rate_limit",
+            th.NumberType,
+            default=10,
+            description="Requests per second allowed for each admin session",
         ),
         th.Property(
             "channel",
             th.StringType(nullable=False),
-            required=True,
             secret=True,
         ),
+        th.Property(
+            "channels",
+            th.ArrayType(th.StringType),
+            description="Channels to sync, one stream partition per channel; overrides 'channel'",
+        ),
+        th.Property(
+            "workers",
+            th.IntegerType,
+            default=1,
+            description="Number of worker processes the 'channels' list is sharded across",
+        ),
+        th.Property(
+            "backfill",
+            th.BooleanType,
+            default=False,
+            description="Crawl the whole history of posts and comments in parallel id shards",
+        ),
+        th.Property(
+            "backfill_start_date",
+            th.DateType,
+            description="Oldest post date to backfill, the whole history if not set",
+        ),
+        th.Property(
+            "backfill_shards",
+            th.IntegerType,
+            default=8,
+            description="Number of id shards the backfilled history is split into",
+        ),
+        th.Property(
+            "backfill_concurrency",
+            th.IntegerType,
+            default=4,
+            description="Maximum number of shards crawled at the same time",
+        ),
+        th.Property(
+            "stats_restatement_days",
+            th.IntegerType,
+            default=3,
+            description="Days before the bookmark re-emitted by stats graph streams",
+        ),
+        th.Property(
+            "cdc",
+            th.BooleanType,
+            default=False,
+            description="Emit group, invite link and notification snapshots only when they change",
+        ),
+        th.Property(
+            "cdc_changed_at",
+            th.BooleanType,
+            default=False,
+            description="Fill the 'changed_at' column of rows emitted in CDC mode",
+        ),
+        th.Property(
+            "stats_zoom_days",
+            th.IntegerType,
+            default=0,
+            description="Load hourly (zoomed) stats graph points for this many recent days, 0 to disable",
+        ),
+        th.Property(
+            "stats_zoom_concurrency",
+            th.IntegerType,
+            default=4,
+            description="Maximum number of zoomed graph days loaded at the same time",
+        ),
+        th.Property(
+            "detect_deletions",
+            th.BooleanType,
+            default=False,
+            description="Track known post ids and emit soft deletes for posts removed from the channel",
+        ),
+        th.Property(
+            "counters_refresh_posts",
+            th.IntegerType,
+            default=0,
+            description="Re-read views, forwards and reactions of this many most recent posts "
+                        "when only the pts difference is fetched, 0 (default) to disable",
+        ),
+        th.Property(
+            "reactions_refresh_window",
+            th.IntegerType,
+            default=0,
+            description="Re-read reactions of this many most recent posts on every run, 0 to disable",
+        ),
+        th.Property(
+            "participants_concurrency",
+            th.IntegerType,
+            default=4,
+            description="Maximum number of participant search prefixes crawled at the same time",
+        ),
+        th.Property(
+            "participants_full_refresh_days",
+            th.IntegerType,
+            default=1,
+            description="Re-crawl the whole roster after this many days; in between only "
+                        "admin log joins and leaves are read (the log keeps 48 hours)",
+        ),
+        th.Property(
+            "events_filter",
+            th.ArrayType(th.StringType(allowed_values=EVENTS_FILTER_FLAGS)),
+            default=DEFAULT_EVENTS_FILTER,
+            description="Admin log event groups read by events_groups_log (ChannelAdminLogEventsFilter flags)",
+        ),
+        th.Property(
+            "sync_intervals",
+            th.ObjectType(additional_properties=th.IntegerType),
+            description="Minimum minutes between successful syncs per stream name; stats graph "
+                        "streams default to 23 hours, other streams sync on every run",
+        ),
+        th.Property(
+            "state_every_records",
+            th.IntegerType,
+            default=1000,
+            description="Emit an intermediate STATE with resume cursors after this many records",
+        ),
+        th.Property(
+            "state_every_seconds",
+            th.IntegerType,
+            default=60,
+            description="Emit an intermediate STATE with resume cursors at least this often",
+        ),
+        th.Property(
+            "media_thumbs",
+            th.BooleanType,
+            default=False,
+            description="Download the smallest thumbnail of every post media and emit its hash in post_media",
+        ),
+        th.Property(
+            "media_thumbs_dir",
+            th.StringType,
+            default=".tap-telegram-thumbs",
+            description="Local content-addressed cache of downloaded thumbnails",
+        ),
+        th.Property(
+            "media_thumbs_concurrency",
+            th.IntegerType,
+            default=4,
+            description="Maximum number of thumbnails downloaded at the same time",
+        ),
+        th.Property(
+            "public_forwards_posts",
+            th.IntegerType,
+            default=100,
+            description="How many of the latest posts post_public_forwards looks at",
+        ),
+        th.Property(
+            "public_forwards_ttl_hours",
+            th.IntegerType,
+            default=24,
+            description="Re-crawl the public forwards of a post after this many hours, or when its forwards count changes",
+        ),
+        th.Property(
+            "public_forwards_concurrency",
+            th.IntegerType,
+            default=4,
+            description="Maximum number of posts whose public forwards are crawled at the same time",
+        ),
+        th.Property(
+            "public_forwards_cache_dir",
+            th.StringType,
+            default=".tap-telegram-forwards",
+            description="Local cache of crawled public forwards, reused until public_forwards_ttl_hours pass",
+        ),
+        th.Property(
+            "post_search",
+            th.ArrayType(
+                th.ObjectType(
+                    th.Property("name", th.StringType, required=True),
+                    th.Property("query", th.StringType, description="Text to search for"),
+                    th.Property("filter", th.StringType, allowed_values=list(SEARCH_FILTERS),
+                                description="Kind of messages to match, e.g. url, photos or video"),
+                    th.Property("min_date", th.DateType),
+                    th.Property("max_date", th.DateType),
+                )
+            ),
+            description="Server-side searches (messages.Search) emitted by the post_search stream",
+        ),
+        th.Property(
+            "participants_memory_ids",
+            th.IntegerType,
+            default=200000,
+            description="Participant ids of one channel kept in memory for deduplication during a full crawl; "
+                        "beyond that they spill to a temporary SQLite file",
+        ),
+        th.Property(
+            "importers_memory_ids",
+            th.IntegerType,
+            default=200000,
+            description="Importer ids of one invite link kept in memory for deduplication; "
+                        "beyond that they spill to a temporary SQLite file",
+        ),
+        th.Property(
+            "stream_concurrency",
+            th.IntegerType,
+            default=1,
+            description="Number of independent streams synced at the same time over the shared clients",
+        ),
+        th.Property(
+            "batch_format",
+            th.StringType,
+            allowed_values=["jsonl", "parquet"],
+            description="Write records to batch files of this format and emit BATCH messages "
+                        "(shorthand for 'batch_config'; parquet needs the 'parquet' extra)",
+        ),
+        th.Property(
+            "batch_root",
+            th.StringType,
+            default="file://output/batches",
+            description="Directory or s3:// URL the batch files are written to (s3 needs the 's3' extra)",
+        ),
+        th.Property(
+            "batch_size",
+            th.IntegerType,
+            default=10000,
+            description="Maximum number of records per batch file",
+        ),
+        th.Property(
+            "batch_streams",
+            th.ArrayType(th.StringType),
+            description="Streams written in batches, all top-level streams if not set; "
+                        "child streams are never batched",
+        ),
+        th.Property(
+            "listen",
+            th.BooleanType,
+            default=False,
+            description="After the sync, keep running and emit posts, comments and joins from live updates",
+        ),
+        th.Property(
+            "listen_flush_seconds",
+            th.IntegerType,
+            default=5,
+            description="How often listen mode emits a STATE message",
+        ),
     ).to_dict()
 
+    def sync_all(self) -> None:  # type: ignore[misc]
+        """Sync all streams, in worker processes when ``workers`` > 1.
+
+        With ``stream_concurrency`` > 1 independent streams overlap on one event
+        loop, see :func:`tap_telegram.runtime.run_streams`; otherwise this is
+        ``Tap.sync_all``. With ``listen`` the tap then keeps following live updates until stopped.
+        """
+        # Tap.invoke и весь CLI остаются от SDK — здесь только выбор способа синка
+        if not (self.config.get("channel") or self.config.get("channels")):
+            msg = "Either 'channel' or 'channels' must be configured"
+            raise ConfigValidationError(msg)
+        if not (self.config.get("session_key") or self.config.get("session_keys")):
+            msg = "Either 'session_key' or 'session_keys' must be configured"
+            raise ConfigValidationError(msg)
+        if self.config.get("workers", 1) > 1 and self.config.get("channels"):
+            if self.config.get("listen"):
+                msg = "'listen' cannot be combined with 'workers' > 1: live updates are followed by a single process"
+                raise ConfigValidationError(msg)
+            run_coordinator(self)
+            return
+        self.sync_started_at = dt.datetime.now(tz=dt.timezone.utc)
+        self.skip_fresh_streams()
+        try:
+            concurrency = self.config.get("stream_concurrency", 1)
+            if concurrency > 1:
+                run_streams(self, concurrency)
+            else:
+                super().sync_all()
+            # отметки last_synced_at ставятся после последнего STATE стрима — сохраняем их
+            self.write_message(StateMessage(value=self.state))
+            if self.config.get("listen"):
+                UpdateListener(self).listen()
+        finally:
+            if "session_pool" in self.__dict__:
+                self.session_pool.close()
+
+    @property
+    def output_lock(self) -> threading.RLock:
+        """Lock of the tap's single writer; held while a stream snapshots its state and writes STATE."""
+        return self.message_writer.lock  # type: ignore[attr-defined]
+
+    @cached_property
+    def published_bookmarks(self) -> dict:
+        """Bookmarks of every stream as of its last STATE message, see ``TelegramStream._write_state_message``."""
+        return copy.deepcopy(self.state.get("bookmarks", {}))
+
+    def skip_fresh_streams(self) -> None:
+        """Deselect streams, with their children, that synced within their minimum interval."""
+        for stream in self.streams.values():
+            if stream.parent_stream_type or not (stream.selected or stream.has_selected_descendents):
+                continue
+            if stream.sync_due(self.sync_started_at):
+                continue
+            self.logger.info("Skipping stream '%s', synced at %s", stream.name, stream.stream_state["last_synced_at"])
+            stream.selected = False
+            for child in stream.child_streams:
+                child.selected = False
+
+    @cached_property
+    def session_pool(self) -> SessionPool:
+        """Admin sessions shared by all streams of this run."""
+        return SessionPool(
+            api_id=self.config.get("api_id"),
+            api_hash=self.config.get("api_hash"),
+            session_keys=self.config.get("session_keys") or [self.config.get("session_key")],
+            rate=self.config.get("session_rate_limit", 10),
+        )
+
     def discover_streams(self) -> list[streams.TelegramStream]:
         """Return a list of discovered streams.
 
@@ -64,9 +391,16 @@ class Taptelegram(Tap):
             streams.InviteLinkUsersStream(self),
             streams.GroupFollowersStream(self),
             streams.EventsLogStream(self),
-            streams.GroupFollowersTotalStream(self)
+            streams.GroupFollowersTotalStream(self),
+            streams.PostReactionsStream(self),
+            streams.StoryReactionsStream(self),
+            streams.ParticipantsStream(self),
+            streams.PostMediaStream(self),
+            streams.PublicForwardsStream(self),
+            streams.PostSearchStream(self),
+            streams.PostLinksStream(self),
         ]
 
 
 if __name__ == "__main__":
-    TapTelegram.cli()
+    Taptelegram.cli()
@@ -0,0 +1,58 @@
+"""Tests for admin log event records."""
+
+from pyrogram.raw import types
+
+from tap_telegram.adminlog import event_record, events_filter
+
+DATE = 1_700_000_000  # 2023-11-14T22:13:20Z
+
+
+def event(action):
+    return types.ChannelAdminLogEvent(id=42, date=DATE, user_id=7, action=action)
+
+
+def test_join_has_no_extra_fields():
+    row = event_record(event(types.ChannelAdminLogEventActionParticipantJoin()), "channel")
+    assert row["event_type"] == "join"
+    assert row["event_id"] == "42"
+    assert row["date"] == "2023-11-14T22:13:20+00:00"
+    assert row["target_user_id"] is None and row["new_value"] is None
+
+
+def test_toggle_ban_refines_event_type():
+    member = types.ChannelParticipant(user_id=9, date=DATE)
+    banned = types.ChannelParticipantBanned(
+        peer=types.PeerUser(user_id=9), kicked_by=7, date=DATE,
+        banned_rights=types.ChatBannedRights(until_date=0, view_messages=True),
+    )
+    ban = event_record(event(types.ChannelAdminLogEventActionParticipantToggleBan(
+        prev_participant=member, new_participant=banned)), "channel")
+    unban = event_record(event(types.ChannelAdminLogEventActionParticipantToggleBan(
+        prev_participant=banned, new_participant=member)), "channel")
+    assert (ban["event_type"], ban["target_user_id"]) == ("ban", 9)
+    assert (unban["event_type"], unban["target_user_id"]) == ("unban", 9)
+
+
+def test_change_title_keeps_both_values():
+    row = event_record(event(types.ChannelAdminLogEventActionChangeTitle(prev_value="Old", new_value="New")), "c")
+    assert (row["event_type"], row["prev_value"], row["new_value"]) == ("change_title", "Old", "New")
+
+
+def test_join_by_invite_stringifies_admin_id():
+    invite = types.ChatInviteExported(link="https://t.me/+abc", admin_id=5, date=DATE, title="promo")
+    row = event_record(event(types.ChannelAdminLogEventActionParticipantJoinByInvite(invite=invite)), "c")
+    assert row["event_type"] == "join_by_invite"
+    assert (row["invite_link"], row["invite_link_title"], row["invite_admin_id"]) == ("https://t.me/+abc", "promo", "5")
+
+
+def test_unknown_action_falls_back_to_snake_case_name():
+    class ChannelAdminLogEventActionBrandNewThing:
+        pass
+
+    row = event_record(event(ChannelAdminLogEventActionBrandNewThing()), "c")
+    assert row["event_type"] == "brand_new_thing"
+
+
+def test_events_filter_defaults():
+    assert events_filter(None).join and not events_filter(None).promote
+    assert events_filter(["promote"]).promote
@@ -0,0 +1,63 @@
+"""Tests for the process-sharding coordinator helpers."""
+
+import pytest
+from singer_sdk.exceptions import ConfigValidationError
+
+from tap_telegram.coordinator import merge_states, message_type, shard_channels, worker_state
+from tap_telegram.tap import Taptelegram
+
+
+def partition(channel, **values):
+    return {"context": {"channel": channel}, **values}
+
+
+def test_shard_channels_round_robin_without_empty_shards():
+    assert shard_channels(["@a", "@b", "@c"], 2) == [["@a", "@c"], ["@b"]]
+    assert shard_channels(["@a"], 3) == [["@a"]]
+
+
+def test_worker_state_keeps_own_partitions_only():
+    state = {"bookmarks": {"posts": {"partitions": [partition("@a", pts=1), partition("@b", pts=2)]}}}
+    shard = worker_state(state, ["@b"])
+    assert shard["bookmarks"]["posts"]["partitions"] == [partition("@b", pts=2)]
+    # исходное состояние не меняется
+    assert len(state["bookmarks"]["posts"]["partitions"]) == 2
+
+
+def test_merge_states_merges_partitions_by_context():
+    base = {"bookmarks": {"posts": {"partitions": [partition("@a", pts=1), partition("@b", pts=2)]}}}
+    merged = merge_states(base, [
+        {"bookmarks": {"posts": {"partitions": [partition("@a", pts=10)]}}},
+        {"bookmarks": {"posts": {"partitions": [partition("@b", pts=20)]}}},
+    ])
+    assert sorted(p["pts"] for p in merged["bookmarks"]["posts"]["partitions"]) == [10, 20]
+
+
+def test_merge_states_keeps_cdc_hash_updates_of_every_worker():
+    base = {"bookmarks": {"group_stat": {"cdc_hashes": {"a": "old-a", "b": "old-b"}}}}
+    # каждый воркер стартует с полной копией хэшей и меняет только свои каналы
+    worker_a = {"bookmarks": {"group_stat": {"cdc_hashes": {"a": "new-a", "b": "old-b"}}}}
+    worker_b = {"bookmarks": {"group_stat": {"cdc_hashes": {"a": "old-a", "b": "new-b"}}}}
+    for states in ([worker_a, worker_b], [worker_b, worker_a]):
+        merged = merge_states(base, states)
+        assert merged["bookmarks"]["group_stat"]["cdc_hashes"] == {"a": "new-a", "b": "new-b"}
+    assert base["bookmarks"]["group_stat"]["cdc_hashes"] == {"a": "old-a", "b": "old-b"}
+
+
+def test_merge_states_takes_new_stream_keys():
+    merged = merge_states({}, [{"bookmarks": {"stories": {"last_synced_at": "2024-01-01"}}}])
+    assert merged["bookmarks"]["stories"]["last_synced_at"] == "2024-01-01"
+
+
+def test_message_type_reads_prefix_and_parses_other_layouts():
+    assert message_type('{"type":"RECORD","stream":"posts","record":{"type":"STATE"}}\n') == "RECORD"
+    assert message_type('{"stream":"posts","type":"SCHEMA","schema":{}}\n') == "SCHEMA"
+    assert message_type('{"value": {}, "type": "STATE"}\n') == "STATE"
+    assert message_type("not json\n") is None
+
+
+def test_listen_is_rejected_with_workers():
+    tap = Taptelegram(config={"api_id": 1, "api_hash": "hash", "session_key": "key", "channels": ["@a", "@b"],
+                              "workers": 2, "listen": True}, validate_config=False)
+    with pytest.raises(ConfigValidationError, match="listen"):
+        tap.sync_all()
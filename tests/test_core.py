@@ -1,22 +1,48 @@
 """Tests standard tap features using the built-in SDK tests library."""
 
 import datetime
+import os
 
+import pytest
+from singer_sdk.exceptions import ConfigValidationError
 from singer_sdk.testing import get_tap_test_class
 
-from tap_telegram.tap import TapTelegram
+from tap_telegram.tap import Taptelegram
 
 SAMPLE_CONFIG = {
     "start_date": datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d"),
-    # TODO: Initialize minimal tap config
+    # стандартные тесты SDK ходят в Telegram: нужна живая сессия администратора канала
+    "api_id": int(os.environ.get("TAP_TELEGRAM_API_ID", "0")),
+    "api_hash": os.environ.get("TAP_TELEGRAM_API_HASH", ""),
+    "session_key": os.environ.get("TAP_TELEGRAM_SESSION_KEY", ""),
+    "channel": os.environ.get("TAP_TELEGRAM_CHANNEL", ""),
 }
 
+LIVE = all(SAMPLE_CONFIG[k] for k in ("api_id", "api_hash", "session_key", "channel"))
+
 
 # Run standard built-in tap tests from the SDK:
-TestTapTelegram = get_tap_test_class(
-    tap_class=TapTelegram,
-    config=SAMPLE_CONFIG,
-)
+if LIVE:
+    TestTapTelegram = get_tap_test_class(
+        tap_class=Taptelegram,
+        config=SAMPLE_CONFIG,
+    )
+
+
+@pytest.mark.skipif(LIVE, reason="covered by the standard tests")
+def test_discovers_streams_offline():
+    tap = Taptelegram(config=SAMPLE_CONFIG, validate_config=False)
+    assert "posts" in tap.streams
+    assert all(stream.schema["properties"] for stream in tap.streams.values())
+
+
+def test_session_keys_alone_pass_validation():
+    config = {"api_id": 1, "api_hash": "hash", "channel": "@channel", "session_keys": ["a", "b"]}
+    tap = Taptelegram(config=config)
+    assert len(tap.session_pool.sessions) == 2
 
 
-# TODO: Create additional tests as appropriate for your tap.
+def test_a_session_is_required():
+    tap = Taptelegram(config={"api_id": 1, "api_hash": "hash", "channel": "@channel"})
+    with pytest.raises(ConfigValidationError, match="session_key"):
+        tap.sync_all()
@@ -0,0 +1,40 @@
+"""Tests for link and mention extraction from message entities."""
+
+from pyrogram.raw import types
+
+from tap_telegram.entities import link_rows
+
+
+def utf16_len(text):
+    return len(text.encode("utf-16-le")) // 2
+
+
+def test_offsets_after_astral_characters():
+    prefix = "🔥🔥 Читайте "  # каждый 🔥 — два кода UTF-16
+    text = prefix + "https://example.com и @channel"
+    url_at = utf16_len(prefix)
+    mention_at = utf16_len(prefix + "https://example.com и ")
+    rows = link_rows(text, [
+        types.MessageEntityUrl(offset=url_at, length=19),
+        types.MessageEntityBold(offset=0, length=2),
+        types.MessageEntityMention(offset=mention_at, length=8),
+    ])
+    assert [(r["kind"], r["text"]) for r in rows] == [("url", "https://example.com"), ("mention", "@channel")]
+    assert rows[0]["url"] == "https://example.com"
+    assert rows[1]["username"] == "channel"
+    assert [r["position"] for r in rows] == [0, 1]
+
+
+def test_text_link_and_mention_name():
+    text = "😀 docs and Bob"
+    rows = link_rows(text, [
+        types.MessageEntityTextUrl(offset=3, length=4, url="https://docs.example.com"),
+        types.MessageEntityMentionName(offset=12, length=3, user_id=42),
+    ])
+    assert (rows[0]["text"], rows[0]["url"]) == ("docs", "https://docs.example.com")
+    assert (rows[1]["text"], rows[1]["user_id"], rows[1]["username"]) == ("Bob", 42, None)
+
+
+def test_no_text_or_entities():
+    assert link_rows(None, [types.MessageEntityUrl(offset=0, length=1)]) == []
+    assert link_rows("text", None) == []
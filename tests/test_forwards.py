@@ -0,0 +1,44 @@
+"""Tests for public forwards rows and their cache."""
+
+import datetime as dt
+from types import SimpleNamespace
+
+from pyrogram.raw import types
+
+from tap_telegram.forwards import ForwardsCache, forward_row
+from tap_telegram.tap import Taptelegram
+
+CONFIG = {"api_id": 1, "api_hash": "hash", "session_key": "key", "channel": "@channel"}
+
+
+def story_forward(peer):
+    return types.PublicForwardStory(peer=peer, story=types.StoryItemDeleted(id=7))
+
+
+def test_forward_row_keeps_chat_and_user_ids_apart():
+    chats = {5: SimpleNamespace(title="Channel", username="chan")}
+    users = {5: SimpleNamespace(first_name="Ann", last_name=None, username="ann")}
+    by_user = forward_row(story_forward(types.PeerUser(user_id=5)), chats, users, "channel", 1)
+    by_channel = forward_row(story_forward(types.PeerChannel(channel_id=5)), chats, users, "channel", 1)
+    assert (by_user["source_username"], by_user["source_title"]) == ("ann", "Ann")
+    assert (by_channel["source_username"], by_channel["source_title"]) == ("chan", "Channel")
+
+
+def test_due_posts_reuse_fresh_cached_rows(tmp_path):
+    stream = Taptelegram(config=CONFIG, validate_config=False).streams["post_public_forwards"]
+    cache = ForwardsCache(str(tmp_path))
+    now = dt.datetime(2024, 1, 2, tzinfo=dt.timezone.utc)
+    fresh = (now - dt.timedelta(hours=1)).isoformat()
+    stale = (now - dt.timedelta(days=2)).isoformat()
+    cache.put("channel", 1, {"at": fresh, "forwards": 2, "rows": [{"post_id": 1}]})
+    cache.put("channel", 2, {"at": fresh, "forwards": 2, "rows": [{"post_id": 2}]})
+    cache.put("channel", 3, {"at": stale, "forwards": 2, "rows": [{"post_id": 3}]})
+    posts = [SimpleNamespace(id=1, forwards=2), SimpleNamespace(id=2, forwards=3),
+             SimpleNamespace(id=3, forwards=2), SimpleNamespace(id=4, forwards=None)]
+
+    rows, due = stream.due_posts(posts, cache, "channel", now)
+    assert rows == [{"post_id": 1}]
+    assert [m.id for m in due] == [2, 3]
+
+    cache.prune("channel", {1})
+    assert [cache.get("channel", i) is not None for i in (1, 2, 3)] == [True, False, False]
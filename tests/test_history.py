@@ -0,0 +1,93 @@
+"""Tests for the sharded backfill helpers."""
+
+from tap_telegram.history import iter_shard_chunks, run_backfill, split_shards
+
+
+class FakeStream:
+    def __init__(self, state):
+        self.config = {"backfill_concurrency": 2}
+        self.state = state
+        self.checkpoints = 0
+
+    def get_context_state(self, context):
+        return self.state
+
+    def write_checkpoint(self):
+        self.checkpoints += 1
+
+    def checkpoint_progress(self, records):
+        pass
+
+
+def make_crawl(calls):
+    async def crawl(lo, hi):
+        calls.append((lo, hi))
+        # страницы по 3 id, от новых к старым
+        for top in range(hi, lo - 1, -3):
+            ids = list(range(top, max(lo, top - 2) - 1, -1))
+            yield ids, ids[-1]
+    return crawl
+
+
+def test_split_shards_cover_range():
+    shards = split_shards(1, 10, 3)
+    assert shards == [[7, 10], [3, 6], [1, 2]]
+
+
+def test_run_backfill_streams_every_id_and_completes():
+    state = {"backfill": {"shards": [[11, 20], [1, 10]], "done": []}}
+    calls = []
+    records = list(run_backfill(FakeStream(state), None, None, None, make_crawl(calls)))
+    assert sorted(records) == list(range(1, 21))
+    plan = state["backfill"]
+    assert plan["complete"]
+    assert len(plan["done"]) == 2
+
+
+def test_run_backfill_resumes_below_last_emitted_page():
+    state = {"backfill": {"shards": [[1, 10]], "done": []}}
+    stream = FakeStream(state)
+    pages = run_backfill(stream, None, None, None, make_crawl([]))
+    first = [next(pages) for _ in range(3)]  # первая страница: 10, 9, 8
+    next(pages)  # следующая запись — граница шарда уже сдвинута под первую страницу
+    pages.close()
+    assert first == [10, 9, 8]
+    assert state["backfill"]["shards"] == [[1, 7]]
+
+    calls = []
+    rest = list(run_backfill(FakeStream(state), None, None, None, make_crawl(calls)))
+    assert calls == [(1, 7)]
+    assert sorted(rest) == list(range(1, 8))
+
+
+def test_iter_shard_chunks_bounds_the_queue():
+    produced = []
+
+    async def crawl(lo, hi):
+        for i in range(lo, hi + 1):
+            produced.append(i)
+            yield [i], i
+
+    consumed = 0
+    for _, records, _ in iter_shard_chunks(crawl, [[1, 20]], 1, 2):
+        if records is None:
+            continue
+        consumed += 1
+        # в очереди не больше maxsize чанков и ещё один ждёт put
+        assert len(produced) - consumed <= 3
+    assert consumed == 20
+
+
+def test_iter_shard_chunks_raises_shard_errors():
+    async def crawl(lo, hi):
+        yield [lo], lo
+        raise ValueError("boom")
+
+    chunks = iter_shard_chunks(crawl, [[1, 1]], 1, 1)
+    assert next(chunks)[1] == [1]
+    try:
+        next(chunks)
+    except ValueError as exc:
+        assert str(exc) == "boom"
+    else:
+        raise AssertionError("shard error was swallowed")
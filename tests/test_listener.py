@@ -0,0 +1,86 @@
+"""Offline tests for listen mode."""
+
+import asyncio
+from types import SimpleNamespace
+
+from pyrogram.raw import types
+
+from tap_telegram.listener import UpdateListener, Watched
+from tap_telegram.tap import Taptelegram
+
+CONFIG = {"api_id": 1, "api_hash": "hash", "session_key": "key", "channel": "@channel"}
+DATE = 1_700_000_000
+
+
+def make_listener(monkeypatch):
+    tap = Taptelegram(config=CONFIG, validate_config=False)
+    messages = []
+    monkeypatch.setattr(tap.message_writer, "write_message", messages.append)
+    # без сети: слушателю достаточно заглушки клиента
+    tap.__dict__["session_pool"] = SimpleNamespace(client_for=lambda key: None)
+    listener = UpdateListener(tap)
+    listener.resync = asyncio.Event()
+    return listener, messages
+
+
+def watched(listener, pts=10):
+    return Watched(1, 1, None, "channel", None, listener.posts, pts)
+
+
+def test_accept_applies_consecutive_updates_and_schedules_gaps(monkeypatch):
+    listener, _ = make_listener(monkeypatch)
+    w = watched(listener)
+    w.stale = False
+
+    assert listener.accept(w, 11, 1) and w.pts == 11
+    assert not listener.accept(w, 11, 1)  # уже применено
+    assert not listener.resync.is_set()
+
+    assert not listener.accept(w, 15, 1)  # пропущены 12–14
+    assert w.stale and listener.resync.is_set() and w.pts == 11
+    # до догонялки всё откладывается на неё
+    assert not listener.accept(w, 12, 1)
+
+
+def participant_update(prev, new, actor_id=5, invite=None):
+    return SimpleNamespace(channel_id=1, qts=3, user_id=5, actor_id=actor_id, date=DATE,
+                           prev_participant=prev, new_participant=new, invite=invite)
+
+
+def test_emit_participant_event_types(monkeypatch):
+    listener, _ = make_listener(monkeypatch)
+    emitted = []
+    monkeypatch.setattr(listener, "emit", lambda stream, record, context: emitted.append(record))
+    w = watched(listener)
+    member = types.ChannelParticipant(user_id=5, date=DATE)
+    left = types.ChannelParticipantLeft(peer=types.PeerUser(user_id=5))
+    admin = types.ChannelParticipantAdmin(user_id=5, promoted_by=7, date=DATE,
+                                          admin_rights=types.ChatAdminRights())
+    invite = types.ChatInviteExported(link="https://t.me/+abc", admin_id=7, date=DATE)
+
+    for update in (
+        participant_update(None, member),
+        participant_update(None, member, actor_id=7),
+        participant_update(left, member, invite=invite),
+        participant_update(member, left),
+        participant_update(member, admin),  # смена прав — не событие состава
+    ):
+        listener.emit_participant(w, update)
+
+    assert [r["event_type"] for r in emitted] == ["join", "invite", "join_by_invite", "leave"]
+    assert emitted[2]["invite_admin_id"] == "7" and emitted[0]["invite_admin_id"] is None
+    assert emitted[0]["event_id"] == "live:1:3"
+
+
+def test_stream_adapter_writes_records_and_promotes_bookmarks(monkeypatch):
+    listener, messages = make_listener(monkeypatch)
+    events = listener.events
+    events.emit_schema()
+    events.emit_record({"channel": "channel", "event_id": "live:1:3", "event_type": "join", "user_id": 5,
+                        "date": "2024-01-02T00:00:00+00:00"}, None)
+    events.promote_bookmarks()
+
+    assert [m.type for m in messages] == ["SCHEMA", "RECORD"]
+    assert messages[1].record["event_id"] == "live:1:3"
+    assert events.stream_state["replication_key_value"] == "2024-01-02T00:00:00+00:00"
+    assert "progress_markers" not in events.stream_state
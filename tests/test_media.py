@@ -0,0 +1,31 @@
+"""Tests for post media rows and the thumbnail cache."""
+
+import asyncio
+from types import SimpleNamespace
+
+from pyrogram.raw import types
+
+from tap_telegram.media import ThumbCache, athumb_hash, media_row
+
+
+def test_thumb_cache_round_trip(tmp_path):
+    cache = ThumbCache(str(tmp_path))
+    assert cache.get("1") is None
+    digest = cache.put("1", b"jpeg")
+    assert cache.get("1") == digest
+    # одинаковое содержимое хранится одним blob
+    assert cache.put("2", b"jpeg") == digest
+    assert len(list((tmp_path / "blobs").rglob("*"))) == 2  # каталог и файл
+
+
+def test_thumb_cache_ignores_missing_media_id(tmp_path):
+    cache = ThumbCache(str(tmp_path))
+    assert cache.get(None) is None
+    assert asyncio.run(athumb_hash(None, cache, None, b"jpeg")) is None
+    assert not (tmp_path / "ids").exists()
+
+
+def test_media_row_without_media_id():
+    geo = types.MessageMediaGeo(geo=types.GeoPointEmpty())
+    row, thumb = media_row(SimpleNamespace(media=geo, grouped_id=None))
+    assert (row["type"], row["media_id"], thumb) == ("geo", None, None)
@@ -0,0 +1,36 @@
+"""Tests for the prefix-sharded roster crawl."""
+
+import logging
+from types import SimpleNamespace
+
+from tap_telegram import participants
+
+
+def member(user_id):
+    return SimpleNamespace(user_id=user_id, date=None)
+
+
+def fake_collect(roster, cap):
+    async def collect(app, channel, flt):
+        query = getattr(flt, "q", "")
+        found = [member(i) for i, name in roster.items() if name.startswith(query)]
+        return found[:cap], {}, len(found)
+    return collect
+
+
+def test_crawl_roster_dedupes_across_prefixes_and_reports_missing(monkeypatch, caplog):
+    roster = {1: "anna", 2: "andrey", 3: "boris", 4: "ömer"}
+    monkeypatch.setattr(participants, "acollect_participants", fake_collect(roster, cap=1))
+    with caplog.at_level(logging.WARNING):
+        rows = list(participants.crawl_roster(None, None, "channel", 2, logging.getLogger("test"), max_memory=1))
+    ids = [row["user_id"] for row in rows]
+    assert sorted(ids) == [1, 2, 3]
+    assert len(ids) == len(set(ids))
+    assert "Crawled 3 of 4 participants" in caplog.text
+
+
+def test_crawl_roster_small_channel_uses_one_filter(monkeypatch, caplog):
+    monkeypatch.setattr(participants, "acollect_participants", fake_collect({1: "a", 2: "b"}, cap=10))
+    rows = list(participants.crawl_roster(None, None, "channel", 2, logging.getLogger("test")))
+    assert [row["user_id"] for row in rows] == [1, 2]
+    assert not caplog.text
@@ -0,0 +1,65 @@
+"""Tests for the session pool routing and rate budget."""
+
+from tap_telegram.pool import PooledClient, Session, SessionPool
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = []
+        self.name = "fake"
+
+    def resolve_peer(self, peer):
+        self.calls.append(peer)
+        return peer
+
+    def add_handler(self, handler):
+        return handler
+
+
+def make_pool(size, rate=10.0):
+    pool = SessionPool(1, "hash", [], rate=rate)
+    pool.sessions = [Session(i, FakeClient(), pool.burst) for i in range(size)]
+    return pool
+
+
+def test_pick_breaks_ties_round_robin():
+    pool = make_pool(3)
+    assert [pool.pick().index for _ in range(6)] == [0, 1, 2, 0, 1, 2]
+
+
+def test_pick_prefers_session_with_more_budget():
+    pool = make_pool(2)
+    pool.sessions[0].tokens = 1
+    assert {pool.pick().index for _ in range(4)} == {1}
+
+
+def test_pooled_client_rate_limits_rpc_attributes():
+    pool = make_pool(1)
+    session = pool.sessions[0]
+    proxy = PooledClient(pool, session)
+    before = session.tokens
+    assert proxy.resolve_peer("@a") == "@a"
+    assert session.client.calls == ["@a"]
+    assert session.tokens < before
+    # локальные методы и атрибуты бюджет не тратят
+    spent = session.tokens
+    proxy.add_handler(None)
+    assert proxy.name == "fake"
+    assert session.tokens == spent
+
+
+def test_session_start_does_not_hold_the_pool_lock():
+    pool = make_pool(1)
+    free = []
+
+    def start():
+        # клиент стартует в цикле событий, где другие стримы тем временем берут токены
+        acquired = pool.lock.acquire(timeout=1)
+        if acquired:
+            pool.lock.release()
+        free.append(acquired)
+
+    pool.sessions[0].client.start = start
+    assert pool.session_for("posts:@a").started
+    pool.session_for("posts:@a")
+    assert free == [True]
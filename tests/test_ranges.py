@@ -0,0 +1,30 @@
+"""Tests for the id range sets kept in the state."""
+
+from tap_telegram.ranges import difference, iter_ids, to_ranges, union
+
+
+def test_to_ranges_collapses_runs():
+    assert to_ranges([5, 1, 2, 3, 3, 7, 8]) == [[1, 3], [5, 5], [7, 8]]
+    assert to_ranges([]) == []
+
+
+def test_union_merges_adjacent_and_overlapping_ranges():
+    ranges = [[1, 3], [10, 12]]
+    assert union(ranges, [4, 5, 9]) == [[1, 5], [9, 12]]
+    assert union(ranges, range(2, 11)) == [[1, 12]]
+    # исходный набор не меняется
+    assert ranges == [[1, 3], [10, 12]]
+
+
+def test_difference_splits_ranges():
+    ranges = [[1, 10], [20, 22]]
+    assert difference(ranges, [1, 5, 10, 21]) == [[2, 4], [6, 9], [20, 20], [22, 22]]
+    assert difference(ranges, [20, 21, 22, 99]) == [[1, 10]]
+    assert difference(ranges, []) == ranges
+    assert ranges == [[1, 10], [20, 22]]
+
+
+def test_round_trip_through_ids():
+    ids = {1, 2, 3, 7, 40, 41}
+    ranges = difference(union([], ids | {5}), [5])
+    assert set(iter_ids(ranges)) == ids
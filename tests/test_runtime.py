@@ -0,0 +1,68 @@
+"""Tests for STATE messages of concurrently synced streams."""
+
+import threading
+
+from tap_telegram import client
+from tap_telegram.tap import Taptelegram
+
+CONFIG = {"api_id": 1, "api_hash": "hash", "session_key": "key", "channel": "@channel"}
+
+
+def make_tap(monkeypatch):
+    tap = Taptelegram(config=CONFIG, validate_config=False)
+    messages = []
+    monkeypatch.setattr(tap.message_writer, "write_message", messages.append)
+    monkeypatch.setattr(client, "RUNTIME_LOOP", object())
+    for name in ("posts", "stories"):
+        _ = tap.streams[name].stream_state
+    _ = tap.published_bookmarks
+    return tap, messages
+
+
+def write_state(stream):
+    stream._is_state_flushed = False
+    stream._write_state_message()
+
+
+def test_state_is_merged_from_published_snapshots(monkeypatch):
+    tap, messages = make_tap(monkeypatch)
+    posts, stories = tap.streams["posts"], tap.streams["stories"]
+
+    posts.stream_state["pts"] = 1
+    write_state(posts)
+    stories.stream_state["resume"] = 2
+    posts.stream_state["pts"] = 99  # ещё не опубликовано — в STATE stories не попадает
+    write_state(stories)
+
+    first, second = (m.value["bookmarks"] for m in messages)
+    # отправленные снимки не меняются вместе с живым состоянием
+    assert first["posts"]["pts"] == 1 and "resume" not in first["stories"]
+    assert second["posts"]["pts"] == 1 and second["stories"]["resume"] == 2
+
+
+def test_state_family_covers_children_synced_in_the_same_thread(monkeypatch):
+    tap, _ = make_tap(monkeypatch)
+    assert {"posts", "post_reactions", "post_media"} <= set(tap.streams["post_reactions"].state_family)
+    assert "posts" not in tap.streams["stories"].state_family
+
+
+def test_concurrent_state_writes_do_not_race(monkeypatch):
+    tap, messages = make_tap(monkeypatch)
+    errors = []
+
+    def sync(stream):
+        try:
+            for i in range(500):
+                stream.stream_state.setdefault("ids", {})[str(i)] = i
+                write_state(stream)
+        except Exception as exc:  # noqa: BLE001
+            errors.append(exc)
+
+    threads = [threading.Thread(target=sync, args=(tap.streams[name],)) for name in ("posts", "stories")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    last = messages[-1].value["bookmarks"]
+    assert len(last["posts"]["ids"]) == 500 or len(last["stories"]["ids"]) == 500
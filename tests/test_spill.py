@@ -0,0 +1,34 @@
+"""Tests for the memory-bounded seen-id set."""
+
+from tap_telegram.spill import QUERY_CHUNK, SpillSet
+
+
+def test_fresh_dedupes_within_and_across_pages():
+    with SpillSet(100) as seen:
+        assert seen.fresh([1, 2, 2, 3]) == {1, 2, 3}
+        assert seen.fresh([3, 4]) == {4}
+        assert seen.db is None
+
+
+def test_keys_stay_known_after_spilling():
+    with SpillSet(3) as seen:
+        assert seen.fresh([1, 2, 3]) == {1, 2, 3}
+        assert seen.db is None
+        assert seen.fresh([4]) == {4}  # четвёртый ключ переполняет память — всё уходит в SQLite
+        assert seen.db is not None and not seen.memory
+        assert seen.fresh([1, 4, 5]) == {5}
+        assert seen.fresh([5, 6]) == {6}
+
+
+def test_spilled_lookup_crosses_query_chunks():
+    keys = list(range(QUERY_CHUNK * 2 + 10))
+    with SpillSet(10) as seen:
+        assert seen.fresh(keys) == set(keys)
+        assert seen.fresh(keys + [-1]) == {-1}
+
+
+def test_close_releases_the_database():
+    seen = SpillSet(0)
+    seen.fresh([1])
+    seen.close()
+    assert seen.db is None and not seen.memory
@@ -0,0 +1,71 @@
+"""Tests for stats graph point formatting."""
+
+import json
+from types import SimpleNamespace
+
+import pandas as pd
+from pyrogram.raw import types
+
+from tap_telegram import client
+from tap_telegram.client import TelegramStream
+from tap_telegram.tap import Taptelegram
+
+DAY_MS = 1_700_006_400_000  # 2023-11-15T00:00:00Z
+HOUR_MS = 3_600_000
+
+
+def test_daily_dates_keep_their_format_with_hourly_points():
+    daily = pd.DataFrame({"x": [DAY_MS - 86_400_000, DAY_MS], "y0": [1, 2], "granularity": "day"})
+    alone = TelegramStream.format_points(daily.copy())
+
+    hourly = pd.DataFrame({"x": [DAY_MS + HOUR_MS, DAY_MS + 2 * HOUR_MS], "y0": [3, 4], "granularity": "hour"})
+    mixed = TelegramStream.format_points(pd.concat([daily, hourly], ignore_index=True))
+
+    assert list(alone["x"]) == ["2023-11-14", "2023-11-15"]
+    assert list(mixed["x"][:2]) == list(alone["x"])
+    assert list(mixed["x"][2:]) == ["2023-11-15", "2023-11-15"]
+    assert list(mixed["period_start"]) == [
+        "2023-11-14T00:00:00+00:00",
+        "2023-11-15T00:00:00+00:00",
+        "2023-11-15T01:00:00+00:00",
+        "2023-11-15T02:00:00+00:00",
+    ]
+
+
+def test_format_points_into_named_column():
+    df = TelegramStream.format_points(pd.DataFrame({"x": [DAY_MS]}), column="date")
+    assert df["date"][0] == "2023-11-15"
+
+
+def zoomed_graph(day_ms):
+    data = {"columns": [["x", day_ms, day_ms + HOUR_MS], ["y0", 5, 6]]}
+    return types.StatsGraph(json=types.DataJSON(data=json.dumps(data)))
+
+
+def test_zoomed_days_reach_the_state_only_after_the_sync(monkeypatch):
+    config = {"api_id": 1, "api_hash": "hash", "session_key": "key", "channel": "@channel", "stats_zoom_days": 2}
+    stream = Taptelegram(config=config, validate_config=False).streams["group_followers_stat"]
+    days = [DAY_MS - 86_400_000, DAY_MS]
+    monkeypatch.setattr(client, "run_concurrently", lambda jobs, limit: [zoomed_graph(x) for x in days])
+
+    daily = pd.DataFrame({"x": days, "y0": [1, 2], "y1": [3, 4]})
+    df = stream.with_zoomed(None, SimpleNamespace(zoom_token="t"), daily, None)
+
+    # у почасовых точек нет y1: столбец остаётся целым, пропуски — None
+    assert list(df["y1"]) == [3, 4, None, None, None, None]
+    assert "zoomed_days" not in stream.stream_state
+    stream.finalize_state_progress_markers()
+    assert stream.stream_state["zoomed_days"] == days
+
+
+def test_failed_load_forgets_zoomed_days(monkeypatch):
+    config = {"api_id": 1, "api_hash": "hash", "session_key": "key", "channel": "@channel", "stats_zoom_days": 1}
+    stream = Taptelegram(config=config, validate_config=False).streams["group_followers_stat"]
+    monkeypatch.setattr(client, "run_concurrently", lambda jobs, limit: [zoomed_graph(DAY_MS)])
+    stream.with_zoomed(None, SimpleNamespace(zoom_token="t"), pd.DataFrame({"x": [DAY_MS], "y0": [1]}), None)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        stream.load_failed(None)
+    stream.finalize_state_progress_markers()
+    assert "zoomed_days" not in stream.stream_state
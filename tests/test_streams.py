@@ -0,0 +1,197 @@
+"""Offline tests for stream record generation."""
+
+import contextlib
+import datetime
+from types import SimpleNamespace
+
+from tap_telegram.tap import Taptelegram
+
+CONFIG = {"api_id": 1, "api_hash": "hash", "session_key": "key", "channel": "@channel"}
+
+
+class FakeApp:
+    def resolve_peer(self, peer):
+        return peer
+
+
+def make_stream(name, **config):
+    tap = Taptelegram(config={**CONFIG, **config}, validate_config=False)
+    stream = tap.streams[name]
+    stream.open_client = lambda context: contextlib.nullcontext(FakeApp())
+    return stream
+
+
+def invite(link, usage):
+    return SimpleNamespace(link=link, admin_id=1, date=datetime.datetime(2024, 1, 1), title=None,
+                           usage=usage, revoked=False, permanent=False, request_needed=False)
+
+
+def test_invite_links_cdc_skips_unchanged_links():
+    stream = make_stream("invite_links", cdc=True)
+    invites = [invite("https://t.me/+a", 1), invite("https://t.me/+b", 2)]
+    stream.fetch_all_invites = lambda app, peer: invites
+
+    assert len(list(stream.get_records(None))) == 2
+    assert list(stream.get_records(None)) == []
+
+    invites[1] = invite("https://t.me/+b", 3)
+    assert [row["link"] for row in stream.get_records(None)] == ["https://t.me/+b"]
+
+
+def test_batched_streams_skip_intermediate_state():
+    for config, expected in (({}, 1), ({"batch_format": "jsonl"}, 0)):
+        stream = make_stream("posts", **config)
+        written = []
+        stream._write_state_message = lambda: written.append(1)
+        stream.write_checkpoint()
+        assert len(written) == expected
+    stream.write_checkpoint(force=True)
+    assert len(written) == 1
+
+
+def test_failed_stats_load_is_retried_next_run():
+    stream = make_stream("group_followers_stat")
+    stream.as_input = lambda app, chat: None
+    stream.fetch_stats = lambda app, ch: []  # обе статистики недоступны
+
+    assert list(stream.get_records(None)) == []
+    stream.finalize_state_progress_markers()
+    assert "last_synced_at" not in stream.stream_state
+
+    ok = make_stream("group_followers_stat")
+    ok.finalize_state_progress_markers()
+    assert "last_synced_at" in ok.stream_state
+
+
+def post(post_id):
+    return SimpleNamespace(id=post_id, reply_to=None, replies=SimpleNamespace(replies=1))
+
+
+def test_comments_resume_with_newer_posts(monkeypatch):
+    from tap_telegram import streams
+
+    stream = make_stream("comments")
+    stream.get_context_state(None)["resume"] = {"top": 10, "post_id": 8}
+    monkeypatch.setattr(streams, "iter_history", lambda app, peer, limit: [
+        SimpleNamespace(messages=[post(i) for i in range(12, 4, -1)]),
+    ])
+    fetched, cursors = [], []
+    stream.fetch_replies = lambda app, peer, post_id: fetched.append(post_id) or []
+    stream.checkpoint = lambda context, cursor, records=0: cursors.append(cursor)
+
+    list(stream.get_records(None))
+    # прерванный запуск уже выгрузил 8–10, новые посты 11–12 берём сейчас
+    assert fetched == [12, 11, 7, 6, 5]
+    assert cursors[:-1] == [{"top": 12, "post_id": i} for i in fetched]
+    assert all(c["post_id"] <= c["top"] for c in cursors[:-1])
+    assert cursors[-1] is None
+
+
+def test_post_search_max_date_includes_the_whole_day():
+    stream = make_stream("post_search")
+    assert stream.to_timestamp("2024-01-31") == 1706659200  # 2024-01-31T00:00:00Z
+    assert stream.to_timestamp("2024-01-31", end=True) == 1706745600  # 2024-02-01T00:00:00Z
+    assert stream.to_timestamp(None, end=True) == 0
+
+
+def test_post_search_cursor_changes_with_the_definition():
+    stream = make_stream("post_search")
+    search = {"name": "promo", "query": "sale", "filter": "url"}
+    assert stream.search_key(search) == stream.search_key(dict(search))
+    assert stream.search_key(search) != stream.search_key({**search, "query": "discount"})
+    assert stream.search_key(search) != stream.search_key({**search, "max_date": "2024-01-31"})
+    assert stream.search_key(search).startswith("promo:")
+
+
+def test_child_streams_are_not_batched():
+    config = {**CONFIG, "batch_format": "jsonl"}
+    tap = Taptelegram(config=config, validate_config=False)
+    assert tap.streams["posts"].get_batch_config(config) is not None
+    for name in ("post_reactions", "post_media", "post_links"):
+        assert tap.streams[name].get_batch_config(config) is None
+
+
+def test_reactions_refresh_writes_only_reaction_rows(monkeypatch):
+    from pyrogram.raw import functions, types
+
+    stream = make_stream("posts", reactions_refresh_window=4)
+    queries = []
+
+    async def invoke(query):
+        queries.append(query)
+        thumbs_up = types.ReactionCount(reaction=types.ReactionEmoji(emoticon="👍"), count=2)
+        return types.Updates(updates=[types.UpdateMessageReactions(
+            peer=types.PeerChannel(channel_id=1), msg_id=3,
+            reactions=types.MessageReactions(results=[thumbs_up]),
+        )], users=[], chats=[], date=0, seq=0)
+
+    messages = []
+    monkeypatch.setattr(stream._tap.message_writer, "write_message", messages.append)
+    stream.refresh_reactions(SimpleNamespace(invoke=invoke), "peer", "@channel", None, {5, 4})
+
+    assert [q.id for q in queries] == [[2, 3]]
+    assert all(isinstance(q, functions.messages.GetMessagesReactions) for q in queries)
+    records = [m.record for m in messages if m.type == "RECORD"]
+    assert {m.stream for m in messages if m.type in ("RECORD", "SCHEMA")} == {"post_reactions"}
+    assert records == [{"channel": "channel", "post_id": 3, "reaction": "👍", "type": "emoji",
+                        "emoji": "👍", "custom_emoji_id": None, "count": 2}]
+
+
+class ImportersApp:
+    """Two full pages of two importers and a last page of one, for ``limit=2``."""
+
+    def __init__(self, known=()):
+        self.known, self.offsets = set(known), []
+
+    def resolve_peer(self, peer):
+        from pyrogram.raw import types
+
+        if isinstance(peer, str):
+            return peer
+        if peer not in self.known:
+            raise KeyError(peer)
+        return types.InputPeerUser(user_id=peer, access_hash=777)
+
+    def invoke(self, query):
+        self.offsets.append(query.offset_user)
+        start = getattr(query.offset_user, "user_id", 0)
+        ids = [i for i in range(start + 1, 6)][:query.limit]
+        return SimpleNamespace(
+            importers=[SimpleNamespace(user_id=i, date=100 - i, requested=False, via_chatlist=False) for i in ids],
+            users=[SimpleNamespace(id=i, access_hash=i * 10, first_name=None, last_name=None, username=None)
+                   for i in ids],
+        )
+
+
+def test_importer_offsets_keep_no_access_hash():
+    from pyrogram.raw import types
+
+    stream = make_stream("invite_link_users")
+    pages = list(stream.fetch_invite_importers(ImportersApp(), "peer", "hash", limit=2))
+    assert [offset for _, _, offset in pages] == [{"date": 98, "user_id": 2}, {"date": 96, "user_id": 4}, None]
+
+    app = ImportersApp(known={2})
+    list(stream.fetch_invite_importers(app, "peer", "hash", limit=2, offset={"date": 98, "user_id": 2}))
+    assert app.offsets[0] == types.InputUser(user_id=2, access_hash=777)
+    assert app.offsets[1] == types.InputUser(user_id=4, access_hash=40)
+
+    # сессия не знает пользователя из курсора — ссылка читается заново
+    app = ImportersApp()
+    pages = list(stream.fetch_invite_importers(app, "peer", "hash", limit=2, offset={"date": 98, "user_id": 2}))
+    assert isinstance(app.offsets[0], types.InputUserEmpty)
+    assert sum(len(importers) for importers, _, _ in pages) == 5
+
+
+def test_importer_pages_count_once_toward_checkpoints():
+    stream = make_stream("invite_link_users")
+    app = ImportersApp()
+    stream.open_client = lambda context: contextlib.nullcontext(app)
+    stream.fetch_all_invites = lambda app, peer: [SimpleNamespace(link="https://t.me/+a", title=None)]
+    pages = stream.fetch_invite_importers
+    stream.fetch_invite_importers = lambda app, peer, link, offset=None: pages(app, peer, link, 2, offset)
+    counted, cursors = [], []
+    stream.checkpoint = lambda context, cursor, records=0: (counted.append(records), cursors.append(cursor))
+
+    rows = list(stream.get_records(None))
+    assert len(rows) == sum(counted) == 5
+    assert cursors[-2] == {"done": ["https://t.me/+a"]}